@@ -1 +1 @@
-from . import evol, lisa, snr, source, strain, utils, visualisation
\ No newline at end of file
+from . import evol, lisa, snr, source, strain, tables, utils, visualisation
\ No newline at end of file
@@ -4,13 +4,16 @@ inspiral times and evolve binary parameters."""
 import legwork.utils as utils
 from numba import jit
 from scipy.integrate import odeint, quad
+from scipy.interpolate import CubicSpline
+from functools import lru_cache
 import numpy as np
 import astropy.units as u
 import astropy.constants as c
 from schwimmbad import MultiPool
 
-__all__ = ['de_dt', 'integrate_de_dt', 'evol_circ', 'evol_ecc',
+__all__ = ['de_dt', 'dw_dt', 'integrate_de_dt', 'evol_circ', 'evol_ecc',
            'get_t_merge_circ', 'get_t_merge_ecc', 'evolve_f_orb_circ',
+           'evolve_f_orb_ecc', 'get_t_to_f_orb',
            'check_mass_freq_input', 'create_timesteps_array']
 
 
@@ -48,9 +51,50 @@ def de_dt(e, times, beta, c_0):                             # pragma: no cover
     return dedt
 
 
+@jit
+def dw_dt(w, times, beta, c_0):                             # pragma: no cover
+    """Compute time derivative of w = (1 - e^2)^(-1/2)
+
+    Equivalent to :func:`legwork.evol.de_dt` but for the transformed variable
+    w, which (unlike the eccentricity) has a derivative that remains finite
+    and non-zero as e tends to 1. This makes it well suited to evolving
+    binaries backwards in time to high eccentricities.
+
+    Parameters
+    ----------
+    w : `float`
+        Initial value of w = (1 - e^2)^(-1/2)
+
+    times : `float/array`
+        Evolution timestep. Not actually used in function but required for use
+        with scipy's :func:`scipy.integrate.odeint`
+
+    beta : `float`
+        Constant defined in Peters and Mathews (1964) Eq. 5.9.
+        See :meth:`legwork.utils.beta`
+
+    c_0 : `float`
+        Constant defined in Peters and Mathews (1964) Eq. 5.11.
+        See :meth:`legwork.utils.c_0`
+
+    Returns
+    -------
+    dwdt : `float/array`
+        Time derivative of w
+    """
+    e = np.sqrt(1 - w**(-2))
+    dwdt = -19 / 12 * beta / c_0**4 * e**(-10 / 19) \
+        / (1 + (121/304) * e**2)**(1181/2299)
+    return dwdt
+
+
 def integrate_de_dt(args):                         # pragma: no cover
     """Wrapper that integrates :func:`legwork.evol.de_dt` with odeint
 
+    If the timesteps are decreasing (evolving backwards in time) then
+    :func:`legwork.evol.dw_dt` is integrated instead and converted back to
+    eccentricity since it remains well behaved as e tends to 1.
+
     Parameters
     ----------
     args : `list`
@@ -63,7 +107,12 @@ def integrate_de_dt(args):                         # pragma: no cover
        eccentricity evolution
     """
     ecc_i, timesteps, beta, c_0 = args
-    ecc_evol = odeint(de_dt, ecc_i, timesteps, args=(beta, c_0)).flatten()
+    if timesteps[-1] < 0:
+        w_i = (1 - ecc_i**2)**(-1/2)
+        w_evol = odeint(dw_dt, w_i, timesteps, args=(beta, c_0)).flatten()
+        ecc_evol = np.sqrt(1 - w_evol**(-2))
+    else:
+        ecc_evol = odeint(de_dt, ecc_i, timesteps, args=(beta, c_0)).flatten()
     return ecc_evol
 
 
@@ -140,6 +189,7 @@ def create_timesteps_array(a_i, beta, ecc_i=None,
     t_evol : `float/array`
         Amount of time for which to evolve each binaries. Required if
         ``timesteps`` is None. If None, then defaults to merger times.
+        Negative values evolve binaries backwards in time.
 
     n_steps : `int`
         Number of timesteps to take between t=0 and t=``t_evol``. Required if
@@ -147,8 +197,9 @@ def create_timesteps_array(a_i, beta, ecc_i=None,
 
     timesteps : `float/array`
         Array of exact timesteps to take when evolving each binary. Must be
-        monotonically increasing and start with t=0. Either supply a 1D array
-        to use for every binary or a 2D array that has a different array of
+        monotonic and start with t=0 (monotonically decreasing timesteps
+        evolve binaries backwards in time). Either supply a 1D array to use
+        for every binary or a 2D array that has a different array of
         timesteps for each binary. ``timesteps`` is used in place of
         ``t_evol`` and ``n_steps`` and takes precedence over them.
 
@@ -180,7 +231,9 @@ def evol_circ(t_evol=None, n_step=100, timesteps=None, beta=None, m_1=None,
               m_2=None, a_i=None, f_orb_i=None, output_vars='f_orb'):
     """Evolve an array of circular binaries for ``t_evol`` time
 
-    This function implements Peters & Mathews (1964) Eq. 5.9.
+    This function implements Peters & Mathews (1964) Eq. 5.9. Binaries can
+    be evolved backwards in time by supplying a negative ``t_evol`` (or
+    decreasing ``timesteps``).
 
     Note that all of {``beta``, ``m_1``, ``m_2``, ``a_i``, ``f_orb_i``} must
     have the same dimensions.
@@ -190,7 +243,8 @@ def evol_circ(t_evol=None, n_step=100, timesteps=None, beta=None, m_1=None,
 
     t_evol : `float/array`
         Amount of time for which to evolve each binaries. Required if
-        ``timesteps`` is None. Defaults to merger times.
+        ``timesteps`` is None. Defaults to merger times. Negative values
+        evolve binaries backwards in time.
 
     n_steps : `int`
         Number of timesteps to take between t=0 and t=``t_evol``. Required if
@@ -198,8 +252,9 @@ def evol_circ(t_evol=None, n_step=100, timesteps=None, beta=None, m_1=None,
 
     timesteps : `float/array`
         Array of exact timesteps to take when evolving each binary. Must be
-        monotonically increasing and start with t=0. Either supply a 1D array
-        to use for every binary or a 2D array that has a different array of
+        monotonic and start with t=0 (monotonically decreasing timesteps
+        evolve binaries backwards in time). Either supply a 1D array to use
+        for every binary or a 2D array that has a different array of
         timesteps for each binary. ``timesteps`` is used in place of
         ``t_evol`` and ``n_steps`` and takes precedence over them.
 
@@ -252,7 +307,7 @@ def evol_circ(t_evol=None, n_step=100, timesteps=None, beta=None, m_1=None,
                                        ecc_i=np.zeros_like(a_i), t_evol=t_evol,
                                        n_step=n_step, timesteps=timesteps)
 
-    # perform the evolution
+    # perform the evolution (negative timesteps simply increase `difference`)
     difference = a_i[:, np.newaxis]**4 - 4 * beta[:, np.newaxis] * timesteps
     difference = np.where(difference.value <= 0.0, 0.0, difference)
     a_evol = difference**(1/4)
@@ -291,7 +346,10 @@ def evol_ecc(ecc_i, t_evol=None, n_step=100, timesteps=None, beta=None,
              output_vars=['ecc', 'f_orb'], n_proc=1):
     """Evolve an array of eccentric binaries for ``t_evol`` time
 
-    This function use Peters & Mathews (1964) Eq. 5.11 and 5.13.
+    This function use Peters & Mathews (1964) Eq. 5.11 and 5.13. Binaries
+    can be evolved backwards in time by supplying a negative ``t_evol`` (or
+    decreasing ``timesteps``), in which case the eccentricity is integrated
+    using :func:`legwork.evol.dw_dt`.
 
     Note that all of {``beta``, ``m_1``, ``m_2``, ``ecc_i``, ``a_i``,
     ``f_orb_i``} must have the same dimensions.
@@ -303,7 +361,8 @@ def evol_ecc(ecc_i, t_evol=None, n_step=100, timesteps=None, beta=None,
 
     t_evol : `float/array`
         Amount of time for which to evolve each binaries. Required if
-        ``timesteps`` is None. Defaults to merger times.
+        ``timesteps`` is None. Defaults to merger times. Negative values
+        evolve binaries backwards in time.
 
     n_steps : `int`
         Number of timesteps to take between t=0 and t=``t_evol``. Required if
@@ -311,8 +370,9 @@ def evol_ecc(ecc_i, t_evol=None, n_step=100, timesteps=None, beta=None,
 
     timesteps : `float/array`
         Array of exact timesteps to take when evolving each binary. Must be
-        monotonically increasing and start with t=0. Either supply a 1D array
-        to use for every binary or a 2D array that has a different array of
+        monotonic and start with t=0 (monotonically decreasing timesteps
+        evolve binaries backwards in time). Either supply a 1D array to use
+        for every binary or a 2D array that has a different array of
         timesteps for each binary. ``timesteps`` is used in place of
         ``t_evol`` and ``n_steps`` and takes precedence over them.
 
@@ -385,8 +445,8 @@ def evol_ecc(ecc_i, t_evol=None, n_step=100, timesteps=None, beta=None,
                                                   beta,
                                                   c_0))))
     else:
-        ecc_evol = np.array([odeint(de_dt, ecc_i[i], timesteps[i],
-                                    args=(beta[i], c_0[i])).flatten()
+        ecc_evol = np.array([integrate_de_dt((ecc_i[i], timesteps[i],
+                                              beta[i], c_0[i]))
                              for i in range(len(ecc_i))])
 
     c_0 = c_0[:, np.newaxis] * u.m
@@ -618,3 +678,215 @@ def evolve_f_orb_circ(f_orb_i, m_c, t_evol, ecc_i=0.0, merge_f=1e9 * u.Hz):
     # fill in the values for binaries that are still inspiraling
     f_orb_f[inspiral] = np.power(inner_part[inspiral], -3/8)
     return f_orb_f
+
+
+def _log_a_over_c_0(e):
+    """log of a / c_0 as a function of eccentricity from Peters Eq. 5.11"""
+    return (12/19) * np.log(e) - np.log(1 - e**2) \
+        + (870/2299) * np.log(1 + (121/304) * e**2)
+
+
+@lru_cache(maxsize=None)
+def _tabulate_peters_5_14(e_min=1e-8, e_max=1 - 1e-6, n_points=2000):
+    """Tabulate the integral in Peters (1964) Eq. 5.14 and its inverse
+
+    The integral is computed on a grid that is uniform in logit(e) and cubic
+    splines are fit to log(integral) as a function of logit(e) and vice
+    versa. An additional spline inverts Peters Eq. 5.11 to give logit(e) as a
+    function of log(a / c_0). The tables are only built once per process.
+
+    Parameters
+    ----------
+    e_min : `float`
+        Minimum eccentricity in the table
+
+    e_max : `float`
+        Maximum eccentricity in the table
+
+    n_points : `int`
+        Number of points in the table
+
+    Returns
+    -------
+    log_integral : :class:`scipy.interpolate.CubicSpline`
+        log of the integral as a function of logit(e)
+
+    logit_e_from_integral : :class:`scipy.interpolate.CubicSpline`
+        logit(e) as a function of the log of the integral
+
+    logit_e_from_a : :class:`scipy.interpolate.CubicSpline`
+        logit(e) as a function of log(a / c_0)
+    """
+    def peters_5_14(e):
+        return e**(29/19) * (1 + (121/304) * e**2)**(1181/2299) \
+            / (1 - e**2)**(3/2)
+
+    logit_e = np.linspace(np.log(e_min / (1 - e_min)),
+                          np.log(e_max / (1 - e_max)), n_points)
+    e_range = 1 / (1 + np.exp(-logit_e))
+
+    # accumulate the integral one interval at a time
+    edges = np.concatenate(([0.0], e_range))
+    integral = np.cumsum([quad(peters_5_14, edges[i], edges[i + 1])[0]
+                          for i in range(n_points)])
+
+    return CubicSpline(logit_e, np.log(integral)), \
+        CubicSpline(np.log(integral), logit_e), \
+        CubicSpline(_log_a_over_c_0(e_range), logit_e)
+
+
+def evolve_f_orb_ecc(f_orb_i, m_c, t_evol, ecc_i, merge_f=1e9 * u.Hz):
+    """Evolve orbital frequency of eccentric binaries for ``t_evol`` time.
+
+    Unlike :func:`legwork.evol.evolve_f_orb_circ`, this accounts for the
+    evolution of the eccentricity. Combining Peters (1964) Eq. 5.11 and 5.14,
+    the final eccentricity is found by inverting a tabulated version of the
+    integral in Eq. 5.14, which is accurate to better than one part in 1e8 and
+    about as cheap as the circular expression (no ODE integration).
+
+    Binaries with ``ecc_i`` below 1e-8 use the circular expression (which is
+    exact up to terms of order e^2) and binaries with ``ecc_i`` above
+    1 - 1e-6 fall back to :func:`legwork.evol.evolve_f_orb_circ`.
+
+    Parameters
+    ----------
+    f_orb_i : `float/array`
+        Initial orbital frequency
+
+    m_c : `float/array`
+        Chirp mass
+
+    t_evol : `float/array`
+        Time over which the frequency evolves
+
+    ecc_i : `float/array`
+        Initial eccentricity
+
+    merge_f : `float`
+        Frequency to assign if the binary has already merged after ``t_evol``
+
+    Returns
+    -------
+    f_orb_f : `float/array`
+        Final orbital frequency
+    """
+    ecc_i = np.broadcast_to(ecc_i, f_orb_i.shape)
+
+    # start with the circular result and replace any tabulated binaries
+    f_orb_f = evolve_f_orb_circ(f_orb_i=f_orb_i, m_c=m_c, t_evol=t_evol,
+                                ecc_i=ecc_i, merge_f=merge_f)
+    tabulated = np.logical_and(ecc_i >= 1e-8, ecc_i <= 1 - 1e-6)
+    if not tabulated.any():
+        return f_orb_f
+
+    log_integral, logit_e_from_integral, _ = _tabulate_peters_5_14()
+
+    e_i = ecc_i[tabulated]
+    t_evol = t_evol[tabulated] if np.ndim(t_evol) > 0 else t_evol
+
+    # beta / a_i^4 depends only on chirp mass and frequency
+    beta_a_4 = 64 / 5 * (c.G * m_c[tabulated])**(5/3) \
+        * (2 * np.pi * f_orb_i[tabulated])**(8/3) / c.c**5
+
+    # Peters Eq. 5.14 gives I(e_f) = I(e_i) - 19/12 beta t / c_0^4 so write
+    # this as I(e_f) = I(e_i) * (1 - x) to avoid cancellation
+    logit_e_i = np.log(e_i / (1 - e_i))
+    log_I_i = log_integral(logit_e_i)
+    x = 19 / 12 * (beta_a_4 * t_evol).decompose().value \
+        * np.exp(4 * _log_a_over_c_0(e_i) - log_I_i)
+
+    # any merged binaries will have x >= 1
+    inspiral = x < 1.0
+    f_orb_tab = np.repeat(merge_f, len(e_i))
+
+    # take the difference through the inverse table so round-trip errors
+    # cancel for binaries that barely evolve
+    log_I_f = log_I_i[inspiral] + np.log1p(-x[inspiral])
+    logit_e_f = logit_e_i[inspiral] + logit_e_from_integral(log_I_f) \
+        - logit_e_from_integral(log_I_i[inspiral])
+    e_f = 1 / (1 + np.exp(-logit_e_f))
+
+    # convert change in separation to change in frequency with Kepler's law
+    f_orb_tab[inspiral] = f_orb_i[tabulated][inspiral] \
+        * np.exp(3 / 2 * (_log_a_over_c_0(e_i[inspiral])
+                          - _log_a_over_c_0(e_f)))
+
+    f_orb_f[tabulated] = f_orb_tab
+    return f_orb_f
+
+
+def get_t_to_f_orb(f_orb_i, f_orb_f, m_c, ecc_i=0.0):
+    """Computes the time for binaries to evolve from ``f_orb_i`` to
+    ``f_orb_f``
+
+    This is the inverse of :func:`legwork.evol.evolve_f_orb_ecc` (and of
+    :func:`legwork.evol.evolve_f_orb_circ` for circular binaries). Eccentric
+    binaries use the same tabulated solution of Peters (1964) Eq. 5.11 and
+    5.14. Binaries with ``ecc_i`` above 1 - 1e-6 instead return their
+    merger time (the large e approximation of Peters 1964), which is an upper
+    bound. Binaries that are already above ``f_orb_f`` return zero.
+
+    Parameters
+    ----------
+    f_orb_i : `float/array`
+        Initial orbital frequency
+
+    f_orb_f : `float/array`
+        Final orbital frequency
+
+    m_c : `float/array`
+        Chirp mass
+
+    ecc_i : `float/array`
+        Initial eccentricity
+
+    Returns
+    -------
+    t_evol : `float/array`
+        Time taken to reach ``f_orb_f``
+    """
+    ecc_i = np.broadcast_to(ecc_i, f_orb_i.shape)
+    f_orb_f = f_orb_f * np.ones(len(f_orb_i))
+    rising = f_orb_f > f_orb_i
+
+    # invert the circular expression from evolve_f_orb_circ
+    prefac = 2**(32/3) * np.pi**(8/3) / (5 * c.c**5) * (c.G * m_c)**(5/3)
+    t_evol = ((f_orb_i**(-8/3) - f_orb_f**(-8/3))
+              / (prefac * utils.peters_f(ecc_i))).to(u.yr)
+
+    # beta / a_i^4 depends only on chirp mass and frequency
+    beta_a_4 = 64 / 5 * (c.G * m_c)**(5/3) \
+        * (2 * np.pi * f_orb_i)**(8/3) / c.c**5
+
+    tabulated = np.logical_and(ecc_i >= 1e-8, ecc_i <= 1 - 1e-6)
+    if tabulated.any():
+        log_integral, _, logit_e_from_a = _tabulate_peters_5_14()
+
+        e_i = ecc_i[tabulated]
+        logit_e_i = np.log(e_i / (1 - e_i))
+        log_a_c_0_i = _log_a_over_c_0(e_i)
+
+        # separation shrinks as f_orb^(-2/3), correct for round-trip errors
+        log_a_c_0_f = log_a_c_0_i \
+            + 2 / 3 * np.log((f_orb_i / f_orb_f)[tabulated].decompose().value)
+        logit_e_f = logit_e_i + logit_e_from_a(log_a_c_0_f) \
+            - logit_e_from_a(log_a_c_0_i)
+
+        # apply Peters Eq. 5.14 between the two eccentricities
+        log_I_i = log_integral(logit_e_i)
+        log_I_f = log_integral(logit_e_f)
+        t_evol[tabulated] = 12 / 19 / beta_a_4[tabulated] \
+            * np.exp(log_I_i - 4 * log_a_c_0_i) \
+            * -np.expm1(log_I_f - log_I_i)
+
+    # large e approximation to the merger time (2nd Eq after Peters Eq. 5.14)
+    large_e = ecc_i > 1 - 1e-6
+    if large_e.any():
+        e_i = ecc_i[large_e]
+        t_evol[large_e] = np.exp(-4 * _log_a_over_c_0(e_i)) \
+            / (4 * beta_a_4[large_e]) * e_i**(48/19) \
+            * (768 / 425) * (1 - e_i**2)**(-1/2) \
+            * (1 + 121/304 * e_i**2)**(3480/2299)
+
+    t_evol[np.logical_not(rising)] = 0 * u.yr
+    return t_evol
@@ -1,12 +1,22 @@
 """Functions to compute LISA sensitivity curve"""
 
+import inspect
+import hashlib
 import numpy as np
 import astropy.units as u
+import legwork.strain as strain
 from scipy.interpolate import splev, splrep
 from importlib import resources
 
 __all__ = ['load_transfer_function', 'approximate_transfer_function',
-           'power_spectral_density']
+           'power_spectral_density', 'NoiseModel', 'LISA', 'TianQin',
+           'TabulatedNoise', 'register_noise_model', 'get_noise_model',
+           'population_confusion_noise']
+
+# minimum and maximum frequencies in Hz based on the R file from Robson+19
+MIN_F = 1e-7
+MAX_F = 2e0
+HUGE_NOISE = 1e30
 
 
 def load_transfer_function(f, fstar=19.09e-3):
@@ -104,11 +114,6 @@ def power_spectral_density(f, t_obs=4*u.yr, L=2.5e9, fstar=19.09e-3,
     # convert frequency from Hz to float for calculations
     f = f.to(u.Hz).value
 
-    # minimum and maximum frequencies in Hz based on the R file from Robson+19
-    MIN_F = 1e-7
-    MAX_F = 2e0
-    HUGE_NOISE = 1e30
-
     # overwrite frequencies that outside the range
     f = np.where(np.logical_and(f > MIN_F, f < MAX_F), f, 1e-7)
 
@@ -157,3 +162,522 @@ def power_spectral_density(f, t_obs=4*u.yr, L=2.5e9, fstar=19.09e-3,
     # replace values for bad frequencies (set to extremely high value)
     Sn = np.where(np.logical_and(f >= MIN_F, f <= MAX_F), Sn, HUGE_NOISE)
     return Sn / u.Hz
+
+
+class NoiseModel():
+    """Base class for detector noise models
+
+    Every model provides a vectorised :meth:`psd` that evaluates a cached
+    interpolation of the power spectral density on a log-spaced frequency
+    grid (so that many sources can share one model without re-interpolating)
+    and may be called directly in place of the interpolated sensitivity
+    curves used throughout legwork (e.g. ``interpolated_sc`` in
+    :mod:`legwork.snr`).
+
+    Subclasses only need to implement :meth:`exact_psd`. Subclasses whose
+    instances shouldn't be reused by :func:`legwork.lisa.get_noise_model`
+    (e.g. because they load data that may change) set ``_cacheable`` to
+    False.
+
+    Parameters
+    ----------
+    n_grid : `int`
+        Number of points in the log-spaced frequency grid
+
+    f_min : `float`
+        Minimum frequency of the grid in Hz (noise is ``HUGE_NOISE`` below)
+
+    f_max : `float`
+        Maximum frequency of the grid in Hz (noise is ``HUGE_NOISE`` above)
+
+    Attributes
+    ----------
+    t_obs : `float`
+        Observation time that the noise is for, or None if the noise doesn't
+        depend on the observation time
+
+    key : `tuple`
+        Key that identifies the model by its class and the contents of its
+        parameters if it was created by :func:`legwork.lisa.get_noise_model`
+        (and so is shared by every equivalent instance), otherwise None
+    """
+    _cacheable = True
+    key = None
+
+    def __init__(self, n_grid=10000, f_min=MIN_F, f_max=MAX_F):
+        self.n_grid = n_grid
+        self.f_min = f_min
+        self.f_max = f_max
+        self.t_obs = None
+        self._log_f = None
+        self._log_psd = None
+
+    def exact_psd(self, f):
+        """Evaluate the power spectral density without interpolation
+
+        Parameters
+        ----------
+        f : `float/array`
+            Frequencies in Hz (without units)
+
+        Returns
+        -------
+        psd : `float/array`
+            Power spectral density in 1/Hz (without units)
+        """
+        raise NotImplementedError("Noise models must implement `exact_psd`")
+
+    def _build_grid(self):
+        """Evaluate the exact power spectral density on the log grid"""
+        self._log_f = np.linspace(np.log10(self.f_min), np.log10(self.f_max),
+                                  self.n_grid)
+        self._log_psd = np.log10(self.exact_psd(10**self._log_f))
+
+    def psd(self, f):
+        """Evaluate the power spectral density by interpolating the cached
+        grid in log-log space
+
+        Parameters
+        ----------
+        f : `float/array`
+            Frequencies at which to evaluate the power spectral density. Must
+            have astropy units of frequency.
+
+        Returns
+        -------
+        psd : `float/array`
+            Power spectral density with units of 1/Hz (``HUGE_NOISE`` outside
+            of the grid)
+        """
+        if self._log_f is None:
+            self._build_grid()
+        f = f.to(u.Hz).value
+        with np.errstate(divide="ignore"):
+            log_f = np.log10(f)
+        psd = 10**np.interp(log_f, self._log_f, self._log_psd)
+        in_grid = np.logical_and(log_f >= self._log_f[0],
+                                 log_f <= self._log_f[-1])
+        return np.where(in_grid, psd, HUGE_NOISE) / u.Hz
+
+    def get_grid(self):
+        """Get the grid that :meth:`psd` interpolates
+
+        Since :meth:`psd` is linear in log-log space between the points of
+        the grid, its minimum over any frequency range is found either at the
+        ends of the range or at one of the grid points that it contains.
+
+        Returns
+        -------
+        f : `float/array`
+            Frequencies of the grid with units of Hz
+
+        psd : `float/array`
+            Power spectral density at each frequency with units of 1/Hz
+        """
+        if self._log_f is None:
+            self._build_grid()
+        return 10**self._log_f * u.Hz, 10**self._log_psd / u.Hz
+
+    def __call__(self, f):
+        return self.psd(f)
+
+    def with_t_obs(self, t_obs):
+        """Get the equivalent noise model for a different observation time
+
+        Parameters
+        ----------
+        t_obs : `float`
+            Observation time
+
+        Returns
+        -------
+        model : :class:`legwork.lisa.NoiseModel`
+            Noise model for ``t_obs`` (the same model unless the noise
+            depends on the observation time)
+        """
+        return self
+
+
+class LISA(NoiseModel):
+    """LISA noise model from Robson+19 (see
+    :func:`legwork.lisa.power_spectral_density` for details of the
+    parameters)"""
+    def __init__(self, t_obs=4 * u.yr, L=2.5e9, fstar=19.09e-3,
+                 approximate_R=False, include_confusion_noise=True,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.t_obs = t_obs
+        self._grid_kwargs = kwargs
+        self.params = {"t_obs": t_obs, "L": L, "fstar": fstar,
+                       "approximate_R": approximate_R,
+                       "include_confusion_noise": include_confusion_noise}
+
+    def exact_psd(self, f):
+        return power_spectral_density(f * u.Hz, **self.params).value
+
+    def with_t_obs(self, t_obs):
+        if not self.params["include_confusion_noise"] \
+                or t_obs == self.params["t_obs"]:
+            return self
+        params = dict(self.params)
+        params["t_obs"] = t_obs
+        return get_noise_model("lisa", **self._grid_kwargs, **params)
+
+
+class TianQin(NoiseModel):
+    """TianQin sky-averaged noise model from Huang+20 (Eq. 5)
+
+    Parameters
+    ----------
+    L : `float`
+        Arm length in metres (default = sqrt(3) x 10^8 m)
+
+    S_x : `float`
+        Displacement noise in m^2 / Hz (default = 10^-24)
+
+    S_a : `float`
+        Acceleration noise in m^2 s^-4 / Hz (default = 10^-30)
+
+    **kwargs
+        Grid parameters for :class:`legwork.lisa.NoiseModel`
+    """
+    def __init__(self, L=np.sqrt(3) * 1e8, S_x=1e-24, S_a=1e-30, **kwargs):
+        super().__init__(**kwargs)
+        self.params = {"L": L, "S_x": S_x, "S_a": S_a}
+
+    def exact_psd(self, f):
+        L, S_x, S_a = self.params["L"], self.params["S_x"], self.params["S_a"]
+        fstar = 299792458 / (2 * np.pi * L)
+        return 10 / (3 * L**2) * (S_x + 4 * S_a / (2 * np.pi * f)**4
+                                  * (1 + 1e-4 / f)) \
+            * (1 + 0.6 * (f / fstar)**2)
+
+
+class TabulatedNoise(NoiseModel):
+    """Noise model from a tabulated power spectral density
+
+    Tables loaded from a file are memory mapped rather than read into memory.
+    The table is interpolated in log-log space (with ``HUGE_NOISE`` outside
+    of the tabulated frequencies).
+
+    Parameters
+    ----------
+    path : `str`
+        Path to a ``.npy`` file containing an array of shape ``(2, N)`` of
+        increasing frequencies in Hz and the power spectral density in 1/Hz,
+        e.g. saved with ``np.save(path, np.vstack((f, psd)))``
+
+    table : `array`
+        An array of the same form to use instead of loading one from ``path``
+
+    Raises
+    ------
+    ValueError
+        If exactly one of ``path`` and ``table`` isn't supplied, the table
+        doesn't have shape ``(2, N)`` or the frequencies aren't increasing
+    """
+    # the file may be rewritten so every request loads it again
+    _cacheable = False
+
+    def __init__(self, path=None, table=None):
+        if (path is None) == (table is None):
+            raise ValueError("Exactly one of `path` and `table` is required")
+        if table is None:
+            table = np.load(path, mmap_mode="r")
+        else:
+            table = np.asarray(table)
+        if table.ndim != 2 or table.shape[0] != 2:
+            raise ValueError("Tabulated noise must have shape (2, N)")
+        if np.any(np.diff(table[0]) <= 0):
+            raise ValueError("Tabulated frequencies must be increasing")
+        super().__init__(n_grid=table.shape[1], f_min=table[0, 0],
+                         f_max=table[0, -1])
+        self.path = path
+        self._table = table
+
+    def exact_psd(self, f):
+        return 10**np.interp(np.log10(f), np.log10(self._table[0]),
+                             np.log10(self._table[1]))
+
+    def _build_grid(self):
+        # the table is already the grid
+        self._log_f = np.log10(self._table[0])
+        self._log_psd = np.log10(self._table[1])
+
+
+# registry of noise models and the (most recently used) instances that have
+# been created
+NOISE_MODELS = {"lisa": LISA, "tianqin": TianQin, "tabulated": TabulatedNoise}
+_NOISE_MODEL_CACHE = {}
+_NOISE_MODEL_CACHE_SIZE = 32
+
+
+def register_noise_model(name, model_class):
+    """Register a noise model so that it can be created with
+    :func:`legwork.lisa.get_noise_model`
+
+    Parameters
+    ----------
+    name : `str`
+        Name of the noise model
+
+    model_class : `class`
+        Subclass of :class:`legwork.lisa.NoiseModel`
+
+    Raises
+    ------
+    ValueError
+        If ``model_class`` is not a subclass of
+        :class:`legwork.lisa.NoiseModel`
+    """
+    if not (isinstance(model_class, type)
+            and issubclass(model_class, NoiseModel)):
+        raise ValueError("`model_class` must be a subclass of NoiseModel")
+    NOISE_MODELS[name.lower()] = model_class
+
+
+def get_noise_model(name, **kwargs):
+    """Get a noise model from the registry
+
+    Instances are cached, so requesting the same model with the same
+    parameters again returns the same instance (and thus reuses its
+    interpolation). Array parameters are compared by their contents and only
+    the most recently used models are kept. Models that load data (such as
+    "tabulated") and models with parameters that can't be compared are
+    created anew for every request.
+
+    Parameters
+    ----------
+    name : `str`
+        Name of the noise model (one of ``NOISE_MODELS``, which by default
+        includes "lisa", "tianqin" and "tabulated")
+
+    **kwargs
+        Parameters of the noise model
+
+    Returns
+    -------
+    model : :class:`legwork.lisa.NoiseModel`
+        The noise model
+
+    Raises
+    ------
+    ValueError
+        If ``name`` is not in the registry
+    """
+    name = name.lower()
+    if name not in NOISE_MODELS:
+        raise ValueError("Unknown noise model `{}`, choose from {}".format(
+            name, list(NOISE_MODELS.keys())))
+
+    # fill in the defaults so equivalent requests share an instance
+    bound = inspect.signature(NOISE_MODELS[name]).bind(**kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    arguments.update(arguments.pop("kwargs", {}))
+    if not NOISE_MODELS[name]._cacheable:
+        return NOISE_MODELS[name](**kwargs)
+    try:
+        key = (name, NOISE_MODELS[name],
+               tuple((arg, _noise_model_key(value))
+                     for arg, value in sorted(arguments.items())))
+        hash(key)
+    except TypeError:
+        return NOISE_MODELS[name](**kwargs)
+
+    # move the model to the end so the least recently used is evicted first
+    if key in _NOISE_MODEL_CACHE:
+        _NOISE_MODEL_CACHE[key] = _NOISE_MODEL_CACHE.pop(key)
+    else:
+        if len(_NOISE_MODEL_CACHE) >= _NOISE_MODEL_CACHE_SIZE:
+            _NOISE_MODEL_CACHE.pop(next(iter(_NOISE_MODEL_CACHE)))
+        _NOISE_MODEL_CACHE[key] = NOISE_MODELS[name](**kwargs)
+        _NOISE_MODEL_CACHE[key].key = key
+    return _NOISE_MODEL_CACHE[key]
+
+
+def _noise_model_key(value):
+    """Convert a noise model parameter to a hashable key, using the contents
+    of arrays since their repr may be truncated"""
+    if isinstance(value, u.Quantity):
+        return (value.unit.to_string(), _noise_model_key(value.value))
+    if isinstance(value, (np.ndarray, list, tuple)):
+        value = np.ascontiguousarray(value)
+        if value.dtype == object:
+            raise TypeError("Object arrays can't be used as a key")
+        return (value.shape, value.dtype.str,
+                hashlib.sha1(value.tobytes()).hexdigest())
+    return value
+
+
+def population_confusion_noise(m_c, f_orb, ecc, dist, t_obs=4 * u.yr,
+                               snr_threshold=7, harmonics=2, instrument=None,
+                               f_min=1e-5 * u.Hz, f_max=1e-2 * u.Hz,
+                               smoothing_bins=1000, max_iter=20,
+                               chunk_size=1000000, interpolated_g=None,
+                               n_grid=10000, ret_resolved=False):
+    """Computes the confusion noise from unresolved sources in a population
+    by iteratively subtracting the bright sources
+
+    The power of each harmonic of each source, :math:`h_{0, n}^2 T_{\rm obs}`,
+    is binned into frequency bins of width :math:`1 / T_{\rm obs}`. The
+    confusion noise is the median of each block of ``smoothing_bins`` bins,
+    linearly interpolated between the centres of the blocks (and held
+    constant between the outermost centres and ``f_min``/``f_max``, outside
+    of which it is zero). Sources with an SNR above ``snr_threshold`` against
+    the instrument noise plus this confusion noise are resolved and removed
+    from the foreground, which is then recalculated. This is repeated until
+    no more sources are resolved (with a warning if this takes more than
+    ``max_iter`` iterations).
+
+    Each iteration streams over the population in chunks of ``chunk_size``
+    sources that are accumulated into a histogram, so memory use doesn't
+    grow with the size of the population. Sources are treated as stationary.
+
+    Parameters
+    ----------
+    m_c : `float/array`
+        Chirp mass
+
+    f_orb : `float/array`
+        Orbital frequency
+
+    ecc : `float/array`
+        Eccentricity
+
+    dist : `float/array`
+        Distance to the source
+
+    t_obs : `float`
+        Observation time (default 4 years)
+
+    snr_threshold : `float`
+        SNR above which a source is resolved and subtracted
+
+    harmonics : `int/array`
+        Harmonic(s) of each source to include (default is only n = 2, which
+        is sufficient for circular populations)
+
+    instrument : :class:`legwork.lisa.NoiseModel`
+        Instrument noise model. Default is the LISA model without confusion
+        noise.
+
+    f_min : `float`
+        Minimum frequency of the foreground bins
+
+    f_max : `float`
+        Maximum frequency of the foreground bins
+
+    smoothing_bins : `int`
+        Number of frequency bins in each block whose median is taken
+
+    max_iter : `int`
+        Maximum number of subtraction iterations (at least 1)
+
+    chunk_size : `int`
+        Number of sources to process at once
+
+    interpolated_g : `function`
+        A function returned by :class:`scipy.interpolate.interp2d` (or a
+        :class:`legwork.tables.TiledGInterpolator`) that computes g(n,e)
+        from Peters (1964). Default is None and uses exact g(n,e).
+
+    n_grid : `int`
+        Number of points in the tabulated noise curve
+
+    ret_resolved : `boolean`
+        Whether to also return a mask of the resolved sources
+
+    Returns
+    -------
+    noise_model : :class:`legwork.lisa.TabulatedNoise`
+        Instrument noise plus the confusion noise of the population for
+        ``t_obs``, which can be used as a ``noise_model`` in
+        :class:`legwork.source.Source` (or given to
+        :meth:`legwork.source.Source.set_sc`)
+
+    resolved : `bool/array`
+        Mask of the resolved sources (only returned if
+        ``ret_resolved=True``)
+
+    Raises
+    ------
+    ValueError
+        If ``max_iter`` is less than 1
+    """
+    if max_iter < 1:
+        raise ValueError("`max_iter` must be at least 1")
+    if instrument is None:
+        instrument = get_noise_model("lisa", t_obs=t_obs,
+                                     include_confusion_noise=False)
+    harmonics = np.atleast_1d(harmonics)
+    t_obs_s = t_obs.to(u.s).value
+    f_min, f_max = f_min.to(u.Hz).value, f_max.to(u.Hz).value
+
+    # frequency bins of width 1 / t_obs and the blocks that are smoothed
+    # (where the last block may be only partly filled)
+    n_bins = int(np.ceil((f_max - f_min) * t_obs_s))
+    n_blocks = int(np.ceil(n_bins / smoothing_bins))
+    f_bins = f_min + (np.arange(n_bins) + 0.5) / t_obs_s
+    starts = np.arange(n_blocks) * smoothing_bins
+    ends = np.minimum(starts + smoothing_bins, n_bins) - 1
+    f_blocks = (f_bins[starts] + f_bins[ends]) / 2
+    instrument_bins = instrument.psd(f_bins * u.Hz).value
+
+    n_sources = len(f_orb)
+    resolved = np.zeros(n_sources).astype(bool)
+    confusion_bins = np.full(n_bins, np.inf)
+    for _ in range(max_iter):
+        total_bins = instrument_bins + confusion_bins
+        power = np.zeros(n_bins)
+        n_resolved = resolved.sum()
+        for start in range(0, n_sources, chunk_size):
+            chunk = slice(start, start + chunk_size)
+            unresolved = np.flatnonzero(~resolved[chunk]) + start
+            if len(unresolved) == 0:
+                continue
+
+            h_0_2 = strain.h_0_n(m_c=m_c[unresolved],
+                                 f_orb=f_orb[unresolved], ecc=ecc[unresolved],
+                                 n=harmonics, dist=dist[unresolved],
+                                 interpolated_g=interpolated_g)[:, 0, :]**2
+            power_n = h_0_2.value * t_obs_s
+
+            f_n = f_orb[unresolved].to(u.Hz).value[:, np.newaxis] * harmonics
+            bins = np.floor((f_n - f_min) * t_obs_s).astype(int)
+            in_bins = np.logical_and(bins >= 0, bins < n_bins)
+
+            # resolve any sources that are loud enough
+            snr_2 = np.where(in_bins, power_n, 0.0) \
+                / total_bins[np.where(in_bins, bins, 0)]
+            loud = np.sqrt(snr_2.sum(axis=1)) > snr_threshold
+            resolved[unresolved[loud]] = True
+
+            # accumulate the power of the remaining sources
+            quiet = np.logical_and(in_bins, ~loud[:, np.newaxis])
+            power += np.bincount(bins[quiet], weights=power_n[quiet],
+                                 minlength=n_bins)
+
+        # smooth with the median of each block of bins
+        padded = np.full(n_blocks * smoothing_bins, np.nan)
+        padded[:n_bins] = power
+        medians = np.nanmedian(padded.reshape(n_blocks, smoothing_bins),
+                               axis=1)
+        confusion_bins = np.interp(f_bins, f_blocks, medians)
+
+        if resolved.sum() == n_resolved and np.isfinite(total_bins).all():
+            break
+    else:
+        print("Warning: the confusion noise did not converge within",
+              "{} iterations, increase `max_iter`".format(max_iter))
+
+    # tabulate the total noise across the whole band
+    f_grid = np.logspace(np.log10(MIN_F), np.log10(MAX_F), n_grid)
+    in_bins = np.logical_and(f_grid >= f_min, f_grid <= f_max)
+    confusion = np.where(in_bins, np.interp(f_grid, f_blocks, medians), 0.0)
+    psd = instrument.psd(f_grid * u.Hz).value + confusion
+    noise_model = TabulatedNoise(table=np.vstack((f_grid, psd)))
+    noise_model.t_obs = t_obs
+
+    return (noise_model, resolved) if ret_resolved else noise_model
+
@@ -7,8 +7,8 @@ import legwork.utils as utils
 import legwork.evol as evol
 import astropy.units as u
 
-__all__ = ['snr_circ_stationary', 'snr_ecc_stationary', 'snr_circ_evolving',
-           'snr_ecc_evolving']
+__all__ = ['snr_circ_stationary', 'snr_ecc_stationary', 'get_harmonic_window',
+           'snr_upper_bound', 'snr_circ_evolving', 'snr_ecc_evolving']
 
 
 def snr_circ_stationary(m_c, f_orb, dist, t_obs, interpolated_g=None,
@@ -26,48 +26,66 @@ def snr_circ_stationary(m_c, f_orb, dist, t_obs, interpolated_g=None,
     dist : `float/array`
         Distance to the source
 
-    t_obs : `float`
-        Total duration of the observation
+    t_obs : `float/array`
+        Total duration of the observation. If an array is given then the SNR
+        is calculated for each duration whilst sharing the strain and g(n,e)
+        calculations, and the output gains an extra axis.
 
     interpolated_g : `function`
-        A function returned by :class:`scipy.interpolate.interp2d` that
+        A function returned by :class:`scipy.interpolate.interp2d` (or a
+        :class:`legwork.tables.TiledGInterpolator`) that
         computes g(n,e) from Peters (1964). The code assumes
         that the function returns the output sorted as with the
         interp2d returned functions (and thus unsorts).
         Default is None and uses exact g(n,e) in this case.
 
     interpolated_sn : `function`
-        A function returned by :class:`scipy.interpolate.interp1d` that
-        computes the LISA sensitivity curve. Default is None and uses exact
-        values. Note: take care to ensure that your interpolated function has
-        the same LISA observation time as ``t_obs``.
+        A function returned by :class:`scipy.interpolate.interp1d` (or a
+        :class:`legwork.lisa.NoiseModel`) that computes the LISA sensitivity
+        curve. Default is None and uses exact values. Note: take care to
+        ensure that your interpolated function has the same LISA observation
+        time as ``t_obs``. If ``t_obs`` is an array then this may also be a
+        list with one function for each duration, where durations sharing
+        the same function share noise evaluations.
 
     Returns
     -------
     snr : `float/array`
-        SNR for each binary
+        SNR for each binary (with shape ``(n_sources, len(t_obs))`` if
+        ``t_obs`` is an array)
     """
 
+    t_obs_arr, noise_groups = _group_t_obs(t_obs, interpolated_sc)
+
     # only need to compute n=2 harmonic for circular
     h_0_circ_2 = strain.h_0_n(m_c=m_c, f_orb=f_orb,
                               ecc=np.zeros_like(f_orb).value, n=2, dist=dist,
                               interpolated_g=interpolated_g).flatten()**2
 
-    h_f_src_circ_2 = h_0_circ_2 * t_obs
-    if interpolated_sc is not None:
-        h_f_lisa_2 = interpolated_sc(2 * f_orb)
-    else:
-        h_f_lisa_2 = lisa.power_spectral_density(f=2 * f_orb, t_obs=t_obs)
-    snr = (h_f_src_circ_2 / h_f_lisa_2)**0.5
+    # the signal is shared by every observation time, only the noise changes
+    snr_2 = np.zeros((len(h_0_circ_2), len(t_obs_arr)))
+    for inds, sc in noise_groups:
+        h_f_src_circ_2 = h_0_circ_2[:, np.newaxis] * t_obs_arr[inds]
+        h_f_lisa_2 = _psd(2 * f_orb, sc, t_obs_arr[inds[0]]).reshape(-1, 1)
+        snr_2[:, inds] = (h_f_src_circ_2 / h_f_lisa_2).decompose().value
+
+    snr = np.sqrt(snr_2) * u.dimensionless_unscaled
 
-    return snr.decompose()
+    return _match_t_obs(snr, t_obs)
 
 
 def snr_ecc_stationary(m_c, f_orb, ecc, dist, t_obs, harmonics_required,
                        interpolated_g=None, interpolated_sc=None,
-                       ret_max_snr_harmonic=False):
+                       ret_max_snr_harmonic=False, snr_tol=1e-4,
+                       ret_harmonic_snr_2=False, harmonic_snr_2_tol=1e-3):
     """Computes SNR for eccentric and stationary sources
 
+    Only a window of harmonics is evaluated for each source (see
+    :func:`legwork.snr.get_harmonic_window`), which excludes harmonics that
+    lie outside of the LISA band or that cannot contribute more than a
+    fraction ``snr_tol`` of the total SNR^2. Sources with similar windows are
+    grouped together and evaluated at once.
+
     Parameters
     ----------
     m_c : `float/array`
@@ -82,73 +100,328 @@ def snr_ecc_stationary(m_c, f_orb, ecc, dist, t_obs, harmonics_required,
     dist : `float/array`
         Distance to the source
 
-    t_obs : `float`
-        Total duration of the observation
+    t_obs : `float/array`
+        Total duration of the observation. If an array is given then the SNR
+        is calculated for each duration whilst sharing the strain and g(n,e)
+        calculations, and the output gains an extra axis.
 
     harmonics_required : `integer`
         Maximum integer harmonic to compute
 
     interpolated_g : `function`
-        A function returned by :class:`scipy.interpolate.interp2d` that
+        A function returned by :class:`scipy.interpolate.interp2d` (or a
+        :class:`legwork.tables.TiledGInterpolator`) that
         computes g(n,e) from Peters (1964). The code assumes
         that the function returns the output sorted as with the
         interp2d returned functions (and thus unsorts).
         Default is None and uses exact g(n,e) in this case.
 
     interpolated_sn : `function`
-        A function returned by :class:`scipy.interpolate.interp1d` that
-        computes the LISA sensitivity curve. Default is None and uses exact
-        values. Note: take care to ensure that your interpolated function has
-        the same LISA observation time as ``t_obs``.
+        A function returned by :class:`scipy.interpolate.interp1d` (or a
+        :class:`legwork.lisa.NoiseModel`) that computes the LISA sensitivity
+        curve. Default is None and uses exact values. Note: take care to
+        ensure that your interpolated function has the same LISA observation
+        time as ``t_obs``. If ``t_obs`` is an array then this may also be a
+        list with one function for each duration, where durations sharing
+        the same function share noise evaluations.
 
     ret_max_snr_harmonic : `boolean`
         Whether to return (in addition to the snr), the harmonic with the
         maximum SNR
 
+    snr_tol : `float`
+        Maximum fractional error on SNR^2 allowed from skipping harmonics
+        below the noise floor. Set to 0 to only skip harmonics outside of the
+        LISA band.
+
+    ret_harmonic_snr_2 : `boolean`
+        Whether to return (in addition to the snr), the SNR^2 of each
+        harmonic that contributes at least a fraction ``harmonic_snr_2_tol``
+        of the total SNR^2 of its source
+
+    harmonic_snr_2_tol : `float`
+        Minimum fractional contribution to the total SNR^2 of a harmonic for
+        it to be returned when ``ret_harmonic_snr_2=True``
+
     Returns
     -------
     snr : `float/array`
-        SNR for each binary
+        SNR for each binary (with shape ``(n_sources, len(t_obs))`` if
+        ``t_obs`` is an array)
 
     max_snr_harmonic : `int/array`
         harmonic with maximum SNR for each binary (only returned if
         ``ret_max_snr_harmonic=True``)
+
+    harmonic_snr_2 : `tuple`
+        Sparse (CSR-like) per harmonic SNR^2 of each binary (only returned if
+        ``ret_harmonic_snr_2=True``) as ``(offsets, harmonics, snr_2)``, where
+        the harmonics of binary ``i`` and their SNR^2 are
+        ``harmonics[offsets[i]:offsets[i + 1]]`` and
+        ``snr_2[offsets[i]:offsets[i + 1]]``
     """
-    # define range of harmonics
-    n_range = np.arange(1, harmonics_required + 1).astype(int)
+    t_obs_arr, noise_groups = _group_t_obs(t_obs, interpolated_sc)
+    if ret_harmonic_snr_2 and np.ndim(t_obs) > 0:
+        raise ValueError("`ret_harmonic_snr_2` requires a single `t_obs`")
+
+    # use every harmonic required for any of the sensitivity curves
+    windows = [get_harmonic_window(m_c=m_c, f_orb=f_orb, ecc=ecc, dist=dist,
+                                   t_obs=t_obs_arr[inds[0]],
+                                   harmonics_required=harmonics_required,
+                                   interpolated_sc=sc, snr_tol=snr_tol)
+               for inds, sc in noise_groups]
+    n_lo = np.min([window[0] for window in windows], axis=0)
+    n_hi = np.max([window[1] for window in windows], axis=0)
+
+    snr_2 = np.zeros((len(m_c), len(t_obs_arr)))
+    max_snr_harmonic = np.ones((len(m_c), len(t_obs_arr))).astype(int)
+    harmonic_snr_2 = ([], [], [])
+
+    # group sources by the powers of two that bound their windows
+    has_window = n_lo <= n_hi
+    groups = np.stack((np.floor(np.log2(n_lo[has_window])),
+                       np.floor(np.log2(n_hi[has_window]))), axis=1)
+    for group in np.unique(groups, axis=0):
+        match = np.zeros(len(m_c)).astype(bool)
+        match[has_window] = (groups == group).all(axis=1)
+
+        # define range of harmonics
+        n_range = np.arange(n_lo[match].min(), n_hi[match].max() + 1)
+
+        # calculate source signal
+        h_0_ecc_n_2 = strain.h_0_n(m_c=m_c[match], f_orb=f_orb[match],
+                                   ecc=ecc[match], n=n_range,
+                                   dist=dist[match],
+                                   interpolated_g=interpolated_g)**2
+
+        # reshape the output since only one timestep
+        h_0_ecc_n_2 = h_0_ecc_n_2.reshape(len(m_c[match]), len(n_range))
+
+        # calculate harmonic frequencies and noise for each curve
+        f_n = n_range[np.newaxis, :] * f_orb[match][:, np.newaxis]
+        snr_n_2 = np.zeros((len(m_c[match]), len(t_obs_arr), len(n_range)))
+        for inds, sc in noise_groups:
+            h_f_src_ecc_2 = h_0_ecc_n_2[:, np.newaxis, :] \
+                * t_obs_arr[inds][np.newaxis, :, np.newaxis]
+            h_f_lisa_n_2 = _psd(f_n, sc, t_obs_arr[inds[0]])
+            snr_n_2[:, inds, :] = (h_f_src_ecc_2
+                                   / h_f_lisa_n_2[:, np.newaxis, :]
+                                   ).decompose().value
+
+        # only count the harmonics in each source's own window
+        snr_n_2 *= _in_window(n_range, n_lo[match], n_hi[match])
+
+        max_snr_harmonic[match] = n_range[np.argmax(snr_n_2, axis=2)]
+        snr_2[match] = np.sum(snr_n_2, axis=2)
+        if ret_harmonic_snr_2:
+            _append_harmonic_snr_2(harmonic_snr_2, np.flatnonzero(match),
+                                   n_range, snr_n_2[:, 0, :],
+                                   harmonic_snr_2_tol)
 
-    # calculate source signal
-    h_0_ecc_n_2 = strain.h_0_n(m_c=m_c, f_orb=f_orb,
-                               ecc=ecc, n=n_range, dist=dist,
-                               interpolated_g=interpolated_g)**2
+    # calculate the signal-to-noise ratio
+    snr = np.sqrt(snr_2) * u.dimensionless_unscaled
 
-    # reshape the output since only one timestep
-    h_0_ecc_n_2 = h_0_ecc_n_2.reshape(len(m_c), harmonics_required)
-    h_f_src_ecc_2 = h_0_ecc_n_2 * t_obs
+    return _snr_output(_match_t_obs(snr, t_obs),
+                       _match_t_obs(max_snr_harmonic, t_obs), harmonic_snr_2,
+                       ret_max_snr_harmonic, ret_harmonic_snr_2)
 
-    # calculate harmonic frequencies and noise
-    f_n = n_range[np.newaxis, :] * f_orb[:, np.newaxis]
-    if interpolated_sc is not None:
-        h_f_lisa_n_2 = interpolated_sc(f_n.flatten())
-        h_f_lisa_n_2 = h_f_lisa_n_2.reshape(f_n.shape)
-    else:
-        h_f_lisa_n_2 = lisa.power_spectral_density(f=f_n, t_obs=t_obs)
 
-    snr_n_2 = (h_f_src_ecc_2 / h_f_lisa_n_2).decompose()
+def get_harmonic_window(m_c, f_orb, ecc, dist, t_obs, harmonics_required,
+                        interpolated_sc=None, snr_tol=1e-4):
+    """Find the window of harmonics that contribute to the SNR of each
+    stationary source
 
-    if ret_max_snr_harmonic:
-        max_snr_harmonic = np.argmax(snr_n_2, axis=1) + 1
+    Harmonics with frequencies outside of the LISA band (where the noise is
+    ``lisa.HUGE_NOISE``) are always excluded. Harmonics are also excluded from
+    either end of the window if an upper bound on their combined SNR^2 is
+    below ``snr_tol`` times a lower bound on the total SNR^2. The upper bound
+    uses g(n, e) <= F(e) and a lower envelope of the sensitivity curve,
+    whilst the lower bound is the exact SNR^2 of the harmonic at which the
+    power peaks (approximated following Wen 2003).
 
-    # calculate the signal-to-noise ratio
-    snr = (np.sum(snr_n_2, axis=1))**0.5
+    The envelope is taken from the grid of a
+    :class:`legwork.lisa.NoiseModel`, between whose points the noise is
+    log-log linear, so the error is guaranteed to be below ``snr_tol``. Other
+    sensitivity curves are sampled on a fine grid instead, in which case the
+    guarantee only holds up to structure between the samples.
+
+    Parameters
+    ----------
+    m_c : `float/array`
+        Chirp mass
+
+    f_orb : `float/array`
+        Orbital frequency
+
+    ecc : `float/array`
+        Eccentricity
+
+    dist : `float/array`
+        Distance to the source
+
+    t_obs : `float`
+        Total duration of the observation
+
+    harmonics_required : `integer`
+        Maximum integer harmonic to compute
+
+    interpolated_sn : `function`
+        A function returned by :class:`scipy.interpolate.interp1d` (or a
+        :class:`legwork.lisa.NoiseModel`) that computes the LISA sensitivity
+        curve. Default is None and uses exact values.
+
+    snr_tol : `float`
+        Maximum fractional error on SNR^2 allowed from skipping harmonics
+        below the noise floor
+
+    Returns
+    -------
+    n_lo : `int/array`
+        Lowest harmonic to evaluate for each source
+
+    n_hi : `int/array`
+        Highest harmonic to evaluate for each source (sources with no
+        harmonics in band have ``n_hi < n_lo``)
+    """
+    def psd(f):
+        if interpolated_sc is not None:
+            return interpolated_sc(f).to(1 / u.Hz).value
+        return lisa.power_spectral_density(f=f, t_obs=t_obs).value
+
+    f_orb_val = f_orb.to(u.Hz).value
+
+    # harmonics outside of the band have HUGE_NOISE and contribute nothing
+    n_lo = np.maximum(np.ceil(lisa.MIN_F / f_orb_val), 1)
+    n_hi = np.minimum(np.floor(lisa.MAX_F / f_orb_val), harmonics_required)
+    if snr_tol <= 0.0:
+        return n_lo.astype(int), n_hi.astype(int)
+
+    # SNR_n^2 = amp_2 * g(n, e) / n^2 / S(n f) and g(2, 0) = 1 gives amp_2
+    h_0_circ_2 = strain.h_0_n(m_c=m_c, f_orb=f_orb,
+                              ecc=np.zeros_like(f_orb).value, n=2,
+                              dist=dist).flatten()
+    amp_2 = ((2 * h_0_circ_2)**2 * t_obs).to(u.s).value
+
+    # lower bound on the total SNR^2 from the (in band) peak harmonic
+    n_peak = np.round(2 * (1 + ecc)**1.1954 / (1 - ecc**2)**1.5)
+    n_peak = np.maximum(np.minimum(n_peak, n_hi), n_lo)
+    snr_2_lower = amp_2 * utils.peters_g(n_peak, ecc) / n_peak**2 \
+        / psd(n_peak * f_orb)
+
+    # each end of the window may drop up to half of the allowed error
+    threshold = snr_tol * np.nan_to_num(snr_2_lower) / 2
+    bound = amp_2 * utils.peters_f(ecc)
+
+    f_grid, sc_grid = _noise_grid(interpolated_sc, t_obs)
+
+    with np.errstate(divide="ignore"):
+        # sum_{n > N} bound / (n^2 S) <= bound / (N min(S))
+        n_hi = np.minimum(n_hi, np.ceil(bound / (sc_grid.min() * threshold)))
+
+        # sum_{n < N} bound / (n^2 S(n f)) <= pi^2 / 6 * bound / S_L(N f)
+        # where S_L(f) = min_{f' <= f} S(f') is non-increasing and, since S
+        # is log-log linear between grid points, S_L(f) >= S_L(f_grid[i])
+        # for any f <= f_grid[i]
+        envelope = np.minimum.accumulate(sc_grid)
+        limit = np.pi**2 / 6 * bound / threshold
+        ind = np.searchsorted(-envelope, -limit, side="left")
+        f_lo = f_grid[np.maximum(ind - 1, 0)]
+        n_lo = np.maximum(n_lo, np.ceil(f_lo / f_orb_val))
+
+    return n_lo.astype(int), n_hi.astype(int)
+
+
+def snr_upper_bound(m_c, f_orb_i, ecc, dist, t_obs, n_min=1, n_max=1,
+                    interpolated_sc=None):
+    """Computes a cheap upper bound on the SNR of any source
+
+    The bound holds for both stationary and evolving sources and is given by
+
+    .. math::
 
-    return snr, max_snr_harmonic if ret_max_snr_harmonic else snr
+        \\rho^2 \\leq \\frac{h_0^2(f_{\\rm up}) T_{\\rm obs}}{n_{\\rm min}^2}
+            \\frac{F(e)}{\\min S_n(f)}
+
+    where :math:`h_0(f_{\\rm up})` is the circular strain amplitude at the
+    maximum orbital frequency that the source can reach during the
+    observation (evolving with :func:`legwork.evol.evolve_f_orb_circ`,
+    which overestimates the frequency of eccentric sources, and capping the
+    frequency at the edge of the LISA band), g(n, e) <= F(e) and the
+    minimum of the sensitivity curve is taken over the frequencies that the
+    harmonics ``n_min`` to ``n_max`` can reach. This minimum is exact when
+    ``interpolated_sc`` is a :class:`legwork.lisa.NoiseModel` (whose noise is
+    log-log linear between the points of its grid), whilst other sensitivity
+    curves are sampled on a fine grid so the bound is then only approximate.
+
+    Parameters
+    ----------
+    m_c : `float/array`
+        Chirp mass
+
+    f_orb_i : `float/array`
+        Initial orbital frequency
+
+    ecc : `float/array`
+        Initial eccentricity (use 0.0 for sources treated as circular)
+
+    dist : `float/array`
+        Distance to the source
+
+    t_obs : `float`
+        Total duration of the observation
+
+    n_min : `int/array`
+        Lowest harmonic used in the SNR calculation of each source (use 2
+        for circular sources)
+
+    n_max : `int/array`
+        Highest harmonic used in the SNR calculation of each source
+
+    interpolated_sn : `function`
+        A function returned by :class:`scipy.interpolate.interp1d` (or a
+        :class:`legwork.lisa.NoiseModel`) that computes the LISA sensitivity
+        curve. Default is None and uses exact values.
+
+    Returns
+    -------
+    snr_bound : `float/array`
+        Upper bound on the SNR of each source
+    """
+    n_min = np.broadcast_to(n_min, np.shape(ecc))
+    n_max = np.broadcast_to(n_max, np.shape(ecc))
+
+    # maximum frequency the lowest harmonic can reach whilst in band
+    f_orb_up = evol.evolve_f_orb_circ(f_orb_i=f_orb_i, m_c=m_c, t_evol=t_obs,
+                                      ecc_i=ecc)
+    f_orb_up = np.minimum(f_orb_up.to(u.Hz).value, lisa.MAX_F / n_min)
+    f_orb_up = np.maximum(f_orb_up, f_orb_i.to(u.Hz).value)
+
+    # circular strain amplitude (g(2, 0) = 1 so this removes the n=2 factor)
+    h_0_up = 2 * strain.h_0_n(m_c=m_c, f_orb=f_orb_up * u.Hz,
+                              ecc=np.zeros(len(f_orb_up)), n=2,
+                              dist=dist).flatten()
+    amp_2 = (h_0_up**2 * t_obs).to(u.s).value
+
+    # minimum of the sensitivity curve over the reachable frequencies
+    f_grid, sc_grid = _noise_grid(interpolated_sc, t_obs)
+    f_lo = n_min * f_orb_i.to(u.Hz).value
+    f_hi = np.minimum(n_max * f_orb_up, lisa.MAX_F)
+    sc_min = _interval_minimum(f_grid, sc_grid, f_lo, f_hi)
+
+    snr_bound = np.sqrt(amp_2 / n_min**2 * utils.peters_f(ecc) / sc_min)
+    return snr_bound
 
 
 def snr_circ_evolving(m_1, m_2, f_orb_i, dist, t_obs, n_step,
-                      interpolated_g=None, interpolated_sc=None):
+                      interpolated_g=None, interpolated_sc=None,
+                      ret_snr_track=False, track_times=None):
     """Computes SNR for circular and stationary sources
 
+    Each binary is evolved until the earliest of the end of the observation,
+    its merger or the n=2 harmonic leaving the LISA band (see
+    :func:`legwork.evol.get_t_to_f_orb`) so no timesteps are wasted outside of
+    the band.
+
     Parameters
     ----------
     m_1 : `float/array`
@@ -163,37 +436,69 @@ def snr_circ_evolving(m_1, m_2, f_orb_i, dist, t_obs, n_step,
     dist : `float/array`
         Distance to the source
 
-    t_obs : `float`
-        Total duration of the observation
+    t_obs : `float/array`
+        Total duration of the observation. If an array is given then the SNR
+        is calculated for each duration whilst sharing the strain and g(n,e)
+        calculations, and the output gains an extra axis. Evolving sources are
+        evolved once for the longest duration and the shorter durations
+        reuse its timesteps (so ``n_step`` should suit the longest).
 
     n_step : `int`
         Number of time steps during observation duration
 
     interpolated_g : `function`
-        A function returned by :class:`scipy.interpolate.interp2d` that
+        A function returned by :class:`scipy.interpolate.interp2d` (or a
+        :class:`legwork.tables.TiledGInterpolator`) that
         computes g(n,e) from Peters (1964). The code assumes
         that the function returns the output sorted as with the
         interp2d returned functions (and thus unsorts).
         Default is None and uses exact g(n,e) in this case.
 
     interpolated_sn : `function`
-        A function returned by :class:`scipy.interpolate.interp1d` that
-        computes the LISA sensitivity curve. Default is None and uses exact
-        values. Note: take care to ensure that your interpolated function has
-        the same LISA observation time as ``t_obs``.
+        A function returned by :class:`scipy.interpolate.interp1d` (or a
+        :class:`legwork.lisa.NoiseModel`) that computes the LISA sensitivity
+        curve. Default is None and uses exact values. Note: take care to
+        ensure that your interpolated function has the same LISA observation
+        time as ``t_obs``. If ``t_obs`` is an array then this may also be a
+        list with one function for each duration, where durations sharing
+        the same function share noise evaluations.
+
+    ret_snr_track : `boolean`
+        Whether to return (in addition to the snr), the cumulative SNR
+        accumulated over the observation at each of ``track_times``. This
+        reuses the cumulative integral used for the total SNR and requires a
+        single ``t_obs``.
+
+    track_times : `float/array`
+        Times since the start of the observation at which to record the
+        cumulative SNR. Default is None, which uses ``n_step`` evenly spaced
+        times between 0 and ``t_obs``.
 
     Returns
     -------
     sn : `float/array`
-        SNR for each binary
+        SNR for each binary (with shape ``(n_sources, len(t_obs))`` if
+        ``t_obs`` is an array)
+
+    snr_track : `float/array`
+        Cumulative SNR of each binary at each of ``track_times`` stored as
+        float32 with shape ``(n_sources, len(track_times))`` (only returned if
+        ``ret_snr_track=True``)
     """
     m_c = utils.chirp_mass(m_1=m_1, m_2=m_2)
+    t_obs_arr, noise_groups = _group_t_obs(t_obs, interpolated_sc)
+    track_times = _get_track_times(t_obs, n_step, ret_snr_track, track_times)
 
-    # calculate minimum of observation time and merger time
+    # calculate minimum of (longest) observation time and merger time
     t_merge = evol.get_t_merge_circ(m_1=m_1,
                                     m_2=m_2,
                                     f_orb_i=f_orb_i)
-    t_evol = np.minimum(t_merge, t_obs)
+    t_evol = np.minimum(t_merge, t_obs_arr.max()).to(u.s)
+
+    # truncate evolution once the n=2 harmonic leaves the LISA band
+    t_band = evol.get_t_to_f_orb(f_orb_i=f_orb_i,
+                                 f_orb_f=lisa.MAX_F / 2 * u.Hz, m_c=m_c)
+    t_evol = np.minimum(t_evol, t_band)
 
     # get f_orb evolution
     f_orb_evol = evol.evol_circ(t_evol=t_evol,
@@ -211,27 +516,43 @@ def snr_circ_evolving(m_1, m_2, f_orb_i, dist, t_obs, n_step,
                            interpolated_g=interpolated_g)**2
     h_c_n_2 = h_c_n_2.reshape(len(m_c), n_step)
 
-    # calculate the characteristic noise power
-    if interpolated_sc is not None:
-        h_f_lisa_2 = interpolated_sc(2 * f_orb_evol.flatten())
-        h_f_lisa_2 = h_f_lisa_2.reshape(f_orb_evol.shape)
-    else:
-        h_f_lisa_2 = lisa.power_spectral_density(f=2 * f_orb_evol, t_obs=t_obs)
-    h_c_lisa_2 = (2 * f_orb_evol)**2 * h_f_lisa_2
+    # calculate the characteristic noise power for each curve and integrate
+    # the evolution up to each observation time
+    snr_2 = np.zeros((len(m_c), len(t_obs_arr)))
+    for inds, sc in noise_groups:
+        h_f_lisa_2 = _psd(2 * f_orb_evol, sc, t_obs_arr[inds[0]])
+        h_c_lisa_2 = (2 * f_orb_evol)**2 * h_f_lisa_2
 
-    snr = np.trapz(y=h_c_n_2 / h_c_lisa_2, x=2 * f_orb_evol, axis=1)**0.5
+        cumulative = _cumulative_trapz(y=(h_c_n_2 / h_c_lisa_2).to(1 / u.Hz),
+                                       x=(2 * f_orb_evol).to(u.Hz))
+        snr_2[:, inds] = _interp_cumulative(cumulative, t_evol,
+                                            t_obs_arr[inds])
+        if ret_snr_track:
+            snr_track = np.sqrt(_interp_cumulative(cumulative, t_evol,
+                                                   track_times)
+                                ).astype(np.float32)
 
-    return snr.decompose()
+    snr = _match_t_obs(np.sqrt(snr_2) * u.dimensionless_unscaled, t_obs)
+
+    return (snr, snr_track) if ret_snr_track else snr
 
 
 def snr_ecc_evolving(m_1, m_2, f_orb_i, dist, ecc, harmonics_required, t_obs,
                      n_step, interpolated_g=None, interpolated_sc=None,
-                     n_proc=1, ret_max_snr_harmonic=False):
+                     n_proc=1, ret_max_snr_harmonic=False,
+                     ret_harmonic_snr_2=False, harmonic_snr_2_tol=1e-3,
+                     ret_snr_track=False, track_times=None):
     """Computes SNR for eccentric and evolving sources.
 
     Note that this function will not work for exactly circular (ecc = 0.0)
     binaries.
 
+    Each binary is evolved until the earliest of the end of the observation,
+    its merger or the n=1 harmonic leaving the LISA band (see
+    :func:`legwork.evol.get_t_to_f_orb`). Harmonics that start above the
+    LISA band are skipped and sources with similar windows of harmonics are
+    grouped together and evaluated at once.
+
     Parameters
     ----------
     m_1 : `float/array`
@@ -252,24 +573,32 @@ def snr_ecc_evolving(m_1, m_2, f_orb_i, dist, ecc, harmonics_required, t_obs,
     harmonics_required : `int`
         Maximum integer harmonic to compute
 
-    t_obs : `float`
-        Total duration of the observation
+    t_obs : `float/array`
+        Total duration of the observation. If an array is given then the SNR
+        is calculated for each duration whilst sharing the strain and g(n,e)
+        calculations, and the output gains an extra axis. Evolving sources are
+        evolved once for the longest duration and the shorter durations
+        reuse its timesteps (so ``n_step`` should suit the longest).
 
     n_step : `int`
         Number of time steps during observation duration
 
     interpolated_g : `function`
-        A function returned by :class:`scipy.interpolate.interp2d` that
+        A function returned by :class:`scipy.interpolate.interp2d` (or a
+        :class:`legwork.tables.TiledGInterpolator`) that
         computes g(n,e) from Peters (1964). The code assumes
         that the function returns the output sorted as with the
         interp2d returned functions (and thus unsorts).
         Default is None and uses exact g(n,e) in this case.
 
     interpolated_sn : `function`
-        A function returned by :class:`scipy.interpolate.interp1d` that
-        computes the LISA sensitivity curve. Default is None and uses exact
-        values. Note: take care to ensure that your interpolated function has
-        the same LISA observation time as ``t_obs``.
+        A function returned by :class:`scipy.interpolate.interp1d` (or a
+        :class:`legwork.lisa.NoiseModel`) that computes the LISA sensitivity
+        curve. Default is None and uses exact values. Note: take care to
+        ensure that your interpolated function has the same LISA observation
+        time as ``t_obs``. If ``t_obs`` is an array then this may also be a
+        list with one function for each duration, where durations sharing
+        the same function share noise evaluations.
 
     n_proc : `int`
         Number of processors to split eccentricity evolution over, where
@@ -279,50 +608,307 @@ def snr_ecc_evolving(m_1, m_2, f_orb_i, dist, ecc, harmonics_required, t_obs,
         Whether to return (in addition to the snr), the harmonic with the
         maximum SNR
 
+    ret_harmonic_snr_2 : `boolean`
+        Whether to return (in addition to the snr), the SNR^2 of each
+        harmonic that contributes at least a fraction ``harmonic_snr_2_tol``
+        of the total SNR^2 of its source
+
+    harmonic_snr_2_tol : `float`
+        Minimum fractional contribution to the total SNR^2 of a harmonic for
+        it to be returned when ``ret_harmonic_snr_2=True``
+
+    ret_snr_track : `boolean`
+        Whether to return (in addition to the snr), the cumulative SNR
+        accumulated over the observation at each of ``track_times``. This
+        reuses the cumulative integral used for the total SNR and requires a
+        single ``t_obs``.
+
+    track_times : `float/array`
+        Times since the start of the observation at which to record the
+        cumulative SNR. Default is None, which uses ``n_step`` evenly spaced
+        times between 0 and ``t_obs``.
+
     Returns
     -------
     snr : `float/array`
-        SNR for each binary
+        SNR for each binary (with shape ``(n_sources, len(t_obs))`` if
+        ``t_obs`` is an array)
 
     max_snr_harmonic : `int/array`
         harmonic with maximum SNR for each binary (only returned if
         ``ret_max_snr_harmonic=True``)
+
+    harmonic_snr_2 : `tuple`
+        Sparse (CSR-like) per harmonic SNR^2 of each binary (only returned if
+        ``ret_harmonic_snr_2=True``) as ``(offsets, harmonics, snr_2)``, where
+        the harmonics of binary ``i`` and their SNR^2 are
+        ``harmonics[offsets[i]:offsets[i + 1]]`` and
+        ``snr_2[offsets[i]:offsets[i + 1]]``
+
+    snr_track : `float/array`
+        Cumulative SNR of each binary at each of ``track_times`` stored as
+        float32 with shape ``(n_sources, len(track_times))`` (only returned if
+        ``ret_snr_track=True``)
     """
     m_c = utils.chirp_mass(m_1=m_1, m_2=m_2)
-    # calculate minimum of observation time and merger time
+    t_obs_arr, noise_groups = _group_t_obs(t_obs, interpolated_sc)
+    if ret_harmonic_snr_2 and np.ndim(t_obs) > 0:
+        raise ValueError("`ret_harmonic_snr_2` requires a single `t_obs`")
+    track_times = _get_track_times(t_obs, n_step, ret_snr_track, track_times)
+
+    # calculate minimum of (longest) observation time and merger time
     t_merge = evol.get_t_merge_ecc(m_1=m_1, m_2=m_2,
                                    f_orb_i=f_orb_i, ecc_i=ecc)
-    t_evol = np.minimum(t_merge, t_obs).to(u.s)
+    t_evol = np.minimum(t_merge, t_obs_arr.max()).to(u.s)
+
+    # truncate evolution once the n=1 harmonic leaves the LISA band
+    t_band = evol.get_t_to_f_orb(f_orb_i=f_orb_i, f_orb_f=lisa.MAX_F * u.Hz,
+                                 m_c=m_c, ecc_i=ecc)
+    t_evol = np.minimum(t_evol, t_band)
 
     # get eccentricity and f_orb evolutions
     e_evol, f_orb_evol = evol.evol_ecc(ecc_i=ecc, t_evol=t_evol, n_step=n_step,
                                        m_1=m_1, m_2=m_2, f_orb_i=f_orb_i,
                                        n_proc=n_proc)
 
-    # create harmonics list and multiply for nth frequency evolution
-    harms = np.arange(1, harmonics_required + 1).astype(int)
-    f_n_evol = harms[np.newaxis, np.newaxis, :] * f_orb_evol[..., np.newaxis]
+    # skip any harmonics that start above the LISA band
+    n_in_band = np.floor(lisa.MAX_F / f_orb_i.to(u.Hz).value)
+    n_lo = np.ones(len(m_c)).astype(int)
+    n_hi = np.maximum(np.minimum(harmonics_required, n_in_band),
+                      n_lo).astype(int)
+
+    snr_2 = np.zeros((len(m_c), len(t_obs_arr)))
+    max_snr_harmonic = np.ones((len(m_c), len(t_obs_arr))).astype(int)
+    harmonic_snr_2 = ([], [], [])
+    snr_track = np.zeros((len(m_c), len(track_times)), dtype=np.float32) \
+        if ret_snr_track else None
+
+    # group sources by the powers of two that bound their windows
+    groups = np.stack((np.floor(np.log2(n_lo)), np.floor(np.log2(n_hi))),
+                      axis=1)
+    for group in np.unique(groups, axis=0):
+        match = (groups == group).all(axis=1)
+
+        # create harmonics list and multiply for nth frequency evolution
+        harms = np.arange(n_lo[match].min(), n_hi[match].max() + 1)
+        f_n_evol = harms[np.newaxis, np.newaxis, :] \
+            * f_orb_evol[match][..., np.newaxis]
+
+        # calculate the characteristic strain
+        h_c_n_2 = strain.h_c_n(m_c=m_c[match], f_orb=f_orb_evol[match],
+                               ecc=e_evol[match], n=harms, dist=dist[match],
+                               interpolated_g=interpolated_g)**2
 
-    # calculate the characteristic strain
-    h_c_n_2 = strain.h_c_n(m_c=m_c, f_orb=f_orb_evol, ecc=e_evol, n=harms,
-                           dist=dist, interpolated_g=interpolated_g)**2
+        # calculate the characteristic noise power for each curve and
+        # integrate the evolution up to each observation time
+        snr_n_2 = np.zeros((len(m_c[match]), len(t_obs_arr), len(harms)))
+        for inds, sc in noise_groups:
+            h_f_lisa = _psd(f_n_evol, sc, t_obs_arr[inds[0]])
+            h_c_lisa_2 = f_n_evol**2 * h_f_lisa
+
+            cumulative = _cumulative_trapz(y=(h_c_n_2 / h_c_lisa_2)
+                                           .to(1 / u.Hz),
+                                           x=f_n_evol.to(u.Hz))
+
+            # only count the harmonics in each source's own window
+            cumulative *= _in_window(harms, n_lo[match], n_hi[match])
+            snr_n_2[:, inds, :] = _interp_cumulative(cumulative,
+                                                     t_evol[match],
+                                                     t_obs_arr[inds])
+            if ret_snr_track:
+                snr_track[match] = np.sqrt(_interp_cumulative(
+                    cumulative.sum(axis=2), t_evol[match], track_times))
+
+        # sum to get SNR^2
+        max_snr_harmonic[match] = harms[np.argmax(snr_n_2, axis=2)]
+        snr_2[match] = snr_n_2.sum(axis=2)
+        if ret_harmonic_snr_2:
+            _append_harmonic_snr_2(harmonic_snr_2, np.flatnonzero(match),
+                                   harms, snr_n_2[:, 0, :],
+                                   harmonic_snr_2_tol)
+
+    snr = np.sqrt(snr_2) * u.dimensionless_unscaled
+
+    return _snr_output(_match_t_obs(snr, t_obs),
+                       _match_t_obs(max_snr_harmonic, t_obs), harmonic_snr_2,
+                       ret_max_snr_harmonic, ret_harmonic_snr_2, snr_track)
+
+
+def _get_track_times(t_obs, n_step, ret_snr_track, track_times):
+    """Get the times at which to record the cumulative SNR"""
+    if not ret_snr_track:
+        return []
+    if np.ndim(t_obs) > 0:
+        raise ValueError("`ret_snr_track` requires a single `t_obs`")
+    if track_times is None:
+        return np.linspace(0, t_obs, n_step)
+    return np.atleast_1d(track_times)
+
+
+def _group_t_obs(t_obs, interpolated_sc):
+    """Group the observation times by the sensitivity curve that they use
 
-    # calculate the characteristic noise power
-    if interpolated_sc is not None:
-        h_f_lisa = interpolated_sc(f_n_evol.flatten())
-    else:
-        h_f_lisa = lisa.power_spectral_density(f=f_n_evol.flatten(),
-                                               t_obs=t_obs)
-    h_f_lisa = h_f_lisa.reshape(f_n_evol.shape)
-    h_c_lisa_2 = f_n_evol**2 * h_f_lisa
+    Parameters
+    ----------
+    t_obs : `float/array`
+        Observation time(s)
 
-    # integrate, sum and square root to get SNR
-    snr_n_2 = np.trapz(y=h_c_n_2 / h_c_lisa_2, x=f_n_evol, axis=1)
+    interpolated_sc : `function/list`
+        Either None, a single interpolated sensitivity curve used for every
+        ``t_obs`` or a list with one (possibly repeated) curve for each
 
-    if ret_max_snr_harmonic:
-        max_snr_harmonic = np.argmax(snr_n_2, axis=1) + 1
+    Returns
+    -------
+    t_obs_arr : `array`
+        Observation times as an array
 
-    snr_2 = snr_n_2.sum(axis=1)
-    snr = np.sqrt(snr_2)
+    noise_groups : `list`
+        Tuples of the indices of the observation times and the curve that
+        they share (observation times with no curve each get their own group
+        since the exact curve depends on ``t_obs``)
+    """
+    t_obs_arr = np.atleast_1d(t_obs)
+    if t_obs_arr.ndim != 1:
+        raise ValueError("`t_obs` must be a single value or a 1D array")
+
+    if interpolated_sc is None or callable(interpolated_sc):
+        interpolated_sc = [interpolated_sc] * len(t_obs_arr)
+    elif len(interpolated_sc) != len(t_obs_arr):
+        raise ValueError("`interpolated_sc` must be a single function or "
+                         "have the same length as `t_obs`")
+
+    noise_groups = []
+    for i, sc in enumerate(interpolated_sc):
+        shared = [group for group in noise_groups
+                  if sc is not None and group[1] is sc]
+        if len(shared) > 0:
+            shared[0][0].append(i)
+        else:
+            noise_groups.append(([i], sc))
+    return t_obs_arr, noise_groups
+
+
+def _psd(f, interpolated_sc, t_obs):
+    """Evaluate the (possibly interpolated) sensitivity curve for an array of
+    frequencies of any shape"""
+    if interpolated_sc is not None:
+        return interpolated_sc(f.flatten()).reshape(f.shape)
+    return lisa.power_spectral_density(f=f.flatten(),
+                                       t_obs=t_obs).reshape(f.shape)
 
-    return snr, max_snr_harmonic if ret_max_snr_harmonic else snr
+
+def _noise_grid(interpolated_sc, t_obs):
+    """Get frequencies (in Hz) and noise (in 1/Hz) between which the
+    sensitivity curve is linear in log-log space, exactly for a
+    :class:`legwork.lisa.NoiseModel` and otherwise by sampling the curve"""
+    if isinstance(interpolated_sc, lisa.NoiseModel):
+        f_grid, sc_grid = interpolated_sc.get_grid()
+    else:
+        f_grid = np.logspace(np.log10(lisa.MIN_F), np.log10(lisa.MAX_F),
+                             10000) * u.Hz
+        sc_grid = _psd(f_grid, interpolated_sc, t_obs)
+    return f_grid.to(u.Hz).value, sc_grid.to(1 / u.Hz).value
+
+
+def _interval_minimum(f_grid, sc_grid, f_lo, f_hi):
+    """Find the minimum of a log-log linear sensitivity curve (see
+    :func:`_noise_grid`) between each pair of frequencies, which is at either
+    end of the interval or at one of the grid points inside it"""
+    f_lo, f_hi = np.broadcast_arrays(np.maximum(f_lo, f_grid[0]),
+                                     np.minimum(f_hi, f_grid[-1]))
+    empty = f_lo > f_hi
+    with np.errstate(divide="ignore"):
+        log_f, log_sc = np.log10(f_grid), np.log10(sc_grid)
+        ends = np.minimum(np.interp(np.log10(f_lo), log_f, log_sc),
+                          np.interp(np.log10(f_hi), log_f, log_sc))
+
+    # grid points inside each interval (empty intervals take the padding)
+    start = np.searchsorted(f_grid, f_lo, side="right")
+    end = np.searchsorted(f_grid, f_hi, side="left")
+    start = np.where(start < end, start, len(f_grid))
+    bounds = np.stack((start, np.maximum(start, end)), axis=1).flatten()
+    inside = np.minimum.reduceat(np.append(log_sc, np.inf), bounds)[::2]
+
+    return np.where(empty, lisa.HUGE_NOISE, 10**np.minimum(ends, inside))
+
+
+def _match_t_obs(values, t_obs):
+    """Remove the observation time axis from an output if only a single
+    ``t_obs`` was given"""
+    return values[..., 0] if np.ndim(t_obs) == 0 else values
+
+
+def _cumulative_trapz(y, x):
+    """Cumulative trapezoidal integral of ``y`` along the timestep axis (1),
+    starting from zero at the first timestep"""
+    steps = (y[:, 1:] + y[:, :-1]) / 2 * np.diff(x, axis=1)
+    cumulative = np.zeros(y.shape)
+    cumulative[:, 1:] = np.cumsum(steps.decompose().value, axis=1)
+    return cumulative
+
+
+def _interp_cumulative(cumulative, t_evol, t_obs):
+    """Linearly interpolate cumulative integrals over evenly spaced timesteps
+    from 0 to ``t_evol`` at each of the times in ``t_obs``, which gives an
+    array of shape ``(n_sources, len(t_obs))`` followed by any trailing axes
+    of ``cumulative``"""
+    n_step = cumulative.shape[1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = (t_obs[np.newaxis, :] / t_evol[:, np.newaxis]).decompose()
+    position = (n_step - 1) * np.minimum(np.nan_to_num(frac.value, nan=1.0,
+                                                       posinf=1.0), 1.0)
+    lower = np.minimum(np.floor(position).astype(int), max(n_step - 2, 0))
+    upper = np.minimum(lower + 1, n_step - 1)
+    weight = position - lower
+
+    # add axes to match any trailing axes (e.g. harmonics)
+    extra = (1,) * (cumulative.ndim - 2)
+    lower, upper = lower.reshape(lower.shape + extra), \
+        upper.reshape(upper.shape + extra)
+    weight = weight.reshape(weight.shape + extra)
+
+    c_lower = np.take_along_axis(cumulative, lower, axis=1)
+    c_upper = np.take_along_axis(cumulative, upper, axis=1)
+    return c_lower + weight * (c_upper - c_lower)
+
+
+def _append_harmonic_snr_2(harmonic_snr_2, sources, harmonics, snr_n_2, tol):
+    """Record the harmonics of a group of sources that contribute at least a
+    fraction ``tol`` of the total SNR^2 of their source"""
+    keep = np.logical_and(snr_n_2 > 0.0, snr_n_2 >= tol
+                          * snr_n_2.sum(axis=1, keepdims=True))
+    rows, cols = np.nonzero(keep)
+    harmonic_snr_2[0].append(sources[rows])
+    harmonic_snr_2[1].append(harmonics[cols])
+    harmonic_snr_2[2].append(snr_n_2[rows, cols])
+
+
+def _snr_output(snr, max_snr_harmonic, harmonic_snr_2, ret_max_snr_harmonic,
+                ret_harmonic_snr_2, snr_track=None):
+    """Assemble the output of the eccentric snr functions, converting the
+    recorded per harmonic SNR^2 to CSR-like arrays sorted by source"""
+    output = [snr]
+    if ret_max_snr_harmonic:
+        output.append(max_snr_harmonic)
+    if ret_harmonic_snr_2:
+        sources, harmonics, values = [np.concatenate(arr).astype(dtype)
+                                      if len(arr) > 0
+                                      else np.array([]).astype(dtype)
+                                      for arr, dtype in zip(harmonic_snr_2,
+                                                            [int, int,
+                                                             float])]
+        order = np.lexsort((harmonics, sources))
+        offsets = np.zeros(len(snr) + 1).astype(int)
+        offsets[1:] = np.cumsum(np.bincount(sources, minlength=len(snr)))
+        output.append((offsets, harmonics[order], values[order]))
+    if snr_track is not None:
+        output.append(snr_track)
+    return tuple(output) if len(output) > 1 else snr
+
+
+def _in_window(harmonics, n_lo, n_hi):
+    """Mask of shape ``(n_sources, 1, n_harmonics)`` for whether each
+    harmonic is within the window of each source, such that the SNR of a
+    source doesn't depend on which other sources it is grouped with"""
+    return np.logical_and(harmonics >= n_lo[:, np.newaxis],
+                          harmonics <= n_hi[:, np.newaxis])[:, np.newaxis, :]
@@ -2,13 +2,136 @@
 from astropy import units as u
 import numpy as np
 from importlib import resources
-from scipy.interpolate import interp1d, interp2d
+from scipy.interpolate import interp1d
 
-from legwork import utils, strain, lisa
+from legwork import utils, strain, lisa, evol, tables
 import legwork.snr as sn
 import legwork.visualisation as vis
 
-__all__ = ['Source', 'Stationary', 'Evolving']
+__all__ = ['Source', 'Stationary', 'Evolving', 'horizon_distance']
+
+
+class _SourceTable():
+    """Table of the parameters of a set of sources in SI units, which is
+    shared between a :class:`legwork.source.Source` and its views
+
+    Every change to the table is counted in ``generation`` and the
+    generation at which each parameter (row) and source (column) last changed
+    is recorded in ``row_modified`` and ``modified`` respectively.
+    """
+    __slots__ = ["values", "scratch", "units", "generation", "row_modified",
+                 "modified"]
+
+    def __init__(self, n_rows, n_sources):
+        self.values = np.zeros((n_rows, n_sources))
+        self.scratch = np.zeros_like(self.values)
+        self.units = {}
+        self.generation = 0
+        self.row_modified = np.zeros(n_rows).astype(int)
+        self.modified = np.zeros(n_sources).astype(int)
+
+    def mark_modified(self, row, cols):
+        """Record a change to ``row`` for the sources in columns ``cols``"""
+        self.generation += 1
+        self.row_modified[row] = self.generation
+        self.modified[cols] = self.generation
+
+    def append(self, values):
+        """Add new sources with SI ``values`` (one row per parameter)"""
+        self.generation += 1
+        self.values = np.concatenate((self.values, values), axis=1)
+        self.scratch = np.zeros_like(self.values)
+        self.row_modified[:] = self.generation
+        self.modified = np.concatenate(
+            (self.modified, np.repeat(self.generation, values.shape[1])))
+
+    def get_state(self):
+        """Copy the values, units and generation counters of the table so
+        that they can be restored with ``set_state``"""
+        return (self.values.copy(), dict(self.units), self.generation,
+                self.row_modified.copy(), self.modified.copy())
+
+    def set_state(self, state):
+        """Restore the table to a ``state`` from ``get_state``"""
+        values, units, self.generation, row_modified, modified = state
+        self.values[:] = values
+        self.units = units
+        self.row_modified[:] = row_modified
+        self.modified[:] = modified
+
+
+def _prepare_parameters(m_1, m_2, ecc, dist, f_orb, a):
+    """Check the parameters of a set of sources and convert them to arrays,
+    calculating whichever of ``f_orb`` and ``a`` is missing (see
+    :class:`legwork.source.Source`)"""
+    # ensure that either a frequency or semi-major axis is supplied
+    if f_orb is None and a is None:
+        raise ValueError("Either `f_orb` or `a` must be specified")
+
+    # calculate whichever one wasn't supplied
+    f_orb = utils.get_f_orb_from_a(a, m_1, m_2) if f_orb is None else f_orb
+    a = utils.get_a_from_f_orb(f_orb, m_1, m_2) if a is None else a
+
+    # define which arguments must have units
+    unit_args = [m_1, m_2, dist, f_orb, a]
+    unit_args_str = ['m_1', 'm_2', 'dist', 'f_orb', 'a']
+
+    for i in range(len(unit_args)):
+        assert(isinstance(unit_args[i], u.quantity.Quantity)), \
+                "`{}` must have units".format(unit_args_str[i])
+
+    # make sure the inputs are arrays
+    fixed_args, _ = utils.ensure_array(m_1, m_2, dist, f_orb, a, ecc)
+    m_1, m_2, dist, f_orb, a, ecc = fixed_args
+
+    # ensure all array arguments are the same length
+    array_args = [m_1, m_2, dist, f_orb, a, ecc]
+    length_check = np.array([len(arg) != len(array_args[0])
+                             for arg in array_args])
+    if length_check.any():
+        raise ValueError("All input arrays must have the same length")
+
+    return m_1, m_2, ecc, dist, f_orb, a
+
+
+def _column_property(name, doc):
+    """Create a property for the column ``name`` of the table of source
+    parameters (see :class:`legwork.source.Source`)
+
+    Values are stored in SI units and converted back to the units in which
+    they were last set only when they are accessed. The values are returned
+    read-only so that they can only be changed by setting the whole column,
+    which records which sources actually changed so that only their SNRs
+    are recalculated.
+    """
+    def fget(self):
+        row, si_unit = self._COLUMNS[name]
+        table = self._table
+        values = table.values[row] if self._indices is None \
+            else table.values[row, self._indices]
+        if si_unit is not None:
+            values = values << si_unit
+            if table.units[name] != si_unit:
+                values = values.to(table.units[name])
+        values.setflags(write=False)
+        return values
+
+    def fset(self, value):
+        row, si_unit = self._COLUMNS[name]
+        table = self._table
+        if si_unit is not None:
+            assert(isinstance(value, u.quantity.Quantity)), \
+                "`{}` must have units".format(name)
+            table.units[name] = value.unit
+            value = value.to_value(si_unit)
+
+        cols = slice(None) if self._indices is None else self._indices
+        changed = np.flatnonzero(table.values[row, cols] != value)
+        if len(changed) > 0:
+            table.values[row, cols] = value
+            table.mark_modified(row, self._table_indices(changed))
+
+    return property(fget, fset, doc=doc)
 
 
 class Source():
@@ -68,6 +191,12 @@ class Source():
         Default values are: 4 years, 2.5e9, 19.09e-3, False and True. This is
         ignored if ``interpolate_sc`` is False.
 
+    noise_model : :class:`legwork.lisa.NoiseModel`
+        Detector noise model to use for the sensitivity curve (e.g. from
+        :func:`legwork.lisa.get_noise_model`). This takes precedence over
+        ``interpolate_sc`` and ``sc_params``. Default is None, which uses
+        the (cached) LISA model for ``sc_params``.
+
     Attributes
     ----------
     m_c : `float/array`
@@ -88,6 +217,24 @@ class Source():
     n_sources : `int`
         Number of sources in class
 
+    Notes
+    -----
+    The parameters of the sources (``m_1``, ``m_2``, ``m_c``, ``ecc``,
+    ``dist``, ``f_orb`` and ``a``) are stored together in a single
+    contiguous table in SI units. Each attribute is converted back to the
+    units it was given in when it is accessed (and so is a view of the
+    table if those are SI units). These arrays are read-only, so assign a
+    new array to an attribute to change it, which lets the Source track
+    which sources changed for its SNR and mask caches.
+
+    Indexing a Source (or :meth:`legwork.source.Source.subset`) gives a
+    view of some of the sources that shares this table.
+
+    The table records which sources change (or are added with
+    :meth:`legwork.source.Source.append`) so that repeated calls to
+    :meth:`legwork.source.Source.get_snr` with the same settings only
+    recalculate the SNRs of those sources.
+
     Raises
     ------
     ValueError
@@ -97,36 +244,36 @@ class Source():
     AssertionError
         If a parameter is missing units
     """
+    # row of each parameter in the table and its SI unit (None if unitless)
+    _COLUMNS = {"m_1": (0, u.kg), "m_2": (1, u.kg), "m_c": (2, u.kg),
+                "ecc": (3, None), "dist": (4, u.m), "f_orb": (5, u.Hz),
+                "a": (6, u.m)}
+
+    __slots__ = ["_table", "_frequency_index", "_mask_cache", "_indices",
+                 "_parent",
+                 "_write_back", "_snr_settings", "_snr_threshold",
+                 "_snr_generation",
+                 "stat_tol", "n_proc", "snr", "max_snr_harmonic",
+                 "_snr_dist", "_snr_dist_key", "interpolate_sc",
+                 "_sc_params", "noise_model", "_gw_lum_tol",
+                 "harmonics_required", "max_strain_harmonic", "ecc_tol",
+                 "g", "sc"]
+
     def __init__(self, m_1, m_2, ecc, dist, n_proc=1, f_orb=None, a=None,
                  gw_lum_tol=0.05, stat_tol=1e-2, interpolate_g=True,
-                 interpolate_sc=True, sc_params={}):
-        # ensure that either a frequency or semi-major axis is supplied
-        if f_orb is None and a is None:
-            raise ValueError("Either `f_orb` or `a` must be specified")
-
-        # calculate whichever one wasn't supplied
-        f_orb = utils.get_f_orb_from_a(a, m_1, m_2) if f_orb is None else f_orb
-        a = utils.get_a_from_f_orb(f_orb, m_1, m_2) if a is None else a
-
-        # define which arguments must have units
-        unit_args = [m_1, m_2, dist, f_orb, a]
-        unit_args_str = ['m_1', 'm_2', 'dist', 'f_orb', 'a']
-
-        for i in range(len(unit_args)):
-            assert(isinstance(unit_args[i], u.quantity.Quantity)), \
-                    "`{}` must have units".format(unit_args_str[i])
-
-        # make sure the inputs are arrays
-        fixed_args, _ = utils.ensure_array(m_1, m_2, dist, f_orb, a, ecc)
-        m_1, m_2, dist, f_orb, a, ecc = fixed_args
-
-        # ensure all array arguments are the same length
-        array_args = [m_1, m_2, dist, f_orb, a, ecc]
-        length_check = np.array([len(arg) != len(array_args[0])
-                                 for arg in array_args])
-        if length_check.any():
-            raise ValueError("All input arrays must have the same length")
-
+                 interpolate_sc=True, sc_params={}, noise_model=None):
+        m_1, m_2, ecc, dist, f_orb, a = _prepare_parameters(m_1, m_2, ecc,
+                                                            dist, f_orb, a)
+
+        self._table = _SourceTable(len(self._COLUMNS), len(m_1))
+        self._frequency_index = None
+        self._mask_cache = {}
+        self._indices = None
+        self._parent = None
+        self._write_back = False
+        self._snr_settings = None
+        self._snr_threshold = None
+        self._snr_generation = 0
         self.m_1 = m_1
         self.m_2 = m_2
         self.m_c = utils.chirp_mass(m_1, m_2)
@@ -138,14 +285,161 @@ class Source():
         self.n_proc = n_proc
         self.snr = None
         self.max_snr_harmonic = None
-        self.n_sources = len(m_1)
+        self._snr_dist = None
+        self._snr_dist_key = None
         self.interpolate_sc = interpolate_sc
         self._sc_params = sc_params
+        self.noise_model = noise_model
 
         self.update_gw_lum_tol(gw_lum_tol)
         self.set_g(interpolate_g)
         self.set_sc()
 
+    m_1 = _column_property("m_1", "Primary mass of each source")
+    m_2 = _column_property("m_2", "Secondary mass of each source")
+    m_c = _column_property("m_c", "Chirp mass of each source")
+    ecc = _column_property("ecc", "Eccentricity of each source")
+    dist = _column_property("dist", "Distance to each source")
+    f_orb = _column_property("f_orb", "Orbital frequency of each source")
+    a = _column_property("a", "Semi-major axis of each source")
+
+    @property
+    def n_sources(self):
+        """Number of sources in class"""
+        if self._indices is None:
+            return self._table.values.shape[1]
+        return len(self._indices)
+
+    def append(self, m_1, m_2, ecc, dist, f_orb=None, a=None):
+        """Add new sources to the Source
+
+        Any SNRs that have already been calculated are kept, so the next call
+        to :meth:`legwork.source.Source.get_snr` (with the same settings)
+        only calculates the SNRs of the new sources.
+
+        Parameters
+        ----------
+        m_1, m_2, ecc, dist, f_orb, a : `float/array`
+            Parameters of the new sources, as in
+            :class:`legwork.source.Source`
+
+        Raises
+        ------
+        ValueError
+            If the Source is a view (see
+            :meth:`legwork.source.Source.subset`), if both ``f_orb`` and ``a``
+            are missing or if array-like parameters don't have the same
+            length.
+
+        AssertionError
+            If a parameter is missing units
+        """
+        if self._indices is not None:
+            raise ValueError("Sources can't be appended to a view")
+
+        m_1, m_2, ecc, dist, f_orb, a = _prepare_parameters(m_1, m_2, ecc,
+                                                            dist, f_orb, a)
+        params = {"m_1": m_1, "m_2": m_2, "m_c": utils.chirp_mass(m_1, m_2),
+                  "ecc": ecc, "dist": dist, "f_orb": f_orb, "a": a}
+        values = np.zeros((len(self._COLUMNS), len(m_1)))
+        for name, (row, si_unit) in self._COLUMNS.items():
+            values[row] = params[name] if si_unit is None \
+                else params[name].to_value(si_unit)
+        self._table.append(values)
+
+        if self.snr is not None:
+            new_shape = (len(m_1),) + self.snr.shape[1:]
+            self.snr = np.concatenate((self.snr, np.zeros(new_shape)))
+            self.max_snr_harmonic = np.concatenate(
+                (self.max_snr_harmonic, np.zeros(new_shape).astype(int)))
+        self._snr_dist = None
+
+    def subset(self, which_sources, write_back=False):
+        """Create a view of some of the sources
+
+        The view shares the table of parameters, the g(n,e) and sensitivity
+        curve interpolations and the harmonic functions of this Source,
+        rather than copying them or recalculating them, and reads the
+        parameters of its sources by index. Changing the parameters of the
+        view (e.g. with :meth:`legwork.source.Source.advance`) therefore
+        changes them here too. Indexing a Source (``sources[mask]``) is the
+        same as ``sources.subset(mask)``.
+
+        Parameters
+        ----------
+        which_sources : `bool/int/array/slice`
+            Mask, indices or slice of the sources to include in the view
+
+        write_back : `boolean`
+            Whether any SNRs (and max SNR harmonics) calculated for the view
+            should also be stored in ``snr`` and ``max_snr_harmonic`` of
+            this Source
+
+        Returns
+        -------
+        view : :class:`legwork.source.Source`
+            View of the chosen sources (of the same class as this Source)
+        """
+        if isinstance(which_sources, slice) or np.ndim(which_sources) == 0:
+            which_sources = np.atleast_1d(
+                np.arange(self.n_sources)[which_sources])
+        inds = self._as_indices(which_sources)
+
+        view = object.__new__(type(self))
+        for attr in Source.__slots__:
+            setattr(view, attr, getattr(self, attr))
+
+        # views of views still point directly at the table's owner
+        view._indices = self._table_indices(inds)
+        view._parent = self if self._parent is None else self._parent
+        view._write_back = write_back
+        view._frequency_index = None
+        view._mask_cache = {}
+        view._snr_dist = None
+        view.snr = None if self.snr is None else self.snr[inds]
+        view.max_snr_harmonic = None if self.max_snr_harmonic is None \
+            else self.max_snr_harmonic[inds]
+        return view
+
+    def __getitem__(self, which_sources):
+        return self.subset(which_sources)
+
+    def _table_indices(self, inds):
+        """Convert indices of sources to columns of the table"""
+        return inds if self._indices is None else self._indices[inds]
+
+    def _as_indices(self, which_sources=None):
+        """Convert a mask (or None for every source) to an array of indices
+        of sources. Arrays of indices are returned unchanged."""
+        if which_sources is None:
+            return np.arange(self.n_sources)
+        which_sources = np.asarray(which_sources)
+        if which_sources.dtype == bool:
+            return np.flatnonzero(which_sources)
+        return which_sources
+
+    def _take(self, inds, *names):
+        """Gather the parameters ``names`` of the sources at ``inds``
+
+        The values are copied into a scratch table that is reused by every
+        call (rather than allocating new arrays each time) so they are only
+        valid until the next call and must not be modified.
+
+        Returns
+        -------
+        values : `list`
+            Values of each parameter in SI units
+        """
+        values = []
+        for name in names:
+            row, si_unit = self._COLUMNS[name]
+            # mode="clip" means numpy writes directly to `out`
+            taken = np.take(self._table.values[row],
+                            self._table_indices(inds), mode="clip",
+                            out=self._table.scratch[row, :len(inds)])
+            values.append(taken if si_unit is None else taken << si_unit)
+        return values
+
     def create_harmonics_functions(self):
         """Create two harmonics related functions
 
@@ -236,6 +530,7 @@ class Source():
         self._gw_lum_tol = gw_lum_tol
         self.create_harmonics_functions()
         self.find_eccentric_transition()
+        self._frequency_index = None
 
     def set_g(self, interpolate_g):
         """Set Source g function if user wants to interpolate g(n,e).
@@ -247,48 +542,52 @@ class Source():
             Whether to interpolate the g(n,e) function from Peters (1964)
         """
         if interpolate_g:
-            # open file containing pre-calculated fine g(n,e) grid
-            with resources.path(package="legwork",
-                                resource="peters_g.npy") as path:
-                peters_g = np.load(path)
-
-            # interpolate grid using scipy
-            n_range = np.arange(1, 10000 + 1).astype(int)
-            e_range = np.linspace(0, 1, 1000)
-            self.g = interp2d(n_range, e_range, peters_g, kind="cubic")
+            # memory map the pre-calculated fine g(n,e) grid and read tiles
+            # of it only when they are needed
+            self.g = tables.TiledGInterpolator()
         else:
             self.g = None
 
-    def set_sc(self):
+    def set_sc(self, noise_model=None):
         """Set Source sensitivity curve function
 
-        If user wants to interpolate then perform interpolation of LISA
-        sensitivity curve using ``sn_params``. Otherwise just leave the
-        function as None."""
-        if self.interpolate_sc:
-            # update the default settings with current params
-            default_params = {
-                "t_obs": 4 * u.yr,
-                "L": 2.5e9,
-                "fstar": 19.09e-3,
-                "approximate_R": False,
-                "include_confusion_noise": True
-            }
-            default_params.update(self._sc_params)
-
-            # get values
-            frequency_range = np.logspace(-7, np.log10(2), 10000) * u.Hz
-            sc = lisa.power_spectral_density(frequency_range, **default_params)
-
-            # interpolate
-            interp_sc = interp1d(frequency_range, sc, bounds_error=False,
-                                 fill_value=1e30)
-
-            # add units back
-            self.sc = lambda f: interp_sc(f.to(u.Hz)) / u.Hz
+        If the Source has a ``noise_model`` then use it. Otherwise, if user
+        wants to interpolate then get the (cached) interpolation of the LISA
+        sensitivity curve using ``sc_params`` from
+        :func:`legwork.lisa.get_noise_model`. Otherwise just leave the
+        function as None.
+
+        Parameters
+        ----------
+        noise_model : :class:`legwork.lisa.NoiseModel`
+            New noise model for the Source (e.g. from
+            :func:`legwork.lisa.population_confusion_noise`). Default is None,
+            which keeps the current one.
+        """
+        if noise_model is not None:
+            self.noise_model = noise_model
+
+        if self.noise_model is not None:
+            self.sc = self.noise_model
+        elif self.interpolate_sc:
+            self.sc = lisa.get_noise_model("lisa", **self._sc_params)
         else:
             self.sc = None
 
+    def _get_sc(self, t_obs):
+        """Get the sensitivity curve(s) to use for an observation time
+
+        This is the equivalent of ``self.sc`` for ``t_obs`` (see
+        :meth:`legwork.lisa.NoiseModel.with_t_obs`), which only differs from
+        ``self.sc`` if the noise depends on the observation time, or a list
+        with one for each value if ``t_obs`` is an array.
+        """
+        if not isinstance(self.sc, lisa.NoiseModel):
+            return self.sc
+        if np.ndim(t_obs) == 0:
+            return self.sc.with_t_obs(t_obs)
+        return [self.sc.with_t_obs(t) for t in t_obs]
+
     def update_sc_params(self, sc_params):
         """Update sensitivity curve parameters
 
@@ -300,6 +599,142 @@ class Source():
             self._sc_params = sc_params
             self.set_sc()
 
+    def advance(self, dt):
+        """Evolve every source in time by ``dt`` in place
+
+        Exactly circular binaries are evolved with
+        :func:`legwork.evol.evol_circ` and the rest with
+        :func:`legwork.evol.evol_ecc`. ``f_orb``, ``a`` and ``ecc`` are updated
+        and only the sources whose orbits change are marked as modified, so
+        the next call to :meth:`legwork.source.Source.get_snr` only
+        recalculates their SNRs. Masses, distances, the g(n,e) and
+        sensitivity curve interpolations are left untouched.
+
+        Binaries that merge during ``dt`` are left with ``a = 0``,
+        ``ecc = 0`` and ``f_orb = 1 Hz`` (following the evolution functions).
+        A negative ``dt`` evolves the sources backwards in time, in which case
+        any merged binaries are left untouched.
+
+        Parameters
+        ----------
+        dt : `float`
+            Time by which to advance the sources. Must have astropy units of
+            time.
+        """
+        if dt == 0:
+            return
+
+        timesteps = u.Quantity([0 * dt.unit, dt])
+        circular = self.ecc == 0.0
+        eccentric = np.logical_not(circular)
+
+        # merged binaries can't be evolved backwards
+        if dt < 0:
+            circular = np.logical_and(circular, self.a.value > 0.0)
+
+        f_orb = self.f_orb.copy()
+        a = self.a.copy()
+        ecc = self.ecc.copy()
+
+        if circular.any():
+            a_evol, f_orb_evol = evol.evol_circ(timesteps=timesteps,
+                                                m_1=self.m_1[circular],
+                                                m_2=self.m_2[circular],
+                                                a_i=self.a[circular],
+                                                output_vars=["a", "f_orb"])
+            a[circular] = a_evol[:, -1]
+            f_orb[circular] = f_orb_evol[:, -1]
+
+        if eccentric.any():
+            ecc_evol, a_evol, f_orb_evol = evol.evol_ecc(
+                ecc_i=self.ecc[eccentric], timesteps=timesteps,
+                m_1=self.m_1[eccentric], m_2=self.m_2[eccentric],
+                a_i=self.a[eccentric], output_vars=["ecc", "a", "f_orb"],
+                n_proc=self.n_proc)
+            ecc[eccentric] = ecc_evol[:, -1]
+            a[eccentric] = a_evol[:, -1]
+            f_orb[eccentric] = f_orb_evol[:, -1]
+
+        # setting the columns marks only the sources that changed
+        self.f_orb = f_orb
+        self.a = a
+        self.ecc = ecc
+
+    def get_snapshots(self, epochs, output_vars=["ecc", "f_orb"],
+                      in_place=False):
+        """Evaluate the sources at a series of epochs
+
+        Sources are advanced incrementally from one epoch to the next with
+        :meth:`legwork.source.Source.advance` rather than evolving from t=0
+        for every epoch.
+
+        Parameters
+        ----------
+        epochs : `float/array`
+            Times (relative to the current state of the sources) at which to
+            record the state of every source. Must have astropy units of time,
+            be non-negative and monotonically increasing.
+
+        output_vars : `str/array`
+            List of **ordered** output vars, or a single var. Choose from any
+            of ``ecc``, ``a``, ``f_orb`` and ``f_GW``. Default is
+            [``ecc``, ``f_orb``].
+
+        in_place : `boolean`
+            Whether to leave the sources at the final epoch. By default the
+            initial state of the sources is restored afterwards (including
+            which sources count as modified, so any SNRs that were already
+            calculated are still up to date).
+
+        Returns
+        -------
+        snapshots : `array`
+            Array(s) of shape ``(n_sources, n_epochs)`` containing the
+            requested variables. Content determined by ``output_vars``.
+
+        Raises
+        ------
+        ValueError
+            If ``epochs`` are negative or not monotonically increasing
+        """
+        epochs = epochs.reshape(-1)
+        dts = np.diff(epochs, prepend=0 * epochs.unit)
+        if (dts < 0).any():
+            raise ValueError("`epochs` must be non-negative and "
+                             "monotonically increasing")
+        output_vars = np.array([output_vars]) if isinstance(output_vars, str)\
+            else output_vars
+
+        # copy since advancing overwrites the table in place. Nothing is
+        # cached at the intermediate generations, so the counters can safely
+        # be wound back along with the values
+        initial_state = self._table.get_state()
+
+        ecc_snaps = np.zeros((self.n_sources, len(epochs)))
+        a_snaps = np.zeros((self.n_sources, len(epochs))) * u.AU
+        f_orb_snaps = np.zeros((self.n_sources, len(epochs))) * u.Hz
+        try:
+            for i, dt in enumerate(dts):
+                self.advance(dt)
+                ecc_snaps[:, i] = self.ecc
+                a_snaps[:, i] = self.a
+                f_orb_snaps[:, i] = self.f_orb
+        finally:
+            if not in_place:
+                self._table.set_state(initial_state)
+
+        snapshots = []
+        for var in output_vars:
+            if var == "ecc":
+                snapshots.append(ecc_snaps)
+            elif var == "a":
+                snapshots.append(a_snaps)
+            elif var == "f_orb":
+                snapshots.append(f_orb_snaps)
+            elif var == "f_GW":
+                snapshots.append(2 * f_orb_snaps)
+        return snapshots if len(snapshots) > 1 else snapshots[0]
+
     def get_source_mask(self, circular=None, stationary=None, t_obs=4 * u.yr):
         """Produce a mask of the sources.
 
@@ -323,24 +758,35 @@ class Source():
         -------
         mask : `bool/array`
             Mask for the sources
+
+        Notes
+        -----
+        Which sources are circular (for the current GW luminosity tolerance)
+        and which are stationary (for each ``t_obs`` and ``stat_tol``) is
+        cached, so repeated calls only check sources that have changed since.
         """
         if circular is None:
             circular_mask = np.repeat(True, self.n_sources)
-        elif circular is True:
-            circular_mask = self.ecc <= self.ecc_tol
-        elif circular is False:
-            circular_mask = self.ecc > self.ecc_tol
+        elif circular is True or circular is False:
+            circular_mask = self._get_cached_mask(
+                key=("circular", self._gw_lum_tol), params=["ecc"],
+                func=self._is_circular)
+            if circular is False:
+                circular_mask = np.logical_not(circular_mask)
         else:
             raise ValueError("`circular` must be None, True or False")
 
         if stationary is None:
             stat_mask = np.repeat(True, self.n_sources)
         elif stationary is True or stationary is False:
-            stat_mask = utils.determine_stationarity(m_c=self.m_c,
-                                                     f_orb_i=self.f_orb,
-                                                     t_evol=t_obs,
-                                                     ecc_i=self.ecc,
-                                                     stat_tol=self.stat_tol)
+            def is_stationary(inds):
+                m_c, f_orb, ecc = self._take(inds, "m_c", "f_orb", "ecc")
+                return utils.determine_stationarity(m_c=m_c, f_orb_i=f_orb,
+                                                    t_evol=t_obs, ecc_i=ecc,
+                                                    stat_tol=self.stat_tol)
+            stat_mask = self._get_cached_mask(
+                key=("stationary", t_obs.to_value(u.yr), self.stat_tol),
+                params=["m_c", "f_orb", "ecc"], func=is_stationary)
             if stationary is False:
                 stat_mask = np.logical_not(stat_mask)
         else:
@@ -348,6 +794,127 @@ class Source():
 
         return np.logical_and(circular_mask, stat_mask)
 
+    def _is_circular(self, inds):
+        """Whether the sources at ``inds`` count as circular"""
+        return self._table.values[self._COLUMNS["ecc"][0],
+                                  self._table_indices(inds)] <= self.ecc_tol
+
+    def _get_cached_mask(self, key, params, func):
+        """Get a mask of the sources from ``self._mask_cache``
+
+        The mask is created with ``func(inds)``, which gives the mask for
+        the sources at ``inds``. If the mask is already cached then ``func``
+        is only used for any sources that have changed (or been added) since,
+        and only if one of ``params`` has changed at all. The mask returned
+        is the cached one so must not be modified.
+        """
+        table = self._table
+        rows = [self._COLUMNS[param][0] for param in params]
+        cached = self._mask_cache.get(key)
+        if cached is None:
+            mask = func(np.arange(self.n_sources))
+        else:
+            generation, mask = cached
+            if table.row_modified[rows].max() <= generation:
+                return mask
+            modified = table.modified if self._indices is None \
+                else table.modified[self._indices]
+            changed = np.flatnonzero(modified > generation)
+            if len(mask) < self.n_sources:
+                mask = np.concatenate(
+                    (mask, np.zeros(self.n_sources - len(mask)).astype(bool)))
+            mask[changed] = func(changed)
+
+        # forget the oldest mask if there are lots of different keys
+        if key not in self._mask_cache and len(self._mask_cache) >= 16:
+            self._mask_cache.pop(next(iter(self._mask_cache)))
+        self._mask_cache[key] = (table.generation, mask)
+        return mask
+
+    def _build_frequency_index(self):
+        """Sort the sources by orbital frequency and by the frequency of
+        their dominant harmonic (``max_strain_harmonic * f_orb``) and store
+        the order and sorted frequencies (in Hz) at
+        ``self._frequency_index``"""
+        f_orb = self.f_orb.to(u.Hz).value
+        f_dom = f_orb * self.max_strain_harmonic(self.ecc)
+
+        self._frequency_index = {"generation": self._table.generation}
+        for frequency, f in [("f_orb", f_orb), ("f_dom", f_dom)]:
+            order = np.argsort(f, kind="stable")
+            self._frequency_index[frequency] = (order, f[order])
+
+    def _get_frequency_index(self, frequency):
+        """Get the (order, sorted frequencies) for ``frequency``, building
+        the index first if it is missing or out of date"""
+        if frequency not in ["f_orb", "f_dom"]:
+            raise ValueError("`frequency` must be 'f_orb' or 'f_dom'")
+        # only changes to f_orb and ecc affect the index
+        rows = [self._COLUMNS["f_orb"][0], self._COLUMNS["ecc"][0]]
+        if self._frequency_index is None or self._frequency_index[
+                "generation"] < self._table.row_modified[rows].max():
+            self._build_frequency_index()
+        return self._frequency_index[frequency]
+
+    def get_sources_in_band(self, f_lo, f_hi, frequency="f_dom"):
+        """Find the sources with a frequency in the band [``f_lo``, ``f_hi``]
+
+        The sources are sorted by frequency the first time this is called
+        (and again only after ``f_orb``, ``ecc`` or the GW luminosity
+        tolerance change) so each query is just a pair of binary searches.
+
+        Parameters
+        ----------
+        f_lo : `float`
+            Lower edge of the band. Must have astropy units of frequency.
+
+        f_hi : `float`
+            Upper edge of the band. Must have astropy units of frequency.
+
+        frequency : `{ 'f_orb', 'f_dom' }`
+            Which frequency to compare to the band. Either the orbital
+            frequency or the frequency of the dominant harmonic
+            (``max_strain_harmonic * f_orb``). Default is ``f_dom``.
+
+        Returns
+        -------
+        indices : `int/array`
+            Indices of the sources in the band, in order of increasing
+            frequency. This is a view of the index so should not be modified.
+
+        Raises
+        ------
+        ValueError
+            If ``frequency`` is not 'f_orb' or 'f_dom'
+        """
+        order, f_sorted = self._get_frequency_index(frequency)
+        start = np.searchsorted(f_sorted, f_lo.to(u.Hz).value, side="left")
+        end = np.searchsorted(f_sorted, f_hi.to(u.Hz).value, side="right")
+        return order[start:max(start, end)]
+
+    def count_sources_in_bins(self, bins, frequency="f_dom"):
+        """Count the number of sources in each frequency bin
+
+        Parameters
+        ----------
+        bins : `float/array`
+            Edges of the frequency bins (must be increasing). Must have
+            astropy units of frequency.
+
+        frequency : `{ 'f_orb', 'f_dom' }`
+            Which frequency to bin (see
+            :meth:`legwork.source.Source.get_sources_in_band`). Default is
+            ``f_dom``.
+
+        Returns
+        -------
+        counts : `int/array`
+            Number of sources in each bin, of length ``len(bins) - 1``. Bins
+            include their lower edge and exclude their upper edge.
+        """
+        _, f_sorted = self._get_frequency_index(frequency)
+        return np.diff(np.searchsorted(f_sorted, bins.to(u.Hz).value))
+
     def get_h_0_n(self, harmonics, which_sources=None):
         """Computes the strain for all binaries for the given ``harmonics``
 
@@ -356,8 +923,9 @@ class Source():
         harmonics : `int/array`
             Harmonic(s) at which to calculate the strain
 
-        which_sources : `boolean/array`
-            Mask on which sources to compute values for (default is all)
+        which_sources : `boolean/int/array`
+            Mask (or indices) of the sources to compute values for (default
+            is all)
 
         Returns
         -------
@@ -365,14 +933,10 @@ class Source():
             Dimensionless strain in the quadrupole approximation (unitless)
             shape of array is ``(number of sources, number of harmonics)``
         """
-        if which_sources is None:
-            which_sources = np.repeat(True, self.n_sources)
-        return strain.h_0_n(m_c=self.m_c[which_sources],
-                            f_orb=self.f_orb[which_sources],
-                            ecc=self.ecc[which_sources],
-                            n=harmonics,
-                            dist=self.dist[which_sources],
-                            interpolated_g=self.g)[:, 0, :]
+        m_c, f_orb, ecc, dist = self._take(self._as_indices(which_sources),
+                                           "m_c", "f_orb", "ecc", "dist")
+        return strain.h_0_n(m_c=m_c, f_orb=f_orb, ecc=ecc, n=harmonics,
+                            dist=dist, interpolated_g=self.g)[:, 0, :]
 
     def get_h_c_n(self, harmonics, which_sources=None):
         """Computes the characteristic strain for all binaries
@@ -383,8 +947,9 @@ class Source():
         harmonics : `int/array`
             Harmonic(s) at which to calculate the strain
 
-        which_sources `boolean/array`
-            Mask on which sources to compute values for (default is all)
+        which_sources : `boolean/int/array`
+            Mask (or indices) of the sources to compute values for (default
+            is all)
 
         Returns
         -------
@@ -392,23 +957,76 @@ class Source():
             Dimensionless characteristic strain in the quadrupole approximation
             shape of array is ``(number of sources, number of harmonics)``
         """
-        if which_sources is None:
-            which_sources = np.repeat(True, self.n_sources)
-        return strain.h_c_n(m_c=self.m_c[which_sources],
-                            f_orb=self.f_orb[which_sources],
-                            ecc=self.ecc[which_sources],
-                            n=harmonics,
-                            dist=self.dist[which_sources],
-                            interpolated_g=self.g)[:, 0, :]
-
-    def get_snr(self, t_obs=4 * u.yr, n_step=100, verbose=False):
+        m_c, f_orb, ecc, dist = self._take(self._as_indices(which_sources),
+                                           "m_c", "f_orb", "ecc", "dist")
+        return strain.h_c_n(m_c=m_c, f_orb=f_orb, ecc=ecc, n=harmonics,
+                            dist=dist, interpolated_g=self.g)[:, 0, :]
+
+    def get_snr_upper_bound(self, t_obs=4 * u.yr):
+        """Computes a cheap upper bound on the SNR of every source using
+        :func:`legwork.snr.snr_upper_bound`
+
+        The bound applies to the SNR that
+        :meth:`legwork.source.Source.get_snr` would calculate, whether the
+        sources are stationary or evolving.
+
+        Parameters
+        ----------
+        t_obs : `float/array`
+            Observation duration (default: 4 years)
+
+        Returns
+        -------
+        snr_bound : `array`
+            Upper bound on the signal-to-noise ratio (with shape
+            ``(n_sources, len(t_obs))`` if ``t_obs`` is an array)
+        """
+        if np.ndim(t_obs) > 0:
+            return np.transpose([self._get_snr_upper_bound(t_obs=t, sc=sc)
+                                 for t, sc in zip(t_obs,
+                                                  self._get_sc(t_obs))])
+        return self._get_snr_upper_bound(t_obs=t_obs, sc=self._get_sc(t_obs))
+
+    def _get_snr_upper_bound(self, t_obs, sc):
+        """Computes the SNR upper bound for a single ``t_obs`` and
+        sensitivity curve"""
+        circular = self.ecc <= self.ecc_tol
+
+        # circular sources only use n = 2, eccentric sources use every
+        # harmonic up to the top of their harmonic group
+        harmonics_required = self.harmonics_required(self.ecc)
+        n_min = np.where(circular, 2, 1)
+        n_max = np.where(circular, 2,
+                         10**np.ceil(np.log10(harmonics_required + 1)) - 1)
+
+        return sn.snr_upper_bound(m_c=self.m_c, f_orb_i=self.f_orb,
+                                  ecc=np.where(circular, 0.0, self.ecc),
+                                  dist=self.dist, t_obs=t_obs, n_min=n_min,
+                                  n_max=n_max, interpolated_sc=sc)
+
+    def get_snr(self, t_obs=4 * u.yr, n_step=100, verbose=False,
+                snr_threshold=None):
         """Computes the SNR for a generic binary. Also records the harmonic
         with maximum SNR for each binary in ``self.max_snr_harmonic``.
 
+        If the SNRs have already been calculated with the same arguments
+        (and sensitivity curve and tolerances) then only the sources that
+        have changed since, or that were skipped for a higher
+        ``snr_threshold``, are recalculated.
+
         Parameters
         ----------
-        t_obs : `array`
-            Observation duration (default: 4 years)
+        t_obs : `float/array`
+            Observation duration (default: 4 years). The noise for each
+            duration is the Source's noise model for that duration (see
+            :meth:`legwork.lisa.NoiseModel.with_t_obs`). If an array is given
+            then the SNR is calculated for each duration in a single pass:
+            strains and g(n,e) are shared, the sensitivity curve for each
+            duration is interpolated once and evolving sources are evolved
+            once for the longest duration (so ``n_step`` should suit the
+            longest). Sources are classified as stationary or evolving
+            separately for each duration, as they would be for a single
+            ``t_obs``.
 
         n_step : `int`
             Number of time steps during observation duration
@@ -416,57 +1034,384 @@ class Source():
         verbose : `boolean`
             Whether to print additional information to user
 
+        snr_threshold : `float`
+            If not None, sources whose SNR isn't already known and for which
+            the upper bound from
+            :meth:`legwork.source.Source.get_snr_upper_bound` is below this
+            threshold are skipped. Their SNR is set to ``np.nan`` and their
+            max SNR harmonic to 0. This requires a noise model (the default
+            unless ``interpolate_sc`` is False) since the bound needs the
+            exact minimum of the noise.
+
         Returns
         -------
         SNR : `array`
-            The signal-to-noise ratio
+            The signal-to-noise ratio (with shape ``(n_sources, len(t_obs))``
+            if ``t_obs`` is an array)
+
+        Raises
+        ------
+        ValueError
+            If ``snr_threshold`` is given but the Source has no noise model
         """
-        if self._sc_params is not None:     # pragma: no cover
-            sc_t_obs = t_obs
-            if "t_obs" in self._sc_params.keys():
-                sc_t_obs = self._sc_params["t_obs"]
-            if t_obs != sc_t_obs:
-                print("Warning: Current `sc_params` uses t_obs =",
-                      "{} but this function".format(self._sc_params["t_obs"]),
-                      "was passed t_obs = {}. Update your".format(t_obs),
-                      "sc_params to match with Source.update_sc_params()!")
+        if snr_threshold is not None \
+                and not isinstance(self.sc, lisa.NoiseModel):
+            raise ValueError("`snr_threshold` requires a noise model for a "
+                             "rigorous SNR bound, so can't be used when "
+                             "`interpolate_sc` is False")
+
+        shape = (self.n_sources,) + np.shape(t_obs)
+        settings = self._get_snr_settings("source", t_obs, n_step)
+
+        # only recalculate sources that have changed since the last call
+        todo = self._get_dirty_sources(settings, snr_threshold)
+        if todo is None:
+            todo = np.arange(self.n_sources)
+            snr = np.zeros(shape)
+        else:
+            snr = self.snr.copy()
 
         if verbose:
-            print("Calculating SNR for {} sources".format(self.n_sources))
-        snr = np.zeros(self.n_sources)
-        stat_mask = self.get_source_mask(circular=None, stationary=True,
-                                         t_obs=t_obs)
-        evol_mask = np.logical_not(stat_mask)
+            print("Calculating SNR for {} sources".format(len(todo)))
 
-        if stat_mask.any():
-            if verbose:
-                n_stat = len(snr[stat_mask])
-                print("\t{} sources are stationary".format(n_stat))
-            snr[stat_mask] = self.get_snr_stationary(t_obs=t_obs,
-                                                     which_sources=stat_mask,
-                                                     verbose=verbose)
-        if evol_mask.any():
+        if snr_threshold is not None and len(todo) > 0:
+            pruned = self[todo].get_snr_upper_bound(t_obs=t_obs) \
+                < snr_threshold
+            if np.ndim(t_obs) > 0:
+                pruned = pruned.all(axis=1)
             if verbose:
-                n_evol = len(snr[evol_mask])
-                print("\t{} sources are evolving".format(n_evol))
-            snr[evol_mask] = self.get_snr_evolving(t_obs=t_obs,
-                                                   which_sources=evol_mask,
-                                                   n_step=n_step,
-                                                   verbose=verbose)
+                print("\t{} sources are below the SNR threshold".format(
+                    pruned.sum()))
+            snr[todo[pruned]] = np.nan
+            self._store_snr_outputs(todo[pruned], snr,
+                                    np.zeros(shape).astype(int))
+            todo = todo[~pruned]
+
+        if len(todo) > 0:
+            snr_todo, msh = self._calc_snr(t_obs, n_step, todo,
+                                           self._get_sc(t_obs), verbose)
+            snr[todo] = snr_todo[todo]
+            self._store_snr_outputs(todo, snr, msh)
+        self._set_snr_settings(settings, snr_threshold)
+        self._cache_snr_dist(snr, t_obs, settings)
         return snr
 
+    def _get_snr_settings(self, method, t_obs, n_step=None):
+        """Collect everything (other than the source parameters) that the
+        SNRs calculated by ``method`` depend on, using the keys of the noise
+        model and g(n,e) table (where they have one) so that equivalent
+        instances share SNRs"""
+        t_obs_yr = tuple(np.ravel(t_obs.to_value(u.yr)))
+        sc_key, g_key = [value if getattr(value, "key", None) is None
+                         else value.key for value in [self.sc, self.g]]
+        return (method, np.shape(t_obs), t_obs_yr, n_step, sc_key, g_key,
+                self._gw_lum_tol, self.stat_tol)
+
+    def _get_default_snr_settings(self, t_obs, n_step):
+        """Collect the settings used by ``get_snr`` when only ``t_obs`` and
+        ``n_step`` are given"""
+        return self._get_snr_settings("source", t_obs, n_step)
+
+    def _set_snr_settings(self, settings, snr_threshold=None):
+        """Record that every SNR in ``self.snr`` is up to date for
+        ``settings``, other than those skipped (set to ``np.nan``) because
+        they are below ``snr_threshold``"""
+        self._snr_settings = settings
+        self._snr_threshold = snr_threshold
+        self._snr_generation = self._table.generation
+
+    def _get_dirty_sources(self, settings, snr_threshold=None):
+        """Find the sources whose SNRs need to be recalculated for
+        ``settings`` and ``snr_threshold``
+
+        Returns
+        -------
+        dirty : `int/array`
+            Indices of the sources that have changed since the SNRs were
+            calculated or were skipped for a higher threshold, or None if
+            every SNR needs to be calculated
+        """
+        if self.snr is None or self._snr_settings != settings \
+                or len(self.snr) != self.n_sources:
+            return None
+        modified = self._table.modified if self._indices is None \
+            else self._table.modified[self._indices]
+        dirty = modified > self._snr_generation
+
+        # skipped sources are only still below a threshold at least as high
+        if self._snr_threshold is not None and (
+                snr_threshold is None or snr_threshold < self._snr_threshold):
+            skipped = np.isnan(self.snr.reshape(len(self.snr), -1))
+            dirty = np.logical_or(dirty, skipped.any(axis=1))
+        return np.flatnonzero(dirty)
+
+    def _cache_snr_dist(self, snr, t_obs, settings):
+        """Cache the distance-independent product of the SNR and distance of
+        every source, which is reused by
+        :meth:`legwork.source.Source.snr_for_distances` (only for a single
+        ``t_obs``), along with the settings and table generation that it is
+        valid for"""
+        if np.ndim(t_obs) > 0:
+            self._snr_dist = None
+            return
+        self._snr_dist = (snr * self.dist).to(u.kpc)
+        self._snr_dist_key = (settings, self._table.generation)
+
+    def _get_snr_dist(self, t_obs, n_step=100, verbose=False):
+        """Get the product of the SNR and distance of every source, only
+        computing the SNR if the cache is missing, was calculated with
+        different settings, the sources have changed since or some of them
+        were skipped for being below an SNR threshold"""
+        key = (self._get_default_snr_settings(t_obs, n_step),
+               self._table.generation)
+        if self._snr_dist is None or self._snr_dist_key != key \
+                or np.isnan(self._snr_dist).any():
+            self.get_snr(t_obs=t_obs, n_step=n_step, verbose=verbose)
+        return self._snr_dist
+
+    def snr_for_distances(self, dist_samples, t_obs=4 * u.yr, n_step=100,
+                          verbose=False):
+        """Computes the SNR of every source for many different distances
+        without recalculating any strains or evolution
+
+        Since the SNR scales exactly as 1 / dist (and the distance doesn't
+        affect the evolution), the product of SNR and distance is cached by
+        :meth:`legwork.source.Source.get_snr` and each sample is just a
+        rescaling. The SNR is only recalculated if it hasn't already been for
+        this ``t_obs`` (and ``n_step``) or the sources have changed since.
+
+        Parameters
+        ----------
+        dist_samples : `float/array`
+            Distance samples. Either shape ``(n_draws,)`` to use the same
+            distances for every source or ``(n_sources, n_draws)``. Must have
+            astropy units of distance.
+
+        t_obs : `array`
+            Observation duration (default: 4 years)
+
+        n_step : `int`
+            Number of time steps during observation duration
+
+        verbose : `boolean`
+            Whether to print additional information to user
+
+        Returns
+        -------
+        snr : `array`
+            The signal-to-noise ratio with shape ``(n_sources, n_draws)``
+
+        Raises
+        ------
+        ValueError
+            If ``dist_samples`` has more than 2 dimensions or its first
+            dimension doesn't match the number of sources
+
+        AssertionError
+            If ``dist_samples`` is missing units
+        """
+        assert(isinstance(dist_samples, u.quantity.Quantity)), \
+            "`dist_samples` must have units"
+        dist_samples = np.atleast_1d(dist_samples.to(u.kpc).value)
+        if dist_samples.ndim == 1:
+            dist_samples = dist_samples[np.newaxis, :]
+        elif dist_samples.ndim != 2 \
+                or dist_samples.shape[0] != self.n_sources:
+            raise ValueError("`dist_samples` must have shape (n_draws,) or "
+                             "(n_sources, n_draws)")
+
+        snr_dist = self._get_snr_dist(t_obs=t_obs, n_step=n_step,
+                                      verbose=verbose).value
+        return snr_dist[:, np.newaxis] / dist_samples
+
+    def get_horizon_distance(self, snr_threshold=7, t_obs=4 * u.yr,
+                             n_step=100, verbose=False):
+        """Computes the distance out to which each source would be detected
+        with an SNR of at least ``snr_threshold``
+
+        Since the SNR scales exactly as 1 / dist, this only requires a single
+        call to :meth:`legwork.source.Source.get_snr` (which is skipped if the
+        SNR is already cached for this ``t_obs``), after which the horizon
+        distance for any threshold follows from ``snr * dist``.
+
+        Parameters
+        ----------
+        snr_threshold : `float/array`
+            SNR required for a detection. If an array is given then the
+            horizon distance is returned for each threshold.
+
+        t_obs : `array`
+            Observation duration (default: 4 years)
+
+        n_step : `int`
+            Number of time steps during observation duration
+
+        verbose : `boolean`
+            Whether to print additional information to user
+
+        Returns
+        -------
+        horizon : `float/array`
+            Horizon distance of each source with shape
+            ``(n_sources,) + np.shape(snr_threshold)``
+        """
+        snr_dist = self._get_snr_dist(t_obs=t_obs, n_step=n_step,
+                                      verbose=verbose)
+        snr_threshold = np.asarray(snr_threshold)
+        return snr_dist.reshape(snr_dist.shape + (1,) * snr_threshold.ndim) \
+            / snr_threshold
+
+    def get_snr_for_sc_params(self, sc_params_list, n_step=100,
+                              verbose=False):
+        """Computes the SNR of every source for several sensitivity curve
+        configurations (e.g. for a mission design study)
+
+        The signal (strains, g(n,e) and evolution) is only computed once and
+        just the noise weighting is repeated for each configuration. Each
+        configuration uses its own ``t_obs`` for both the noise and the
+        classification of the sources as stationary or evolving, and evolving
+        sources are evolved once for the longest (see
+        :meth:`legwork.source.Source.get_snr` with an array of ``t_obs``).
+
+        Parameters
+        ----------
+        sc_params_list : `list`
+            List of ``sc_params`` dictionaries (see
+            :class:`legwork.source.Source`), each of which updates the
+            default parameters (not the Source's current ``sc_params``) and
+            uses their ``t_obs`` (default: 4 years). Any item may instead be
+            a :class:`legwork.lisa.NoiseModel`, which uses its own ``t_obs``,
+            or a ``(model, t_obs)`` pair for models whose noise doesn't
+            depend on the observation time (e.g. TianQin).
+
+        n_step : `int`
+            Number of time steps during observation duration
+
+        verbose : `boolean`
+            Whether to print additional information to user
+
+        Returns
+        -------
+        SNR : `array`
+            The signal-to-noise ratio with shape
+            ``(n_sources, len(sc_params_list))``
+
+        Raises
+        ------
+        ValueError
+            If ``sc_params_list`` is empty or contains a noise model without
+            a ``t_obs`` that isn't given as a ``(model, t_obs)`` pair
+        """
+        if len(sc_params_list) == 0:
+            raise ValueError("`sc_params_list` must not be empty")
+
+        curves, t_obs = [], []
+        for item in sc_params_list:
+            if isinstance(item, tuple):
+                curve, curve_t_obs = item
+            else:
+                curve = item if isinstance(item, lisa.NoiseModel) \
+                    else lisa.get_noise_model("lisa", **item)
+                curve_t_obs = curve.t_obs
+            if curve_t_obs is None:
+                raise ValueError("Noise models without a `t_obs` must be "
+                                 "given as a (model, t_obs) pair")
+            curves.append(curve)
+            t_obs.append(curve_t_obs.to(u.yr).value)
+        t_obs = t_obs * u.yr
+
+        if verbose:
+            print("Calculating SNR for {} sources and {} sensitivity "
+                  "curves".format(self.n_sources, len(curves)))
+
+        # the sweep doesn't change the SNRs stored in the Source
+        return self._calc_snr(t_obs, n_step, np.arange(self.n_sources),
+                              curves, verbose)[0]
+
+    def _calc_snr(self, t_obs, n_step, which_sources, sc, verbose):
+        """Calculate the SNRs and max SNR harmonics of the sources at indices
+        ``which_sources`` with the sensitivity curve(s) ``sc`` without
+        storing them (other sources are left as zero)
+
+        Each source is classified as stationary or evolving separately for
+        each ``t_obs``, so a source that only evolves significantly over the
+        longer durations uses the stationary calculation for the shorter ones
+        """
+        shape = (self.n_sources,) + np.shape(t_obs)
+        t_obs_arr = np.atleast_1d(t_obs)
+        snr = np.zeros((self.n_sources, len(t_obs_arr)))
+        msh = np.zeros((self.n_sources, len(t_obs_arr))).astype(int)
+        stationary = np.transpose([
+            self.get_source_mask(circular=None, stationary=True,
+                                 t_obs=t)[which_sources] for t in t_obs_arr])
+
+        # group the sources that are stationary for the same durations
+        for pattern in np.unique(stationary, axis=0):
+            rows = which_sources[(stationary == pattern).all(axis=1)]
+            for is_stationary in [True, False]:
+                cols = np.flatnonzero(pattern == is_stationary)
+                if len(cols) == 0:
+                    continue
+                if verbose:
+                    print("\t{} sources are {} for t_obs = {}".format(
+                        len(rows),
+                        "stationary" if is_stationary else "evolving",
+                        t_obs_arr[cols]))
+                t, sc_cols = t_obs, sc
+                if np.ndim(t_obs) > 0:
+                    t = t_obs_arr[cols]
+                    if isinstance(sc, list):
+                        sc_cols = [sc[i] for i in cols]
+                if is_stationary:
+                    snr_cols, msh_cols = self._calc_snr_stationary(
+                        t, rows, sc_cols, verbose)
+                else:
+                    snr_cols, msh_cols, _ = self._calc_snr_evolving(
+                        t, n_step, rows, sc_cols, verbose)
+                block = np.ix_(rows, cols)
+                snr[block] = snr_cols[rows].reshape(len(rows), len(cols))
+                msh[block] = msh_cols[rows].reshape(len(rows), len(cols))
+
+        return snr.reshape(shape), msh.reshape(shape)
+
+    def _prepare_snr_outputs(self, shape):
+        """Make sure that ``self.snr`` and ``self.max_snr_harmonic`` exist
+        and match the shape of the SNRs being calculated"""
+        if self.snr is None or self.snr.shape != shape:
+            self.snr = np.zeros(shape)
+        if self.max_snr_harmonic is None \
+                or self.max_snr_harmonic.shape != shape:
+            self.max_snr_harmonic = np.zeros(shape).astype(int)
+
+    def _store_snr_outputs(self, inds, snr, msh):
+        """Store the SNRs and max SNR harmonics of the sources at ``inds``
+        (and in the parent Source for a view that writes back)"""
+        # the settings used for the rest of the SNRs may not match
+        self._snr_settings = None
+        self._prepare_snr_outputs(snr.shape)
+        self.snr[inds] = snr[inds]
+        self.max_snr_harmonic[inds] = msh[inds]
+
+        if self._write_back:
+            parent = self._parent
+            parent._snr_settings = None
+            parent._prepare_snr_outputs((parent.n_sources,) + snr.shape[1:])
+            parent.snr[self._indices[inds]] = snr[inds]
+            parent.max_snr_harmonic[self._indices[inds]] = msh[inds]
+
     def get_snr_stationary(self, t_obs=4 * u.yr, which_sources=None,
                            verbose=False):
         """Computes the SNR assuming a stationary binary
 
         Parameters
         ----------
-        t_obs : `array`
-            Observation duration (default: 4 years)
+        t_obs : `float/array`
+            Observation duration (default: 4 years). See
+            :meth:`legwork.source.Source.get_snr` for arrays.
 
-        which_sources : `bool/array`
-            Mask on which sources to consider stationary and calculate
-            (default is all sources in Class)
+        which_sources : `bool/int/array`
+            Mask (or indices) of the sources to consider stationary and
+            calculate (default is all sources in Class)
 
         verbose : `boolean`
             Whether to print additional information to user
@@ -476,142 +1421,189 @@ class Source():
         SNR : `array`
             The signal-to-noise ratio
         """
-        if which_sources is None:
-            which_sources = np.repeat(True, self.n_sources)
-        snr = np.zeros(self.n_sources)
-        ind_ecc = np.logical_and(self.ecc > self.ecc_tol, which_sources)
-        ind_circ = np.logical_and(self.ecc <= self.ecc_tol, which_sources)
+        which_sources = self._as_indices(which_sources)
+        snr, msh = self._calc_snr_stationary(t_obs, which_sources,
+                                             self._get_sc(t_obs), verbose)
+        self._store_snr_outputs(which_sources, snr, msh)
+
+        return snr[which_sources]
+
+    def _calc_snr_stationary(self, t_obs, which_sources, sc, verbose):
+        """Calculate the SNRs and max SNR harmonics of the stationary sources
+        at indices ``which_sources`` with the sensitivity curve(s) ``sc``
+        without storing them (other sources are left as zero)"""
+        shape = (self.n_sources,) + np.shape(t_obs)
+        snr = np.zeros(shape)
+        ecc = self._table.values[self._COLUMNS["ecc"][0],
+                                 self._table_indices(which_sources)]
+        ind_ecc = which_sources[ecc > self.ecc_tol]
+        ind_circ = which_sources[ecc <= self.ecc_tol]
 
         # default to n = 2 for max snr harmonic
-        msh = np.repeat(2, self.n_sources)
+        msh = np.full(shape, 2)
 
         # only compute snr if there is at least one binary in mask
-        if ind_circ.any():
+        if len(ind_circ) > 0:
             if verbose:
                 print("\t\t{} sources are stationary and circular".format(
-                    len(snr[ind_circ])))
-            snr[ind_circ] = sn.snr_circ_stationary(m_c=self.m_c[ind_circ],
-                                                   f_orb=self.f_orb[ind_circ],
-                                                   dist=self.dist[ind_circ],
-                                                   t_obs=t_obs,
+                    len(ind_circ)))
+            m_c, f_orb, dist = self._take(ind_circ, "m_c", "f_orb", "dist")
+            snr[ind_circ] = sn.snr_circ_stationary(m_c=m_c, f_orb=f_orb,
+                                                   dist=dist, t_obs=t_obs,
                                                    interpolated_g=self.g,
-                                                   interpolated_sc=self.sc)
-        if ind_ecc.any():
+                                                   interpolated_sc=sc)
+        if len(ind_ecc) > 0:
             if verbose:
                 print("\t\t{} sources are stationary and eccentric".format(
-                    len(snr[ind_ecc])))
-            harmonics_required = self.harmonics_required(self.ecc)
+                    len(ind_ecc)))
+            harmonics_required = self.harmonics_required(
+                ecc[ecc > self.ecc_tol])
             harmonic_groups = [(1, 10), (10, 100), (100, 1000), (1000, 10000)]
             for lower, upper in harmonic_groups:
-                harm_mask = np.logical_and(harmonics_required >= lower,
-                                           harmonics_required < upper)
-                match = np.logical_and(harm_mask, ind_ecc)
-                if match.any():
+                match = ind_ecc[np.logical_and(harmonics_required >= lower,
+                                               harmonics_required < upper)]
+                if len(match) > 0:
                     hr = upper - 1
 
-                    snr_msh = sn.snr_ecc_stationary(m_c=self.m_c[match],
-                                                    f_orb=self.f_orb[match],
-                                                    ecc=self.ecc[match],
-                                                    dist=self.dist[match],
+                    m_c, f_orb, ecc_match, dist = self._take(
+                        match, "m_c", "f_orb", "ecc", "dist")
+                    snr_msh = sn.snr_ecc_stationary(m_c=m_c, f_orb=f_orb,
+                                                    ecc=ecc_match,
+                                                    dist=dist,
                                                     t_obs=t_obs,
                                                     harmonics_required=hr,
                                                     interpolated_g=self.g,
-                                                    interpolated_sc=self.sc,
+                                                    interpolated_sc=sc,
                                                     ret_max_snr_harmonic=True)
                     snr[match], msh[match] = snr_msh
 
-        if self.max_snr_harmonic is None:
-            self.max_snr_harmonic = np.zeros(self.n_sources).astype(int)
-        self.max_snr_harmonic[which_sources] = msh[which_sources]
-
-        if self.snr is None:
-            self.snr = np.zeros(self.n_sources)
-        self.snr[which_sources] = snr[which_sources]
-
-        return snr[which_sources]
+        return snr, msh
 
     def get_snr_evolving(self, t_obs, n_step=100, which_sources=None,
-                         verbose=False):
+                         verbose=False, ret_snr_track=False,
+                         track_times=None):
         """Computes the SNR assuming an evolving binary
 
         Parameters
         ----------
-        t_obs : `array`
-            Observation duration (default: 4 years)
+        t_obs : `float/array`
+            Observation duration (default: 4 years). See
+            :meth:`legwork.source.Source.get_snr` for arrays.
 
         n_step : `int`
             Number of time steps during observation duration
 
-        which_sources : `bool/array`
-            Mask on which sources to consider evolving and calculate
-            (default is all sources in Class)
+        which_sources : `bool/int/array`
+            Mask (or indices) of the sources to consider evolving and
+            calculate (default is all sources in Class)
 
         verbose : `boolean`
             Whether to print additional information to user
 
+        ret_snr_track : `boolean`
+            Whether to also return the cumulative SNR of each source at each
+            of ``track_times`` (e.g. to find when each source crosses a
+            detection threshold). This requires a single ``t_obs``.
+
+        track_times : `float/array`
+            Times since the start of the observation at which to record the
+            cumulative SNR. Default is None, which uses ``n_step`` evenly
+            spaced times between 0 and ``t_obs``.
+
         Returns
         -------
         SNR : `array`
             The signal-to-noise ratio
+
+        snr_track : `array`
+            Cumulative SNR of each source at each of ``track_times`` stored as
+            float32 with shape ``(n_sources, len(track_times))`` (only
+            returned if ``ret_snr_track=True``)
         """
-        snr = np.zeros(self.n_sources)
+        which_sources = self._as_indices(which_sources)
+        snr, msh, snr_track = self._calc_snr_evolving(
+            t_obs, n_step, which_sources, self._get_sc(t_obs), verbose,
+            ret_snr_track=ret_snr_track, track_times=track_times)
+        self._store_snr_outputs(which_sources, snr, msh)
+
+        if ret_snr_track:
+            return snr[which_sources], snr_track[which_sources]
+        return snr[which_sources]
 
-        if which_sources is None:
-            which_sources = np.repeat(True, self.n_sources)
-        ind_ecc = np.logical_and(self.ecc > self.ecc_tol, which_sources)
-        ind_circ = np.logical_and(self.ecc <= self.ecc_tol, which_sources)
+    def _calc_snr_evolving(self, t_obs, n_step, which_sources, sc, verbose,
+                           ret_snr_track=False, track_times=None):
+        """Calculate the SNRs, max SNR harmonics and (optionally) SNR tracks
+        of the evolving sources at indices ``which_sources`` with the
+        sensitivity curve(s) ``sc`` without storing them (other sources are
+        left as zero)"""
+        shape = (self.n_sources,) + np.shape(t_obs)
+        snr = np.zeros(shape)
+        snr_track = None
+        if ret_snr_track:
+            if track_times is None:
+                track_times = np.linspace(0, t_obs, n_step)
+            snr_track = np.zeros((self.n_sources, len(track_times)),
+                                 dtype=np.float32)
+
+        ecc = self._table.values[self._COLUMNS["ecc"][0],
+                                 self._table_indices(which_sources)]
+        ind_ecc = which_sources[ecc > self.ecc_tol]
+        ind_circ = which_sources[ecc <= self.ecc_tol]
 
         # default to n = 2 for max snr harmonic
-        msh = np.repeat(2, self.n_sources)
+        msh = np.full(shape, 2)
 
-        if ind_circ.any():
+        if len(ind_circ) > 0:
             if verbose:
                 print("\t\t{} sources are evolving and circular".format(
-                    len(snr[ind_circ])))
-            snr[ind_circ] = sn.snr_circ_evolving(m_1=self.m_1[ind_circ],
-                                                 m_2=self.m_2[ind_circ],
-                                                 f_orb_i=self.f_orb[ind_circ],
-                                                 dist=self.dist[ind_circ],
-                                                 t_obs=t_obs,
-                                                 n_step=n_step,
-                                                 interpolated_g=self.g,
-                                                 interpolated_sc=self.sc)
-        if ind_ecc.any():
+                    len(ind_circ)))
+            m_1, m_2, f_orb, dist = self._take(ind_circ, "m_1", "m_2",
+                                               "f_orb", "dist")
+            snr_circ = sn.snr_circ_evolving(m_1=m_1, m_2=m_2,
+                                            f_orb_i=f_orb, dist=dist,
+                                            t_obs=t_obs,
+                                            n_step=n_step,
+                                            interpolated_g=self.g,
+                                            interpolated_sc=sc,
+                                            ret_snr_track=ret_snr_track,
+                                            track_times=track_times)
+            if ret_snr_track:
+                snr[ind_circ], snr_track[ind_circ] = snr_circ
+            else:
+                snr[ind_circ] = snr_circ
+        if len(ind_ecc) > 0:
             if verbose:
                 print("\t\t{} sources are evolving and eccentric".format(
-                    len(snr[ind_ecc])))
-            harmonics_required = self.harmonics_required(self.ecc)
+                    len(ind_ecc)))
+            harmonics_required = self.harmonics_required(
+                ecc[ecc > self.ecc_tol])
             harmonic_groups = [(1, 10), (10, 100), (100, 1000), (1000, 10000)]
             for lower, upper in harmonic_groups:
-                harm_mask = np.logical_and(harmonics_required >= lower,
-                                           harmonics_required < upper)
-                match = np.logical_and(harm_mask, ind_ecc)
-                if match.any():
+                match = ind_ecc[np.logical_and(harmonics_required >= lower,
+                                               harmonics_required < upper)]
+                if len(match) > 0:
                     hr = upper - 1
 
-                    snr_msh = sn.snr_ecc_evolving(m_1=self.m_1[match],
-                                                  m_2=self.m_2[match],
-                                                  f_orb_i=self.f_orb[match],
-                                                  dist=self.dist[match],
-                                                  ecc=self.ecc[match],
+                    m_1, m_2, f_orb, dist, ecc_match = self._take(
+                        match, "m_1", "m_2", "f_orb", "dist", "ecc")
+                    snr_msh = sn.snr_ecc_evolving(m_1=m_1, m_2=m_2,
+                                                  f_orb_i=f_orb,
+                                                  dist=dist,
+                                                  ecc=ecc_match,
                                                   harmonics_required=hr,
                                                   t_obs=t_obs,
                                                   n_step=n_step,
                                                   interpolated_g=self.g,
-                                                  interpolated_sc=self.sc,
+                                                  interpolated_sc=sc,
                                                   n_proc=self.n_proc,
-                                                  ret_max_snr_harmonic=True)
-                    snr[match], msh[match] = snr_msh
-
-        if self.max_snr_harmonic is None:
-            self.max_snr_harmonic = np.zeros(self.n_sources).astype(int)
-        self.max_snr_harmonic[which_sources] = msh[which_sources]
+                                                  ret_max_snr_harmonic=True,
+                                                  ret_snr_track=ret_snr_track,
+                                                  track_times=track_times)
+                    snr[match], msh[match] = snr_msh[:2]
+                    if ret_snr_track:
+                        snr_track[match] = snr_msh[2]
 
-        if self.snr is None:
-            self.snr = np.zeros(self.n_sources)
-        self.snr[which_sources] = snr[which_sources]
-
-        return snr[which_sources]
+        return snr, msh, snr_track
 
     def plot_source_variables(self, xstr, ystr=None, which_sources=None,
                               **kwargs):  # pragma: no cover
@@ -743,7 +1735,8 @@ class Source():
             shown instead. We are working on implementing soon!
         """
         # plot circular and stationary sources
-        circ_stat = self.get_source_mask(circular=True, stationary=True)
+        circ_stat = self.get_source_mask(circular=True, stationary=True,
+                                         t_obs=t_obs)
         if circ_stat.any():
             f_orb = self.f_orb[circ_stat]
             h_0_2 = self.get_h_0_n(2, which_sources=circ_stat).flatten()
@@ -754,26 +1747,32 @@ class Source():
                                                        t_obs=t_obs,
                                                        fig=fig, ax=ax,
                                                        show=False,
+                                                       noise_model=self.sc,
                                                        **kwargs)
 
         # plot eccentric and stationary sources
-        ecc_stat = self.get_source_mask(circular=False, stationary=True)
+        ecc_stat = self.get_source_mask(circular=False, stationary=True,
+                                         t_obs=t_obs)
         if ecc_stat.any():
             f_dom = self.f_orb[ecc_stat] * self.max_snr_harmonic[ecc_stat]
             fig, ax = vis.plot_sources_on_sc_ecc_stat(f_dom=f_dom,
                                                       snr=self.snr[ecc_stat],
                                                       snr_cutoff=snr_cutoff,
                                                       t_obs=t_obs, show=show,
-                                                      fig=fig, ax=ax, **kwargs)
+                                                      fig=fig, ax=ax,
+                                                      noise_model=self.sc,
+                                                      **kwargs)
 
         # show warnings for evolving sources
-        circ_evol = self.get_source_mask(circular=True, stationary=False)
+        circ_evol = self.get_source_mask(circular=True, stationary=False,
+                                         t_obs=t_obs)
         if circ_evol.any():
             print("{} circular and evolving".format(len(circ_evol[circ_evol])),
                   "sources detected, plotting not yet implemented for",
                   "evolving sources.")
 
-        ecc_evol = self.get_source_mask(circular=False, stationary=False)
+        ecc_evol = self.get_source_mask(circular=False, stationary=False,
+                                         t_obs=t_obs)
         if ecc_evol.any():
             print("{} eccentric and evolving".format(len(ecc_evol[ecc_evol])),
                   "sources detected, plotting not yet implemented for",
@@ -784,16 +1783,119 @@ class Source():
 
 class Stationary(Source):
     """Subclass for sources that are stationary"""
-
-    def get_snr(self, t_obs=4*u.yr, verbose=False):
-        self.snr = self.get_snr_stationary(t_obs=t_obs, verbose=verbose)
+    __slots__ = []
+
+    def _get_default_snr_settings(self, t_obs, n_step):
+        return self._get_snr_settings("stationary", t_obs)
+
+    def get_snr(self, t_obs=4*u.yr, verbose=False, n_step=None):
+        settings = self._get_default_snr_settings(t_obs, n_step)
+        todo = self._get_dirty_sources(settings)
+        if todo is None or len(todo) > 0:
+            self.get_snr_stationary(t_obs=t_obs, which_sources=todo,
+                                    verbose=verbose)
+        self._set_snr_settings(settings)
+        self._cache_snr_dist(self.snr, t_obs, settings)
         return self.snr
 
 
 class Evolving(Source):
     """Subclass for sources that are evolving"""
+    __slots__ = []
+
+    def _get_default_snr_settings(self, t_obs, n_step):
+        return self._get_snr_settings("evolving", t_obs, n_step)
 
     def get_snr(self, t_obs=4*u.yr, n_step=100, verbose=False):
-        self.snr = self.get_snr_evolving(t_obs=t_obs, n_step=n_step,
-                                         verbose=verbose)
+        settings = self._get_default_snr_settings(t_obs, n_step)
+        todo = self._get_dirty_sources(settings)
+        if todo is None or len(todo) > 0:
+            self.get_snr_evolving(t_obs=t_obs, n_step=n_step,
+                                  which_sources=todo, verbose=verbose)
+        self._set_snr_settings(settings)
+        self._cache_snr_dist(self.snr, t_obs, settings)
         return self.snr
+
+
+def horizon_distance(m_1, m_2, ecc, f_orb=None, a=None, snr_threshold=7,
+                     t_obs=4 * u.yr, n_step=100, verbose=False,
+                     **source_kwargs):
+    """Computes the horizon distance on a grid of binary parameters, for
+    example to make a detectability map
+
+    The parameters are broadcast against each other, so a grid can be built
+    from 1D arrays with ``np.newaxis`` (or with ``np.meshgrid``). Every point
+    of the grid is placed at a reference distance and the SNR of the whole
+    grid is calculated in a single call to
+    :meth:`legwork.source.Source.get_snr`. The horizon distance then follows
+    from the fact that the SNR scales as 1 / dist.
+
+    A binary at distance ``dist`` is detectable if
+    ``dist <= horizon_distance(...)``.
+
+    Parameters
+    ----------
+    m_1 : `float/array`
+        Primary mass. Must have astropy units of mass.
+
+    m_2 : `float/array`
+        Secondary mass. Must have astropy units of mass.
+
+    ecc : `float/array`
+        Initial eccentricity
+
+    f_orb : `float/array`
+        Orbital frequency (either `a` or `f_orb` must be supplied). Must have
+        astropy units of frequency.
+
+    a : `float/array`
+        Semi-major axis (either `a` or `f_orb` must be supplied). Must have
+        astropy units of length.
+
+    snr_threshold : `float/array`
+        SNR required for a detection. If an array is given then the horizon
+        distance is returned for each threshold along the last axes.
+
+    t_obs : `float`
+        Observation duration (default: 4 years)
+
+    n_step : `int`
+        Number of time steps during observation duration
+
+    verbose : `boolean`
+        Whether to print additional information to user
+
+    **source_kwargs
+        Any other arguments for :class:`legwork.source.Source` (e.g.
+        ``gw_lum_tol`` or ``sc_params``)
+
+    Returns
+    -------
+    horizon : `float/array`
+        Horizon distance with shape
+        ``grid_shape + np.shape(snr_threshold)``, where ``grid_shape`` is the
+        broadcast shape of the binary parameters
+
+    Raises
+    ------
+    ValueError
+        If both ``f_orb`` and ``a`` are missing.
+    """
+    if f_orb is None and a is None:
+        raise ValueError("Either `f_orb` or `a` must be specified")
+
+    # broadcast the parameters to the grid and flatten it into sources
+    freq_or_sep = f_orb if f_orb is not None else a
+    m_1, m_2, ecc, freq_or_sep = np.broadcast_arrays(m_1, m_2, ecc,
+                                                     freq_or_sep, subok=True)
+    grid_shape = m_1.shape
+    grid = {"m_1": m_1.ravel(), "m_2": m_2.ravel(), "ecc": ecc.ravel(),
+            "f_orb" if f_orb is not None else "a": freq_or_sep.ravel()}
+
+    # place every binary at the same reference distance
+    dist = np.ones(m_1.size) * u.kpc
+    sources = Source(dist=dist, **grid, **source_kwargs)
+    horizon = sources.get_horizon_distance(snr_threshold=snr_threshold,
+                                           t_obs=t_obs, n_step=n_step,
+                                           verbose=verbose)
+    return horizon.reshape(grid_shape + horizon.shape[1:])
@@ -1,13 +1,16 @@
 """Computes several types of gravitational wave strains"""
 
 import astropy.constants as c
+import astropy.units as u
 from legwork import utils
 import numpy as np
+from numba import jit
 
-__all__ = ['h_0_n', 'h_c_n']
+__all__ = ['h_0_n', 'h_c_n', 'h_0_n_2_sum', 'h_c_n_2_sum']
 
 
-def h_0_n(m_c, f_orb, ecc, n, dist, interpolated_g=None):
+def h_0_n(m_c, f_orb, ecc, n, dist, interpolated_g=None,
+          asymptotic_n=None, out=None):
     """Computes strain amplitude
 
     Computes the dimensionless power of a general binary
@@ -38,63 +41,41 @@ def h_0_n(m_c, f_orb, ecc, n, dist, interpolated_g=None):
         Distance to each binary. Shape should be (x,)
 
     interpolated_g : `function`
-        A function returned by :class:`scipy.interpolate.interp2d` that
+        A function returned by :class:`scipy.interpolate.interp2d` (or a
+        :class:`legwork.tables.TiledGInterpolator`) that
         computes g(n,e) from Peters (1964). The code assumes
         that the function returns the output sorted as with the
         interp2d returned functions (and thus unsorts).
         Default is None and uses exact g(n,e) in this case.
 
+    asymptotic_n : `int`
+        Harmonic at and above which g(n,e) is instead computed with
+        :func:`legwork.utils.peters_g_asymptotic` for the eccentricities at
+        which it is accurate (see :func:`legwork.utils.asymptotic_g_region`).
+        Default is None, which uses ``legwork.utils.ASYMPTOTIC_N`` if
+        ``interpolated_g`` is supplied and otherwise keeps g(n,e) exact for
+        every harmonic.
+
+    out : `float/array`
+        Preallocated array of shape (x, y, z) in which to store the strain
+        (e.g. float32 to halve the memory). Default is None and allocates a
+        new float64 array.
+
     Returns
     -------
     h_0 : `float/array`
-        Strain amplitude. Shape is (x, y, z).
+        Strain amplitude. Shape is (x, y, z). This is ``out`` (without
+        units) if it is supplied.
     """
-    # convert to array if necessary
-    arrayed_args, _ = utils.ensure_array(m_c, f_orb, ecc, n, dist)
-    m_c, f_orb, ecc, n, dist = arrayed_args
-
-    # if one timestep then extend dimensions
-    if f_orb.ndim != 2:
-        f_orb = f_orb[:, np.newaxis]
-    if ecc.ndim != 2:
-        ecc = ecc[:, np.newaxis]
-
-    # extend mass and distance dimensions
-    m_c = m_c[:, np.newaxis]
-    dist = dist[:, np.newaxis]
-
-    # work out strain for n independent part and broadcast to correct shape
-    prefac = (2**(28/3) / 5)**(0.5) * c.G**(5/3) / c.c**4
-    n_independent_part = prefac * m_c**(5/3) * (np.pi * f_orb)**(2/3) / dist
-
-    # check whether to interpolate g(n, e)
-    if interpolated_g is None:
-        # extend harmonic and eccentricity dimensions to full (x, y, z)
-        n = n[np.newaxis, np.newaxis, :]
-        ecc = ecc[..., np.newaxis]
-        n_dependent_part = utils.peters_g(n, ecc)**(1/2) / n
-    else:
-        # flatten array to work nicely interp2d
-        g_vals = interpolated_g(n, ecc.flatten())
-
-        # set negative values from cubic fit to 0.0
-        g_vals[g_vals < 0.0] = 0.0
+    m_c, f_orb, ecc, n, dist = _prepare_args(m_c, f_orb, ecc, n, dist)
+    amp = _h_0_n_independent_part(m_c, f_orb, dist)
+    return _fill_strain(amp=amp, n=n, ecc=ecc, n_power=1,
+                        interpolated_g=interpolated_g,
+                        asymptotic_n=asymptotic_n, out=out)
 
-        # unsort the output array if there is more than one eccentricity
-        if isinstance(ecc, (np.ndarray, list)) and len(ecc) > 1:
-            g_vals = g_vals[np.argsort(ecc.flatten()).argsort()]
 
-        # reshape output to proper dimensions
-        g_vals = g_vals.reshape((*ecc.shape, len(n)))
-
-        n_dependent_part = g_vals**(0.5) / n[np.newaxis, np.newaxis, :]
-
-    h_0 = n_independent_part[..., np.newaxis] * n_dependent_part
-
-    return h_0.decompose()
-
-
-def h_c_n(m_c, f_orb, ecc, n, dist, interpolated_g=None):
+def h_c_n(m_c, f_orb, ecc, n, dist, interpolated_g=None,
+          asymptotic_n=None, out=None):
     """Computes characteristic strain amplitude
 
     Computes the dimensionless characteristic power of a general
@@ -125,17 +106,149 @@ def h_c_n(m_c, f_orb, ecc, n, dist, interpolated_g=None):
         Distance to each binary. Shape should be (x,)
 
     interpolated_g : `function`
-        A function returned by :class:`scipy.interpolate.interp2d` that
+        A function returned by :class:`scipy.interpolate.interp2d` (or a
+        :class:`legwork.tables.TiledGInterpolator`) that
         computes g(n,e) from Peters (1964). The code assumes
         that the function returns the output sorted as with the
         interp2d returned functions (and thus unsorts).
         Default is None and uses exact g(n,e) in this case.
 
+    asymptotic_n : `int`
+        Harmonic at and above which g(n,e) is instead computed with
+        :func:`legwork.utils.peters_g_asymptotic` for the eccentricities at
+        which it is accurate (see :func:`legwork.utils.asymptotic_g_region`).
+        Default is None, which uses ``legwork.utils.ASYMPTOTIC_N`` if
+        ``interpolated_g`` is supplied and otherwise keeps g(n,e) exact for
+        every harmonic.
+
+    out : `float/array`
+        Preallocated array of shape (x, y, z) in which to store the strain
+        (e.g. float32 to halve the memory). Default is None and allocates a
+        new float64 array.
+
     Returns
     -------
     h_c : `float/array`
-        Characteristic strain. Shape is (x, y, z).
+        Characteristic strain. Shape is (x, y, z). This is ``out`` (without
+        units) if it is supplied.
     """
+    m_c, f_orb, ecc, n, dist = _prepare_args(m_c, f_orb, ecc, n, dist)
+    amp = _h_c_n_independent_part(m_c, f_orb, ecc, dist)
+    return _fill_strain(amp=amp, n=n, ecc=ecc, n_power=1/2,
+                        interpolated_g=interpolated_g,
+                        asymptotic_n=asymptotic_n, out=out)
+
+
+def h_0_n_2_sum(m_c, f_orb, ecc, n, dist, interpolated_g=None,
+                asymptotic_n=None, chunk_size=100, out=None):
+    """Computes the squared strain amplitude summed over harmonics
+
+    This is equivalent to ``(h_0_n(...)**2).sum(axis=-1)`` but the harmonics
+    are evaluated in chunks so the full harmonic axis is never stored.
+
+    Parameters
+    ----------
+    m_c : `float/array`
+        Chirp mass of each binary. Shape should be (x,).
+
+    f_orb : `float/array`
+        Orbital frequency of each binary at each timestep.
+        Shape should be (x, y), or (x,) if only one timestep.
+
+    ecc : `float/array`
+        Eccentricity of each binary at each timestep. Shape should be (x, y),
+        or (x,) if only one timestep.
+
+    n : `int/array`
+        Harmonic(s) over which to sum. Either a single int or shape should
+        be (z,)
+
+    dist : `float/array`
+        Distance to each binary. Shape should be (x,)
+
+    interpolated_g : `function`
+        As in :func:`legwork.strain.h_0_n`
+
+    asymptotic_n : `int`
+        As in :func:`legwork.strain.h_0_n`
+
+    chunk_size : `int`
+        Number of harmonics to evaluate at once
+
+    out : `float/array`
+        Preallocated array of shape (x, y) in which to store the sum.
+        Default is None and allocates a new float64 array.
+
+    Returns
+    -------
+    h_0_2_sum : `float/array`
+        Sum of the squared strain amplitude over harmonics. Shape is (x, y).
+        This is ``out`` (without units) if it is supplied.
+    """
+    m_c, f_orb, ecc, n, dist = _prepare_args(m_c, f_orb, ecc, n, dist)
+    amp = _h_0_n_independent_part(m_c, f_orb, dist)
+    return _sum_strain_2(amp=amp, n=n, ecc=ecc, n_power=1,
+                         interpolated_g=interpolated_g,
+                         asymptotic_n=asymptotic_n, chunk_size=chunk_size,
+                         out=out)
+
+
+def h_c_n_2_sum(m_c, f_orb, ecc, n, dist, interpolated_g=None,
+                asymptotic_n=None, chunk_size=100, out=None):
+    """Computes the squared characteristic strain summed over harmonics
+
+    This is equivalent to ``(h_c_n(...)**2).sum(axis=-1)`` but the harmonics
+    are evaluated in chunks so the full harmonic axis is never stored.
+
+    Parameters
+    ----------
+    m_c : `float/array`
+        Chirp mass of each binary. Shape should be (x,).
+
+    f_orb : `float/array`
+        Orbital frequency of each binary at each timestep.
+        Shape should be (x, y), or (x,) if only one timestep.
+
+    ecc : `float/array`
+        Eccentricity of each binary at each timestep. Shape should be (x, y),
+        or (x,) if only one timestep.
+
+    n : `int/array`
+        Harmonic(s) over which to sum. Either a single int or shape should
+        be (z,)
+
+    dist : `float/array`
+        Distance to each binary. Shape should be (x,)
+
+    interpolated_g : `function`
+        As in :func:`legwork.strain.h_c_n`
+
+    asymptotic_n : `int`
+        As in :func:`legwork.strain.h_c_n`
+
+    chunk_size : `int`
+        Number of harmonics to evaluate at once
+
+    out : `float/array`
+        Preallocated array of shape (x, y) in which to store the sum.
+        Default is None and allocates a new float64 array.
+
+    Returns
+    -------
+    h_c_2_sum : `float/array`
+        Sum of the squared characteristic strain over harmonics. Shape is
+        (x, y). This is ``out`` (without units) if it is supplied.
+    """
+    m_c, f_orb, ecc, n, dist = _prepare_args(m_c, f_orb, ecc, n, dist)
+    amp = _h_c_n_independent_part(m_c, f_orb, ecc, dist)
+    return _sum_strain_2(amp=amp, n=n, ecc=ecc, n_power=1/2,
+                         interpolated_g=interpolated_g,
+                         asymptotic_n=asymptotic_n, chunk_size=chunk_size,
+                         out=out)
+
+
+def _prepare_args(m_c, f_orb, ecc, n, dist):
+    """Convert arguments to arrays with dimensions (x, 1) or (x, y)"""
     # convert to array if necessary
     arrayed_args, _ = utils.ensure_array(m_c, f_orb, ecc, n, dist)
     m_c, f_orb, ecc, n, dist = arrayed_args
@@ -150,32 +263,160 @@ def h_c_n(m_c, f_orb, ecc, n, dist, interpolated_g=None):
     m_c = m_c[:, np.newaxis]
     dist = dist[:, np.newaxis]
 
-    # work out strain for n independent part
+    return m_c, f_orb, ecc, n, dist
+
+
+def _h_0_n_independent_part(m_c, f_orb, dist):
+    """Dimensionless n independent part of the strain, shape (x, y)"""
+    prefac = (2**(28/3) / 5)**(0.5) * c.G**(5/3) / c.c**4
+    n_independent_part = prefac * m_c**(5/3) * (np.pi * f_orb)**(2/3) / dist
+    return n_independent_part.decompose().value
+
+
+def _h_c_n_independent_part(m_c, f_orb, ecc, dist):
+    """Dimensionless n independent part of the characteristic strain, shape
+    (x, y)"""
     prefac = (2**(5/3) / (3 * np.pi**(4/3)))**(0.5) * c.G**(5/6) / c.c**(3/2)
     n_independent_part = prefac * m_c**(5/6) / dist * f_orb**(-1/6) \
         / utils.peters_f(ecc)**(0.5)
+    return n_independent_part.decompose().value
+
+
+def _fill_strain(amp, n, ecc, n_power, interpolated_g, asymptotic_n, out):
+    """Compute amp * g(n, e)^(1/2) / n^n_power into ``out`` (or a new
+    array), storing g(n, e) in the same array when the shapes allow it and
+    it is double precision (so that small g(n, e) don't underflow)"""
+    shape = (len(amp), max(amp.shape[1], ecc.shape[1]), len(n))
+    given_out = out is not None
+    if not given_out:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError("`out` must have shape {}".format(shape))
+
+    reuse_out = ecc.shape[1] == shape[1] and out.dtype == np.float64
+    g_vals = _get_g_vals(n=n, ecc=ecc, interpolated_g=interpolated_g,
+                         asymptotic_n=asymptotic_n,
+                         out=out if reuse_out else None)
+    _strain_kernel(amp, g_vals, n.astype(float), n_power, out)
+
+    return out if given_out else u.Quantity(out, u.dimensionless_unscaled,
+                                            copy=False)
+
+
+def _sum_strain_2(amp, n, ecc, n_power, interpolated_g, asymptotic_n,
+                  chunk_size, out):
+    """Compute the sum over n of amp^2 * g(n, e) / n^(2 n_power) into
+    ``out`` (or a new array) one chunk of harmonics at a time, accumulating
+    in double precision whatever the type of ``out``"""
+    shape = (len(amp), max(amp.shape[1], ecc.shape[1]))
+    if out is not None and out.shape != shape:
+        raise ValueError("`out` must have shape {}".format(shape))
+
+    total = np.zeros(shape)
+    for start in range(0, len(n), chunk_size):
+        n_chunk = n[start:start + chunk_size]
+        g_vals = _get_g_vals(n=n_chunk, ecc=ecc,
+                             interpolated_g=interpolated_g,
+                             asymptotic_n=asymptotic_n)
+        _strain_2_sum_kernel(amp, g_vals, n_chunk.astype(float), n_power,
+                             total)
+
+    if out is None:
+        return u.Quantity(total, u.dimensionless_unscaled, copy=False)
+    out[...] = total
+    return out
+
+
+@jit(nopython=True)
+def _strain_kernel(amp, g_vals, n, n_power, out):     # pragma: no cover
+    """Fill out[i, j, k] = amp[i, j] * g_vals[i, j, k]^(1/2) / n[k]^n_power
+    (amp and g_vals may have a single timestep that is broadcast)"""
+    for i in range(out.shape[0]):
+        for j in range(out.shape[1]):
+            amp_ij = amp[i, j if amp.shape[1] > 1 else 0]
+            j_g = j if g_vals.shape[1] > 1 else 0
+            for k in range(out.shape[2]):
+                out[i, j, k] = amp_ij * np.sqrt(g_vals[i, j_g, k]) \
+                    / n[k]**n_power
+
+
+@jit(nopython=True)
+def _strain_2_sum_kernel(amp, g_vals, n, n_power, out):     # pragma: no cover
+    """Add amp[i, j]^2 * sum_k g_vals[i, j, k] / n[k]^(2 n_power) to
+    out[i, j] (amp and g_vals may have a single timestep that is
+    broadcast)"""
+    for i in range(out.shape[0]):
+        for j in range(out.shape[1]):
+            amp_ij = amp[i, j if amp.shape[1] > 1 else 0]
+            j_g = j if g_vals.shape[1] > 1 else 0
+            total = 0.0
+            for k in range(g_vals.shape[2]):
+                total += g_vals[i, j_g, k] / n[k]**(2 * n_power)
+            out[i, j] += amp_ij**2 * total
+
+
+def _get_g_vals(n, ecc, interpolated_g=None, asymptotic_n=None, out=None):
+    """Computes g(n, e) for every eccentricity and harmonic
 
-    # check whether to interpolate g(n, e)
-    if interpolated_g is None:
-        # extend harmonic and eccentricity dimensions to full (x, y, z)
-        n = n[np.newaxis, np.newaxis, :]
-        ecc = ecc[..., np.newaxis]
-        n_dependent_part = (utils.peters_g(n, ecc) / n)**(1/2)
-    else:
-        # flatten array to work nicely interp2d
-        g_vals = interpolated_g(n, ecc.flatten())
+    Parameters
+    ----------
+    n : `int/array`
+        Harmonics. Shape should be (z,).
 
-        # set negative values from cubic fit to 0.0
-        g_vals[g_vals < 0.0] = 0.0
+    ecc : `float/array`
+        Eccentricity of each binary at each timestep. Shape should be (x, y).
 
-        # unsort the output array if there is more than one eccentricity
-        if isinstance(ecc, (np.ndarray, list)) and len(ecc) > 1:
-            g_vals = g_vals[np.argsort(ecc.flatten()).argsort()]
+    interpolated_g : `function`
+        As in :func:`legwork.strain.h_0_n`
 
-        # reshape output to proper dimensions
-        g_vals = g_vals.reshape((*ecc.shape, len(n)))
+    asymptotic_n : `int`
+        As in :func:`legwork.strain.h_0_n`
 
-        n_dependent_part = (g_vals / n[np.newaxis, np.newaxis, :])**(0.5)
+    out : `float/array`
+        Array of shape (x, y, z) in which to store g(n, e). Default is None
+        and allocates a new array.
 
-    h_c = n_independent_part[..., np.newaxis] * n_dependent_part
-    return h_c.decompose()
+    Returns
+    -------
+    g_vals : `float/array`
+        g(n, e). Shape is (x, y, z).
+    """
+    g_vals = np.empty((*ecc.shape, len(n))) if out is None else out
+    if asymptotic_n is None and interpolated_g is not None:
+        asymptotic_n = utils.ASYMPTOTIC_N
+
+    # large harmonics use the asymptotic approximation where it is accurate
+    # and the rest are calculated (for every eccentricity) as usual
+    asymptotic = np.zeros(g_vals.shape).astype(bool) \
+        if asymptotic_n is None else utils.asymptotic_g_region(
+            n[np.newaxis, np.newaxis, :], ecc[..., np.newaxis], asymptotic_n)
+    exact = np.logical_not(asymptotic.all(axis=(0, 1)))
+
+    if exact.any():
+        # check whether to interpolate g(n, e)
+        if interpolated_g is None:
+            # extend harmonic and eccentricity dimensions to full (x, y, z)
+            g_vals[..., exact] = utils.peters_g(
+                n[exact][np.newaxis, np.newaxis, :], ecc[..., np.newaxis])
+        else:
+            # flatten array to work nicely interp2d
+            interp_vals = interpolated_g(n[exact], ecc.flatten())
+
+            # set negative values from cubic fit to 0.0
+            interp_vals[interp_vals < 0.0] = 0.0
+
+            # unsort the output array if there is more than one eccentricity
+            if isinstance(ecc, (np.ndarray, list)) and len(ecc) > 1:
+                interp_vals = interp_vals[np.argsort(ecc.flatten()).argsort()]
+
+            # reshape output to proper dimensions
+            g_vals[..., exact] = interp_vals.reshape((*ecc.shape,
+                                                      exact.sum()))
+
+    if asymptotic.any():
+        n_full, ecc_full = np.broadcast_arrays(
+            n[np.newaxis, np.newaxis, :], ecc[..., np.newaxis])
+        g_vals[asymptotic] = utils.peters_g_asymptotic(n_full[asymptotic],
+                                                       ecc_full[asymptotic])
+
+    return g_vals
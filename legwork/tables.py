@@ -0,0 +1,398 @@
+"""Functions for building, storing and reading the pre-computed g(n, e)
+tables"""
+
+import numpy as np
+import hashlib
+import os
+from importlib import resources
+from schwimmbad import MultiPool
+
+from legwork import utils
+
+__all__ = ['build_g_grid', 'build_g_tiles', 'build_harmonics',
+           'verify_harmonics', 'save_g_tiles', 'load_g_tiles',
+           'TiledGInterpolator']
+
+G_TILES_FILE = "peters_g_tiles.npy"
+G_TILES_INFO_FILE = "peters_g_tiles_info.npz"
+HARMONICS_FILE = "harmonics.npz"
+
+# increment whenever the layout or contents of the tables change
+TABLE_VERSION = 1
+
+
+def _sha256(data):
+    """Compute the SHA-256 checksum of an array or the contents of a file"""
+    checksum = hashlib.sha256()
+    if isinstance(data, np.ndarray):
+        checksum.update(np.ascontiguousarray(data).tobytes())
+    else:
+        with open(data, "rb") as f:
+            for block in iter(lambda: f.read(2**20), b""):
+                checksum.update(block)
+    return checksum.hexdigest()
+
+
+def _package_path(resource):
+    """Find the path to a table in the legwork package directory"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        resource)
+
+
+def _g_rows(args):
+    """Compute a block of rows of the g(n, e) grid (for use with pools)"""
+    n_max, e = args
+    return np.nan_to_num(utils.peters_g_sweep(n_max, e))
+
+
+def build_g_grid(e_range, n_max, n_proc=1, rows_per_chunk=10):
+    """Compute g(n, e) for every harmonic up to ``n_max`` and each
+    eccentricity
+
+    Rows of the grid are computed in vectorised chunks with
+    :func:`legwork.utils.peters_g_sweep`, which are optionally split over
+    several processors. Undefined values (at e = 1) are set to zero.
+
+    Parameters
+    ----------
+    e_range : `float/array`
+        Eccentricities of the grid
+
+    n_max : `int`
+        Highest harmonic of the grid
+
+    n_proc : `int`
+        Number of processors to split the chunks over
+
+    rows_per_chunk : `int`
+        Number of eccentricities in each chunk
+
+    Returns
+    -------
+    g_grid : `float/array`
+        g(n, e) with shape ``(len(e_range), n_max)``
+    """
+    chunks = [(n_max, e_range[i:i + rows_per_chunk])
+              for i in range(0, len(e_range), rows_per_chunk)]
+    if n_proc > 1:
+        with MultiPool(processes=n_proc) as pool:
+            blocks = list(pool.map(_g_rows, chunks))
+    else:
+        blocks = [_g_rows(chunk) for chunk in chunks]
+    return np.concatenate(blocks, axis=0)
+
+
+def build_g_tiles(path=None, info_path=None, e_lims=(0.0, 1.0),
+                  e_len=1000, n_max=10000, tile_size=100,
+                  dtype=np.float64, n_proc=1):
+    """Build the tiled g(n, e) grid used by
+    :class:`legwork.tables.TiledGInterpolator`
+
+    Parameters
+    ----------
+    path : `str`
+        Path at which to save the tiled grid. Default is None and replaces
+        the grid packaged with legwork.
+
+    info_path : `str`
+        Path at which to save the grid information. Default is None and
+        replaces the information packaged with legwork.
+
+    e_lims : `tuple`
+        Minimum and maximum eccentricity, eccentricities are evenly spaced
+        between these limits
+
+    e_len : `int`
+        Number of eccentricities
+
+    n_max : `int`
+        Highest harmonic of the grid
+
+    tile_size : `int`
+        Number of harmonics in each tile
+
+    dtype : `type`
+        Data type of the stored grid (see
+        :func:`legwork.tables.save_g_tiles`)
+
+    n_proc : `int`
+        Number of processors to split the calculation over
+    """
+    path = _package_path(G_TILES_FILE) if path is None else path
+    info_path = _package_path(G_TILES_INFO_FILE) if info_path is None \
+        else info_path
+
+    e_range = np.linspace(e_lims[0], e_lims[1], e_len)
+    g_grid = build_g_grid(e_range=e_range, n_max=n_max, n_proc=n_proc)
+    save_g_tiles(g_grid, e_lims, path, info_path, tile_size=tile_size,
+                 dtype=dtype)
+
+
+def build_harmonics(path=None, e_lims=(0.0, 0.995), e_len=1000,
+                    n_max=10000, n_proc=1):
+    """Build the table of g(n, e) used by
+    :meth:`legwork.source.Source.create_harmonics_functions`
+
+    Eccentricities are spaced logarithmically in 1 - e to resolve the
+    rapid growth in the number of harmonics required as e -> 1.
+
+    Parameters
+    ----------
+    path : `str`
+        Path at which to save the table. Default is None and replaces the
+        table packaged with legwork.
+
+    e_lims : `tuple`
+        Minimum and maximum eccentricity
+
+    e_len : `int`
+        Number of eccentricities
+
+    n_max : `int`
+        Highest harmonic of the table
+
+    n_proc : `int`
+        Number of processors to split the calculation over
+    """
+    path = _package_path(HARMONICS_FILE) if path is None else path
+
+    e_range = 1 - np.logspace(np.log10(1 - e_lims[0]),
+                              np.log10(1 - e_lims[1]), e_len)
+    g_vals = build_g_grid(e_range=e_range, n_max=n_max, n_proc=n_proc)
+    np.savez(path, e_lims=np.array([e_lims[0], e_lims[1], e_len]),
+             n_max=np.array(n_max), g_vals=g_vals,
+             version=np.array(TABLE_VERSION), sha256=_sha256(g_vals))
+
+
+def verify_harmonics(path=None):
+    """Check the checksum of a table built by
+    :func:`legwork.tables.build_harmonics`
+
+    Parameters
+    ----------
+    path : `str`
+        Path to the table. Default is None and uses the table packaged with
+        legwork.
+
+    Returns
+    -------
+    valid : `bool`
+        Whether the table matches its checksum and the current version.
+        Tables without a checksum are never valid.
+    """
+    path = _package_path(HARMONICS_FILE) if path is None else path
+    with np.load(path) as table:
+        if "sha256" not in table or "version" not in table:
+            return False
+        return int(table["version"]) == TABLE_VERSION \
+            and str(table["sha256"]) == _sha256(table["g_vals"])
+
+
+def save_g_tiles(g_grid, e_lims, path, info_path, tile_size=100,
+                 dtype=np.float64):
+    """Save a grid of g(n, e) values in a tiled, memory-mappable format
+
+    The grid is split into tiles of ``tile_size`` consecutive harmonics and
+    stored with shape ``(n_tiles, n_e, tile_size)`` so that the values for a
+    block of harmonics are contiguous on disk for every eccentricity.
+
+    Parameters
+    ----------
+    g_grid : `float/array`
+        g(n, e) for n = 1, 2, ... with shape ``(n_e, n_max)``
+
+    e_lims : `tuple`
+        Minimum and maximum eccentricity of the grid, eccentricities are
+        evenly spaced between these limits
+
+    path : `str`
+        Path at which to save the tiled grid (a ``.npy`` file)
+
+    info_path : `str`
+        Path at which to save the grid information (a ``.npz`` file)
+
+    tile_size : `int`
+        Number of harmonics in each tile
+
+    dtype : `type`
+        Data type of the stored grid. ``np.float32`` halves the size of the
+        file and introduces a relative error of at most 6e-8 (half of the
+        float32 machine epsilon) on each value, which is negligible
+        compared to the interpolation error in eccentricity.
+    """
+    n_e, n_max = g_grid.shape
+    n_tiles = int(np.ceil(n_max / tile_size))
+
+    # pad the final tile with zeros
+    padded = np.zeros((n_e, n_tiles * tile_size))
+    padded[:, :n_max] = g_grid
+    tiles = padded.reshape(n_e, n_tiles, tile_size).transpose(1, 0, 2)
+
+    np.save(path, np.ascontiguousarray(tiles, dtype=dtype))
+    np.savez(info_path, e_lims=np.array([e_lims[0], e_lims[1], n_e]),
+             n_max=np.array(n_max), tile_size=np.array(tile_size),
+             version=np.array(TABLE_VERSION), sha256=_sha256(path))
+
+
+def load_g_tiles(path=None, info_path=None, verify=False, ret_key=False):
+    """Load a tiled g(n, e) grid as a read-only memory map
+
+    Parameters
+    ----------
+    path : `str`
+        Path to the tiled grid. Default is None and uses the grid packaged
+        with legwork.
+
+    info_path : `str`
+        Path to the grid information. Default is None and uses the
+        information packaged with legwork.
+
+    verify : `bool`
+        Whether to check the grid against its version and checksum (this
+        reads the whole file)
+
+    ret_key : `bool`
+        Whether to also return a key that identifies the contents of the grid
+
+    Returns
+    -------
+    tiles : `np.memmap`
+        Memory mapped grid with shape ``(n_tiles, n_e, tile_size)``
+
+    e_range : `float/array`
+        Eccentricities of the grid
+
+    n_max : `int`
+        Highest harmonic in the grid
+
+    key : `tuple`
+        Version and checksum recorded when the grid was saved, or its path,
+        size and modification time for grids saved without them (only
+        returned if ``ret_key=True``)
+
+    Raises
+    ------
+    ValueError
+        If ``verify`` and the grid doesn't match its version or checksum
+    """
+    if path is None:
+        with resources.path(package="legwork", resource=G_TILES_FILE) as p:
+            path = str(p)
+    if info_path is None:
+        with resources.path(package="legwork",
+                            resource=G_TILES_INFO_FILE) as p:
+            info_path = str(p)
+
+    tiles = np.load(path, mmap_mode="r")
+    with np.load(info_path) as info:
+        e_min, e_max, e_len = info["e_lims"]
+        n_max = int(info["n_max"])
+        if verify and ("sha256" not in info or "version" not in info
+                       or int(info["version"]) != TABLE_VERSION
+                       or str(info["sha256"]) != _sha256(path)):
+            raise ValueError("g(n, e) grid at {} does not match its ".format(
+                path) + "version or checksum, rebuild it with "
+                "`legwork.tables.build_g_tiles`")
+        if "sha256" in info and "version" in info:
+            key = (int(info["version"]), str(info["sha256"]))
+        else:
+            stat = os.stat(path)
+            key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+    e_range = np.linspace(e_min, e_max, int(e_len))
+    if ret_key:
+        return tiles, e_range, n_max, key
+    return tiles, e_range, n_max
+
+
+class TiledGInterpolator():
+    """Interpolator for g(n, e) that reads a tiled grid on demand
+
+    The grid is memory mapped so that only the tiles containing the
+    requested harmonics are read from disk and the pages are shared between
+    all processes through the OS page cache. Values are exact at integer
+    harmonics and interpolated with cubic Lagrange polynomials through the
+    four nearest eccentricities. Harmonics above the top of the grid use
+    :func:`legwork.utils.peters_g_asymptotic` wherever it is accurate (see
+    :func:`legwork.utils.asymptotic_g_region`) and
+    :func:`legwork.utils.peters_g` otherwise.
+
+    Calling the interpolator mimics :class:`scipy.interpolate.interp2d` so it
+    can be used in its place in :mod:`legwork.strain`: the inputs are sorted
+    and the output has shape ``(len(e), len(n))`` (or ``(len(n),)`` for a
+    single eccentricity).
+
+    Parameters
+    ----------
+    path : `str`
+        Path to the tiled grid. Default is None and uses the grid packaged
+        with legwork.
+
+    info_path : `str`
+        Path to the grid information. Default is None and uses the
+        information packaged with legwork.
+
+    Attributes
+    ----------
+    key : `tuple`
+        Key that identifies the contents of the grid (see
+        :func:`legwork.tables.load_g_tiles`), which is shared by every
+        interpolator of the same grid
+    """
+    def __init__(self, path=None, info_path=None):
+        self.tiles, self.e_range, self.n_max, self.key = load_g_tiles(
+            path, info_path, ret_key=True)
+        self.tile_size = self.tiles.shape[2]
+
+    def __call__(self, n, e):
+        n = np.sort(np.atleast_1d(n)).astype(int)
+        e = np.sort(np.atleast_1d(e))
+        g = np.zeros((len(e), len(n)))
+
+        in_grid = n <= self.n_max
+        if in_grid.any():
+            g[:, in_grid] = self._interpolate(n[in_grid], e)
+        if not in_grid.all():
+            n_out, e_out = np.broadcast_arrays(n[~in_grid][np.newaxis, :],
+                                               e[:, np.newaxis])
+            asymptotic = utils.asymptotic_g_region(n_out, e_out)
+            exact = np.logical_not(asymptotic)
+            g_out = np.zeros(n_out.shape)
+            g_out[asymptotic] = utils.peters_g_asymptotic(
+                n_out[asymptotic], e_out[asymptotic])
+            g_out[exact] = utils.peters_g(n_out[exact], e_out[exact])
+            g[:, ~in_grid] = g_out
+
+        return g[0] if len(e) == 1 else g
+
+    def _interpolate(self, n, e):
+        """Cubic interpolation in eccentricity for harmonics in the grid"""
+        e_min, e_max = self.e_range[0], self.e_range[-1]
+        n_e = len(self.e_range)
+        spacing = (e_max - e_min) / (n_e - 1)
+
+        # find the first of the four rows around each eccentricity
+        x = (np.clip(e, e_min, e_max) - e_min) / spacing
+        first_row = np.clip(np.floor(x).astype(int) - 1, 0, n_e - 4)
+        t = x - first_row
+
+        # Lagrange weights for nodes at t = 0, 1, 2, 3
+        weights = np.stack((-(t - 1) * (t - 2) * (t - 3) / 6,
+                            t * (t - 2) * (t - 3) / 2,
+                            -t * (t - 1) * (t - 3) / 2,
+                            t * (t - 1) * (t - 2) / 6), axis=1)
+
+        # only read the rows and harmonics that are needed
+        rows = np.unique(first_row[:, np.newaxis] + np.arange(4))
+        tile_index, offset = np.divmod(n - 1, self.tile_size)
+        g_rows = np.zeros((len(rows), len(n)))
+        for tile in np.unique(tile_index):
+            cols = tile_index == tile
+            g_rows[:, cols] = self.tiles[tile][rows][:, offset[cols]]
+
+        # combine the rows with the weights
+        row_lookup = np.searchsorted(rows, first_row)
+        g = np.zeros((len(e), len(n)))
+        for i in range(4):
+            g += weights[:, i, np.newaxis] * g_rows[row_lookup + i]
+        return g
@@ -208,3 +208,92 @@ class Test(unittest.TestCase):
                                                   c_0))))
 
         self.assertTrue(np.allclose(ecc_evol, ecc_pool, equal_nan=True))
+
+    def test_backwards_evolution(self):
+        """checks that binaries can be evolved backwards in time"""
+        n_values = 50
+        m_1 = np.random.uniform(5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(5, 10, n_values) * u.Msun
+        f_orb = 10**(np.random.uniform(-4, -3, n_values)) * u.Hz
+        ecc = np.random.uniform(0.05, 0.5, n_values)
+        a_i = utils.get_a_from_f_orb(f_orb, m_1, m_2)
+
+        # circular binaries should return to where they started
+        t_back = 1 * u.Myr
+        f_orb_back = evol.evol_circ(t_evol=-t_back, m_1=m_1, m_2=m_2,
+                                    f_orb_i=f_orb)[:, -1]
+        self.assertTrue(np.all(f_orb_back < f_orb))
+        f_orb_forward = evol.evol_circ(t_evol=t_back, m_1=m_1, m_2=m_2,
+                                       f_orb_i=f_orb_back)[:, -1]
+        self.assertTrue(np.allclose(f_orb_forward, f_orb))
+
+        # eccentric binaries should take exactly t_back longer to merge
+        t_merge = evol.get_t_merge_ecc(ecc_i=ecc, a_i=a_i, m_1=m_1, m_2=m_2)
+        t_back = 10 * t_merge
+        ecc_back, a_back = evol.evol_ecc(ecc_i=ecc, t_evol=-t_back, n_step=10,
+                                         m_1=m_1, m_2=m_2, f_orb_i=f_orb,
+                                         output_vars=["ecc", "a"])
+        self.assertTrue(np.all(np.diff(ecc_back, axis=1) > 0.0))
+        self.assertTrue(np.all(ecc_back < 1.0))
+
+        t_merge_back = evol.get_t_merge_ecc(ecc_i=ecc_back[:, -1],
+                                            a_i=a_back[:, -1],
+                                            m_1=m_1, m_2=m_2)
+        self.assertTrue(np.allclose(t_merge_back - t_merge, t_back,
+                                    rtol=1e-4))
+
+    def test_evolve_f_orb_ecc(self):
+        """checks that the tabulated eccentric frequency evolution matches the
+        full integration and is never above the circular approximation"""
+        n_values = 50
+        m_1 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        m_c = utils.chirp_mass(m_1, m_2)
+        f_orb = 10**(np.random.uniform(-4, -3, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.9, n_values)
+        t_evol = 4 * u.yr
+
+        f_orb_tab = evol.evolve_f_orb_ecc(f_orb_i=f_orb, m_c=m_c,
+                                          t_evol=t_evol, ecc_i=ecc)
+        f_orb_circ = evol.evolve_f_orb_circ(f_orb_i=f_orb, m_c=m_c,
+                                            t_evol=t_evol, ecc_i=ecc)
+        f_orb_ode = evol.evol_ecc(ecc_i=ecc, m_1=m_1, m_2=m_2, f_orb_i=f_orb,
+                                  timesteps=np.array([0, 4]) * u.yr,
+                                  output_vars="f_orb")[:, -1]
+
+        # allow for rounding when the frequency barely changes
+        self.assertTrue(np.all(f_orb_tab - f_orb
+                               <= (f_orb_circ - f_orb) * (1 + 1e-8)))
+        self.assertTrue(np.allclose(f_orb_tab - f_orb, f_orb_ode - f_orb,
+                                    rtol=1e-3))
+
+        # circular binaries should match exactly
+        f_orb_tab = evol.evolve_f_orb_ecc(f_orb_i=f_orb, m_c=m_c,
+                                          t_evol=t_evol,
+                                          ecc_i=np.zeros(n_values))
+        f_orb_circ = evol.evolve_f_orb_circ(f_orb_i=f_orb, m_c=m_c,
+                                            t_evol=t_evol)
+        self.assertTrue(np.all(f_orb_tab == f_orb_circ))
+
+    def test_t_to_f_orb(self):
+        """checks that the time to reach a frequency inverts the frequency
+        evolution"""
+        n_values = 50
+        m_1 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        m_c = utils.chirp_mass(m_1, m_2)
+        f_orb = 10**(np.random.uniform(-4, -3, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.9, n_values)
+        ecc[:10] = 0.0
+        t_evol = 10**(np.random.uniform(-1, 2, n_values)) * u.yr
+
+        f_orb_f = evol.evolve_f_orb_ecc(f_orb_i=f_orb, m_c=m_c,
+                                        t_evol=t_evol, ecc_i=ecc)
+        t_to_f = evol.get_t_to_f_orb(f_orb_i=f_orb, f_orb_f=f_orb_f,
+                                     m_c=m_c, ecc_i=ecc)
+        self.assertTrue(np.allclose(t_to_f, t_evol, rtol=1e-5))
+
+        # binaries already above the frequency take no time
+        t_to_f = evol.get_t_to_f_orb(f_orb_i=f_orb, f_orb_f=1e-5 * u.Hz,
+                                     m_c=m_c, ecc_i=ecc)
+        self.assertTrue(np.all(t_to_f == 0.0))
@@ -1,9 +1,23 @@
 import numpy as np
 import legwork.lisa as lisa
 import unittest
+import tempfile
+import os
+import io
+import contextlib
 from astropy import units as u
 
 
+class ScaledNoise(lisa.NoiseModel):
+    """Noise model with an array parameter for testing the registry"""
+    def __init__(self, scale, **kwargs):
+        super().__init__(**kwargs)
+        self.scale = scale
+
+    def exact_psd(self, f):
+        return self.scale.max() * f**-2
+
+
 class Test(unittest.TestCase):
     """Tests that the code is functioning properly"""
 
@@ -51,3 +65,112 @@ class Test(unittest.TestCase):
             above = noise > regular
             close = np.isclose(noise, regular, atol=1e-39)
             self.assertTrue(np.logical_or(above, close).all())
+
+    def test_noise_models(self):
+        """check that the noise models match their exact curves and that the
+        registry reuses instances"""
+        frequencies = np.logspace(-5, -1, 1000) * u.Hz
+
+        model = lisa.get_noise_model("lisa", t_obs=2 * u.yr)
+        self.assertTrue(model is lisa.get_noise_model("lisa", t_obs=2 * u.yr))
+        exact = lisa.power_spectral_density(frequencies, t_obs=2 * u.yr)
+        self.assertTrue(np.allclose(model(frequencies), exact, rtol=1e-4))
+        self.assertEqual(model.t_obs, 2 * u.yr)
+        self.assertTrue(model.with_t_obs(2 * u.yr) is model)
+        self.assertTrue(model.with_t_obs(1 * u.yr)
+                        is lisa.get_noise_model("lisa", t_obs=1 * u.yr))
+
+        # outside of the band the noise is huge
+        outside = model([1e-8, 3] * u.Hz)
+        self.assertTrue(np.all(outside.value == lisa.HUGE_NOISE))
+
+        tianqin = lisa.get_noise_model("tianqin")
+        self.assertTrue(np.allclose(tianqin(frequencies).value,
+                                    tianqin.exact_psd(frequencies.value),
+                                    rtol=1e-4))
+
+        # tabulated curves are memory mapped and interpolated
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "psd.npy")
+            np.save(path, np.vstack((frequencies.value, exact.value)))
+            tabulated = lisa.get_noise_model("tabulated", path=path)
+            self.assertTrue(isinstance(tabulated._table, np.memmap))
+            self.assertTrue(np.allclose(tabulated(frequencies), exact))
+
+            # rewriting the file gives a new model
+            np.save(path, np.vstack((frequencies.value, 2 * exact.value)))
+            rewritten = lisa.get_noise_model("tabulated", path=path)
+            self.assertTrue(np.allclose(rewritten(frequencies), 2 * exact))
+
+            np.save(path, np.ones((3, 10)))
+            self.assertRaises(ValueError, lisa.TabulatedNoise, path)
+
+        # parameters are compared by value even for large arrays
+        lisa.register_noise_model("scaled", ScaledNoise)
+        scale = np.ones(5000)
+        first = lisa.get_noise_model("scaled", scale=scale)
+        self.assertTrue(first is lisa.get_noise_model("scaled",
+                                                      scale=scale.copy()))
+        scale[2500] = 2.0
+        self.assertTrue(first is not lisa.get_noise_model("scaled",
+                                                          scale=scale))
+
+        # only the most recently used models are kept
+        for t_obs in np.linspace(1, 2, 2 * lisa._NOISE_MODEL_CACHE_SIZE):
+            lisa.get_noise_model("lisa", t_obs=t_obs * u.yr)
+        self.assertTrue(len(lisa._NOISE_MODEL_CACHE)
+                        <= lisa._NOISE_MODEL_CACHE_SIZE)
+
+        self.assertRaises(ValueError, lisa.get_noise_model, "not a model")
+        self.assertRaises(ValueError, lisa.register_noise_model, "bad", dict)
+
+    def test_population_confusion_noise(self):
+        """check that the confusion noise from a population is sensible and
+        only leaves behind unresolved sources"""
+        n_values = 20000
+        m_c = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        f_orb = 10**(np.random.uniform(-4, -2.5, n_values)) * u.Hz
+        ecc = np.zeros(n_values)
+        dist = np.random.uniform(1, 20, n_values) * u.kpc
+        instrument = lisa.get_noise_model("lisa",
+                                          include_confusion_noise=False)
+
+        model, resolved = lisa.population_confusion_noise(
+            m_c=m_c, f_orb=f_orb, ecc=ecc, dist=dist, smoothing_bins=100,
+            ret_resolved=True)
+        self.assertTrue(resolved.any() and not resolved.all())
+        self.assertEqual(model.t_obs, 4 * u.yr)
+
+        # confusion noise only adds to the instrument noise
+        frequencies = np.logspace(-6, 0, 1000) * u.Hz
+        self.assertTrue(np.all(model(frequencies)
+                               >= instrument(frequencies) * (1 - 1e-6)))
+
+        # streaming in chunks doesn't change anything
+        chunked, chunked_resolved = lisa.population_confusion_noise(
+            m_c=m_c, f_orb=f_orb, ecc=ecc, dist=dist, smoothing_bins=100,
+            ret_resolved=True, chunk_size=3000)
+        self.assertTrue(np.all(resolved == chunked_resolved))
+        self.assertTrue(np.allclose(model(frequencies), chunked(frequencies)))
+
+        # the confusion noise reaches the edges of the bins
+        f_lo, f_hi = 2e-4 * u.Hz, 2.2e-4 * u.Hz
+        f_edge = np.random.uniform(f_lo.value, f_hi.value, 5000) * u.Hz / 2
+        edge = lisa.population_confusion_noise(
+            m_c=m_c[:5000], f_orb=f_edge, ecc=ecc[:5000], dist=dist[:5000],
+            f_min=f_lo, f_max=f_hi, smoothing_bins=100)
+        f_grid, psd = edge.get_grid()
+        in_bins = np.logical_and(f_grid >= f_lo, f_grid <= f_hi)
+        self.assertTrue(np.all(psd[in_bins] > instrument(f_grid[in_bins])))
+
+        # failing to converge gives a warning
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            lisa.population_confusion_noise(m_c=m_c, f_orb=f_orb, ecc=ecc,
+                                            dist=dist, max_iter=1)
+        self.assertTrue("Warning" in output.getvalue())
+        self.assertRaises(ValueError, lisa.population_confusion_noise,
+                          m_c=m_c, f_orb=f_orb, ecc=ecc, dist=dist,
+                          max_iter=0)
+
+        self.assertRaises(ValueError, lisa.TabulatedNoise)
@@ -1,5 +1,7 @@
 import numpy as np
 import legwork.snr as snr
+import legwork.strain as strain
+import legwork.lisa as lisa
 import legwork.utils as utils
 import unittest
 
@@ -46,3 +48,140 @@ class Test(unittest.TestCase):
                                        t_obs=t_obs, harmonics_required=10)
 
         self.assertTrue(np.allclose(snr_circ, snr_ecc, atol=1e-1, rtol=1e-2))
+
+    def test_out_of_band_evolving(self):
+        """check that evolving sources that start above the LISA band have
+        no SNR"""
+        n_values = 10
+        m_1 = np.random.uniform(5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(5, 10, n_values) * u.Msun
+        dist = np.random.uniform(0, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(0.5, 1, n_values)) * u.Hz
+        ecc = np.random.uniform(0.1, 0.15, n_values)
+        t_obs = 4 * u.yr
+
+        snr_circ = snr.snr_circ_evolving(m_1=m_1, m_2=m_2, f_orb_i=f_orb,
+                                         dist=dist, t_obs=t_obs, n_step=100)
+        snr_ecc = snr.snr_ecc_evolving(m_1=m_1, m_2=m_2, ecc=ecc,
+                                       f_orb_i=f_orb, dist=dist, n_step=100,
+                                       t_obs=t_obs, harmonics_required=10)
+
+        self.assertTrue(np.all(snr_circ == 0.0))
+        self.assertTrue(np.all(snr_ecc == 0.0))
+
+    def test_harmonic_window(self):
+        """check that pruning harmonics outside of the window doesn't change
+        the eccentric stationary snr"""
+        n_values = 500
+        m_c = np.random.uniform(0, 10, n_values) * u.Msun
+        dist = np.random.uniform(0, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-6, -1, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.9, n_values)
+        t_obs = 4 * u.yr
+
+        n_lo, n_hi = snr.get_harmonic_window(m_c=m_c, f_orb=f_orb, ecc=ecc,
+                                             dist=dist, t_obs=t_obs,
+                                             harmonics_required=100)
+        self.assertTrue(np.all(n_lo >= 1))
+        self.assertTrue(np.all(n_hi <= 100))
+        self.assertTrue(np.all(n_hi * f_orb <= 2 * u.Hz))
+
+        snr_pruned = snr.snr_ecc_stationary(m_c=m_c, f_orb=f_orb, ecc=ecc,
+                                            dist=dist, t_obs=t_obs,
+                                            harmonics_required=100)
+        snr_band = snr.snr_ecc_stationary(m_c=m_c, f_orb=f_orb, ecc=ecc,
+                                          dist=dist, t_obs=t_obs,
+                                          harmonics_required=100, snr_tol=0)
+        self.assertTrue(np.allclose(snr_pruned, snr_band, rtol=1e-4))
+
+        # compare against the plain sum over every harmonic without a window
+        noise = lisa.get_noise_model("lisa", t_obs=t_obs)
+        n_range = np.arange(1, 101)
+        h_0_n_2 = strain.h_0_n(m_c=m_c, f_orb=f_orb, ecc=ecc, n=n_range,
+                               dist=dist)[:, 0, :]**2
+        f_n = n_range[np.newaxis, :] * f_orb[:, np.newaxis]
+        snr_full = np.sqrt(np.sum((h_0_n_2 * t_obs / noise(f_n)).decompose()
+                                  .value, axis=1))
+        snr_pruned = snr.snr_ecc_stationary(m_c=m_c, f_orb=f_orb, ecc=ecc,
+                                            dist=dist, t_obs=t_obs,
+                                            harmonics_required=100,
+                                            interpolated_sc=noise)
+        self.assertTrue(np.allclose(snr_pruned, snr_full, rtol=1e-4))
+        self.assertTrue(np.all(snr_pruned <= snr_full * (1 + 1e-12)))
+
+    def test_harmonic_snr_2(self):
+        """check that the sparse per harmonic snr matches the total snr"""
+        n_values = 50
+        m_1 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        m_c = utils.chirp_mass(m_1, m_2)
+        dist = np.random.uniform(1, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-5, -3, n_values)) * u.Hz
+        ecc = np.random.uniform(0.1, 0.6, n_values)
+        t_obs = 4 * u.yr
+
+        snr_stat, max_harm, (offsets, harms, snr_2) = \
+            snr.snr_ecc_stationary(m_c=m_c, f_orb=f_orb, ecc=ecc, dist=dist,
+                                   t_obs=t_obs, harmonics_required=50,
+                                   ret_max_snr_harmonic=True,
+                                   ret_harmonic_snr_2=True,
+                                   harmonic_snr_2_tol=0.0)
+        self.assertEqual(len(offsets), n_values + 1)
+        sources = np.repeat(np.arange(n_values), np.diff(offsets))
+        self.assertTrue(np.allclose(np.bincount(sources, weights=snr_2,
+                                                minlength=n_values),
+                                    snr_stat.value**2))
+        for i in range(n_values):
+            self.assertTrue(max_harm[i]
+                            in harms[offsets[i]:offsets[i + 1]])
+
+        snr_evol, (offsets, harms, snr_2) = \
+            snr.snr_ecc_evolving(m_1=m_1, m_2=m_2, f_orb_i=f_orb, dist=dist,
+                                 ecc=ecc, harmonics_required=50, t_obs=t_obs,
+                                 n_step=50, ret_harmonic_snr_2=True,
+                                 harmonic_snr_2_tol=1e-2)
+        sources = np.repeat(np.arange(n_values), np.diff(offsets))
+        per_source = np.bincount(sources, weights=snr_2, minlength=n_values)
+        self.assertTrue(np.all(per_source <= snr_evol**2 * (1 + 1e-10)))
+        self.assertTrue(np.all(per_source >= 0.5 * snr_evol**2))
+        self.assertTrue(np.all(np.lexsort((harms, sources))
+                               == np.arange(len(harms))))
+
+    def test_multiple_t_obs(self):
+        """check that the snr for several observation times matches
+        calculating each separately"""
+        n_values = 20
+        m_1 = np.random.uniform(5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(5, 10, n_values) * u.Msun
+        m_c = utils.chirp_mass(m_1, m_2)
+        dist = np.random.uniform(1, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-2.5, -2, n_values)) * u.Hz
+        ecc = np.random.uniform(0.1, 0.5, n_values)
+        t_obs = [1, 2, 4] * u.yr
+
+        snr_stat = snr.snr_ecc_stationary(m_c=m_c, f_orb=f_orb, ecc=ecc,
+                                          dist=dist, t_obs=t_obs,
+                                          harmonics_required=50)
+        snr_evol = snr.snr_ecc_evolving(m_1=m_1, m_2=m_2, f_orb_i=f_orb,
+                                        dist=dist, ecc=ecc, t_obs=t_obs,
+                                        harmonics_required=50, n_step=100)
+        snr_circ = snr.snr_circ_evolving(m_1=m_1, m_2=m_2, f_orb_i=f_orb,
+                                         dist=dist, t_obs=t_obs, n_step=100)
+        for i, t in enumerate(t_obs):
+            self.assertTrue(np.allclose(snr_stat[:, i], snr.snr_ecc_stationary(
+                m_c=m_c, f_orb=f_orb, ecc=ecc, dist=dist, t_obs=t,
+                harmonics_required=50)))
+
+            # shorter durations reuse the timesteps of the longest
+            n_step = 100 if i == len(t_obs) - 1 else 1000
+            self.assertTrue(np.allclose(snr_evol[:, i], snr.snr_ecc_evolving(
+                m_1=m_1, m_2=m_2, f_orb_i=f_orb, dist=dist, ecc=ecc, t_obs=t,
+                harmonics_required=50, n_step=n_step), rtol=1e-3))
+            self.assertTrue(np.allclose(snr_circ[:, i], snr.snr_circ_evolving(
+                m_1=m_1, m_2=m_2, f_orb_i=f_orb, dist=dist, t_obs=t,
+                n_step=n_step), rtol=1e-3))
+
+        self.assertRaises(ValueError, snr.snr_ecc_stationary, m_c=m_c,
+                          f_orb=f_orb, ecc=ecc, dist=dist, t_obs=t_obs,
+                          harmonics_required=50, ret_harmonic_snr_2=True)
+
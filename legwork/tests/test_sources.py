@@ -3,6 +3,7 @@ import legwork.snr as snr
 import legwork.source as source
 import legwork.strain as strain
 import legwork.utils as utils
+import legwork.evol as evol
 import unittest
 
 from astropy import units as u
@@ -44,6 +45,13 @@ class Test(unittest.TestCase):
 
         self.assertTrue(np.allclose(snr_direct, snr_source))
 
+        # the harmonics used by Source contain the SNR within the tolerance
+        snr_all = snr.snr_ecc_stationary(m_c=m_c, f_orb=f_orb, ecc=ecc,
+                                         dist=dist, t_obs=t_obs,
+                                         harmonics_required=100, snr_tol=0)
+        self.assertTrue(np.all(snr_source**2
+                               >= (1 - sources._gw_lum_tol) * snr_all**2))
+
     def test_source_snr_multi(self):
         """check that source calculates snr in correct way"""
 
@@ -84,13 +92,17 @@ class Test(unittest.TestCase):
         true_strain = strain.h_0_n(m_c=m_c, f_orb=f_orb, ecc=ecc,
                                    n=[1, 2, 3], dist=dist)[:, 0, :]
 
-        self.assertTrue(np.all(source_strain == true_strain))
+        # parameters are stored in SI units so allow for rounding
+        self.assertTrue(np.allclose(source_strain, true_strain,
+                                    rtol=1e-12, atol=0))
 
         source_char_strain = sources.get_h_c_n([1, 2, 3])
         true_char_strain = strain.h_c_n(m_c=m_c, f_orb=f_orb, ecc=ecc,
                                         n=[1, 2, 3], dist=dist)[:, 0, :]
 
-        self.assertTrue(np.all(source_char_strain == true_char_strain))
+        # parameters are stored in SI units so allow for rounding
+        self.assertTrue(np.allclose(source_char_strain, true_char_strain,
+                                    rtol=1e-12, atol=0))
 
     def test_stationary_subclass(self):
         # create random (circular/stationary) binaries
@@ -291,3 +303,645 @@ class Test(unittest.TestCase):
         except ValueError:
             no_worries = False
         self.assertFalse(no_worries)
+
+    def test_snapshots(self):
+        """checks that incrementally advancing sources matches evolving them
+        in one go"""
+        n_values = 20
+        m_1 = np.random.uniform(5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(5, 10, n_values) * u.Msun
+        dist = np.random.uniform(0, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-4, -3, n_values)) * u.Hz
+        ecc = np.random.uniform(0.05, 0.5, n_values)
+        ecc[::2] = 0.0
+
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb,
+                                ecc=ecc, dist=dist, interpolate_g=False)
+        snr = sources.get_snr()
+        settings = sources._get_snr_settings("source", 4 * u.yr, 100)
+        generation = sources._table.generation
+
+        epochs = np.linspace(0.5, 10, 20) * u.yr
+        e_snaps, f_snaps = sources.get_snapshots(epochs)
+        self.assertTrue(e_snaps.shape == (n_values, len(epochs)))
+
+        # sources are restored to their initial state by default
+        self.assertTrue(np.all(sources.f_orb == f_orb))
+        self.assertTrue(np.all(sources.snr == snr))
+        self.assertTrue(sources._table.generation == generation)
+        self.assertTrue(len(sources._get_dirty_sources(settings)) == 0)
+
+        timesteps = np.concatenate(([0.0], epochs.value)) * u.yr
+        f_circ = evol.evol_circ(timesteps=timesteps, m_1=m_1[::2],
+                                m_2=m_2[::2], f_orb_i=f_orb[::2])
+        e_ecc, f_ecc = evol.evol_ecc(ecc_i=ecc[1::2], timesteps=timesteps,
+                                     m_1=m_1[1::2], m_2=m_2[1::2],
+                                     f_orb_i=f_orb[1::2])
+
+        self.assertTrue(np.allclose(f_snaps[::2], f_circ[:, 1:]))
+        self.assertTrue(np.allclose(f_snaps[1::2], f_ecc[:, 1:], rtol=1e-4))
+        self.assertTrue(np.allclose(e_snaps[1::2], e_ecc[:, 1:], atol=1e-5))
+
+        # advancing in place only marks the sources that changed
+        sources[:5].advance(epochs[-1])
+        self.assertTrue(np.array_equal(sources._get_dirty_sources(settings),
+                                       np.arange(5)))
+        sources[5:].advance(epochs[-1])
+        self.assertTrue(np.allclose(sources.f_orb, f_snaps[:, -1]))
+        self.assertTrue(np.all(sources.snr == snr))
+        advanced = source.Source(m_1=m_1, m_2=m_2, f_orb=sources.f_orb,
+                                 ecc=sources.ecc, dist=dist,
+                                 interpolate_g=False)
+        self.assertTrue(np.allclose(sources.get_snr(), advanced.get_snr()))
+
+        # advancing backwards should recover the initial state
+        sources.advance(-epochs[-1])
+        self.assertTrue(np.allclose(sources.f_orb, f_orb, rtol=1e-4))
+        self.assertTrue(np.allclose(sources.ecc, ecc, atol=1e-5))
+
+    def test_snr_threshold(self):
+        """checks that the snr upper bound holds and that sources below the
+        threshold are skipped"""
+        n_values = 200
+        m_1 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        dist = 10**(np.random.uniform(-1, 2, n_values)) * u.kpc
+        f_orb = 10**(np.random.uniform(-5, -2.5, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.6, n_values)
+        ecc[::3] = 0.0
+
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb,
+                                ecc=ecc, dist=dist, interpolate_g=False)
+        snr_full = sources.get_snr()
+        snr_bound = sources.get_snr_upper_bound()
+        self.assertTrue(np.all(snr_bound >= snr_full))
+
+        snr_threshold = np.median(snr_full)
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb,
+                                ecc=ecc, dist=dist, interpolate_g=False)
+        snr_pruned = sources.get_snr(snr_threshold=snr_threshold)
+        pruned = np.isnan(snr_pruned)
+        self.assertTrue(pruned.any())
+        self.assertTrue(np.all(snr_full[pruned] < snr_threshold))
+        self.assertTrue(np.allclose(snr_pruned[~pruned], snr_full[~pruned]))
+        self.assertTrue(np.all(sources.max_snr_harmonic[pruned] == 0))
+
+        # a higher threshold keeps the skipped sources, a lower one doesn't
+        settings = sources._get_snr_settings("source", 4 * u.yr, 100)
+        self.assertTrue(len(sources._get_dirty_sources(
+            settings, 2 * snr_threshold)) == 0)
+        self.assertTrue(np.array_equal(sources._get_dirty_sources(settings),
+                                       np.flatnonzero(pruned)))
+
+        # distances and horizons calculate the skipped sources
+        horizon = sources.get_horizon_distance()
+        self.assertTrue(np.allclose(horizon, (snr_full * dist / 7).to(u.kpc)))
+        self.assertTrue(np.allclose(sources.snr, snr_full))
+
+        exact = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                              dist=dist, interpolate_sc=False)
+        self.assertRaises(ValueError, exact.get_snr, snr_threshold=7)
+
+    def test_harmonics_used(self):
+        """checks that the snrs from Source are within the tolerance of using
+        every harmonic"""
+        n_values = 20
+        m_1 = np.random.uniform(5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(5, 10, n_values) * u.Msun
+        dist = np.random.uniform(0, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-4, -3, n_values)) * u.Hz
+        ecc = np.random.uniform(0.5, 0.95, n_values)
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist, interpolate_g=False)
+        snr_full = snr.snr_ecc_evolving(m_1=m_1, m_2=m_2, f_orb_i=f_orb,
+                                        dist=dist, ecc=ecc,
+                                        harmonics_required=1000,
+                                        t_obs=4 * u.yr, n_step=10)
+
+        # Source keeps SNR^2 within gw_lum_tol of using every harmonic
+        stationary = sources.get_source_mask(circular=None, stationary=True)
+        snr_full[stationary] = snr.snr_ecc_stationary(
+            m_c=sources.m_c[stationary], f_orb=f_orb[stationary],
+            ecc=ecc[stationary], dist=dist[stationary], t_obs=4 * u.yr,
+            harmonics_required=1000, snr_tol=0)
+        snr_source = sources.get_snr(n_step=10)
+        self.assertTrue(np.all(snr_source**2
+                               >= (1 - sources._gw_lum_tol) * snr_full**2))
+        self.assertTrue(np.all(snr_source <= snr_full * (1 + 1e-6)))
+
+    def test_horizon_distance(self):
+        """check that sources at the horizon distance have the threshold snr"""
+        m_1 = np.linspace(1, 10, 4)[:, np.newaxis, np.newaxis] * u.Msun
+        m_2 = np.linspace(1, 10, 3)[np.newaxis, :, np.newaxis] * u.Msun
+        f_orb = np.logspace(-5, -2, 5)[np.newaxis, np.newaxis, :] * u.Hz
+        ecc = 0.3
+
+        horizon = source.horizon_distance(m_1=m_1, m_2=m_2, ecc=ecc,
+                                          f_orb=f_orb, snr_threshold=[7, 12])
+        self.assertEqual(horizon.shape, (4, 3, 5, 2))
+        self.assertTrue(np.allclose(horizon[..., 0] * 7, horizon[..., 1] * 12))
+
+        m_1, m_2, f_orb = np.broadcast_arrays(m_1, m_2, f_orb, subok=True)
+        sources = source.Source(m_1=m_1.ravel(), m_2=m_2.ravel(),
+                                f_orb=f_orb.ravel(),
+                                ecc=np.repeat(ecc, m_1.size),
+                                dist=horizon[..., 0].ravel())
+        self.assertTrue(np.allclose(sources.get_snr(), 7))
+
+    def test_snr_for_distances(self):
+        """check that resampling distances matches recalculating the snr"""
+        n_values = 50
+        m_1 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        dist = np.random.uniform(1, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-5, -2, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.5, n_values)
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+
+        dist_samples = np.random.uniform(1, 30, (n_values, 3)) * u.kpc
+        snr_samples = sources.snr_for_distances(dist_samples)
+        self.assertEqual(snr_samples.shape, (n_values, 3))
+
+        snr_shared = sources.snr_for_distances([1, 10] * u.Mpc)
+        self.assertEqual(snr_shared.shape, (n_values, 2))
+
+        for i in range(3):
+            resampled = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                      dist=dist_samples[:, i])
+            self.assertTrue(np.allclose(resampled.get_snr(),
+                                        snr_samples[:, i]))
+
+        # the cache follows changes to the sources and their evolution
+        sources.ecc = np.random.uniform(0.0, 0.5, n_values)
+        changed = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb,
+                                ecc=sources.ecc,
+                                dist=np.ones(n_values) * u.kpc)
+        self.assertTrue(np.allclose(sources.snr_for_distances(1 * u.kpc)[:, 0],
+                                    changed.get_snr()))
+        sources.advance(1 * u.Myr)
+        changed.advance(1 * u.Myr)
+        self.assertTrue(np.allclose(sources.snr_for_distances(1 * u.kpc)[:, 0],
+                                    changed.get_snr()))
+
+        no_units = np.ones(n_values)
+        self.assertRaises(AssertionError, sources.snr_for_distances, no_units)
+        self.assertRaises(ValueError, sources.snr_for_distances,
+                          np.ones((2, 2)) * u.kpc)
+
+
+    def test_snr_multiple_t_obs(self):
+        """check that the snr for several observation times matches
+        calculating each separately"""
+        n_values = 100
+        m_1 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        dist = np.random.uniform(1, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-5, -3, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.5, n_values)
+        t_obs = [1, 2, 4, 10] * u.yr
+
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+        snr_multi = sources.get_snr(t_obs=t_obs)
+        self.assertEqual(snr_multi.shape, (n_values, len(t_obs)))
+        self.assertEqual(sources.max_snr_harmonic.shape, snr_multi.shape)
+
+        # a single t_obs uses the same noise for each duration regardless of
+        # the t_obs in sc_params
+        msh_multi = sources.max_snr_harmonic.copy()
+        for i, t in enumerate(t_obs):
+            single = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                   dist=dist)
+            self.assertTrue(np.allclose(single.get_snr(t_obs=t),
+                                        snr_multi[:, i], rtol=1e-10, atol=0))
+            self.assertTrue(np.array_equal(single.max_snr_harmonic,
+                                           msh_multi[:, i]))
+
+        # sources are classified as stationary or evolving for each duration
+        m_1 = np.random.uniform(5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(5, 10, n_values) * u.Msun
+        f_orb = 10**(np.random.uniform(-3.5, -2, n_values)) * u.Hz
+        t_obs = [0.5, 1, 4] * u.yr
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+        stationary = np.transpose([
+            sources.get_source_mask(stationary=True, t_obs=t) for t in t_obs])
+        mixed = stationary.any(axis=1) & ~stationary.all(axis=1)
+        self.assertTrue(mixed.any())
+        snr_multi = sources.get_snr(t_obs=t_obs, n_step=200)
+        for i, t in enumerate(t_obs):
+            single = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                   dist=dist)
+            snr_single = single.get_snr(t_obs=t, n_step=200)
+            stat = stationary[:, i]
+            self.assertTrue(np.allclose(snr_single[stat],
+                                        snr_multi[stat, i], rtol=1e-10,
+                                        atol=0))
+            self.assertTrue(np.allclose(snr_single[~stat],
+                                        snr_multi[~stat, i], rtol=1e-2))
+
+        # evolving sources reuse the evolution of the longest duration
+        f_orb = 10**(np.random.uniform(-2.5, -2, n_values)) * u.Hz
+        m_1 = np.random.uniform(5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(5, 10, n_values) * u.Msun
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb,
+                                ecc=np.zeros(n_values), dist=dist)
+        t_obs = [2, 4] * u.yr
+        snr_multi = sources.get_snr(t_obs=t_obs, n_step=200)
+        for i, t in enumerate(t_obs):
+            sources.update_sc_params({"t_obs": t})
+            self.assertTrue(np.allclose(sources.get_snr(t_obs=t, n_step=200),
+                                        snr_multi[:, i], rtol=1e-2))
+
+    def test_snr_track(self):
+        """check that the cumulative snr grows to match the total snr"""
+        n_values = 50
+        m_1 = np.random.uniform(5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(5, 10, n_values) * u.Msun
+        dist = np.random.uniform(1, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-2.5, -2, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.1, n_values)
+        t_obs = 4 * u.yr
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+
+        snr, track = sources.get_snr_evolving(t_obs=t_obs, n_step=100,
+                                              ret_snr_track=True)
+        self.assertEqual(track.shape, (n_values, 100))
+        self.assertEqual(track.dtype, np.float32)
+        self.assertTrue(np.all(track[:, 0] == 0.0))
+        self.assertTrue(np.all(np.diff(track, axis=1) >= 0.0))
+        self.assertTrue(np.allclose(track[:, -1], snr, rtol=1e-5))
+
+        # the track at the end of a shorter observation matches its snr
+        times = [0.5, 1, 2] * u.yr
+        _, track = sources.get_snr_evolving(t_obs=t_obs, n_step=1000,
+                                            ret_snr_track=True,
+                                            track_times=times)
+        snr_short = sources.get_snr_evolving(t_obs=times[1], n_step=1000)
+        self.assertTrue(np.allclose(track[:, 1], snr_short, rtol=1e-2))
+
+    def test_snr_for_sc_params(self):
+        """check that a sweep over sensitivity curves matches updating the
+        parameters for each one"""
+        n_values = 100
+        m_1 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        dist = np.random.uniform(1, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-5, -3, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.5, n_values)
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+
+        sc_params_list = [{}, {"L": 2e9}, {"include_confusion_noise": False},
+                          {"approximate_R": True, "t_obs": 2 * u.yr}]
+        snr = sources.get_snr()
+        msh = sources.max_snr_harmonic.copy()
+        snr_sweep = sources.get_snr_for_sc_params(sc_params_list)
+        self.assertEqual(snr_sweep.shape, (n_values, len(sc_params_list)))
+
+        # the sweep leaves the stored snrs and their settings alone
+        self.assertTrue(np.array_equal(sources.snr, snr))
+        self.assertTrue(np.array_equal(sources.max_snr_harmonic, msh))
+        self.assertEqual(len(sources._get_dirty_sources(
+            sources._get_default_snr_settings(4 * u.yr, 100))), 0)
+
+        for i, sc_params in enumerate(sc_params_list):
+            sources.update_sc_params(sc_params)
+            snr_single = sources.get_snr(t_obs=sc_params.get("t_obs",
+                                                             4 * u.yr))
+            self.assertTrue(np.allclose(snr_sweep[:, i], snr_single))
+
+        self.assertRaises(ValueError, sources.get_snr_for_sc_params, [])
+
+        # noise models without a t_obs need one to be given explicitly
+        tianqin = source.lisa.get_noise_model("tianqin")
+        self.assertRaises(ValueError, sources.get_snr_for_sc_params,
+                          [tianqin])
+
+    def test_noise_model(self):
+        """check that sources can use any noise model"""
+        n_values = 100
+        m_1 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(0.5, 10, n_values) * u.Msun
+        dist = np.random.uniform(1, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-5, -2, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.5, n_values)
+
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+        lisa_model = source.lisa.get_noise_model("lisa")
+        self.assertTrue(sources.sc is lisa_model)
+
+        tianqin = source.lisa.get_noise_model("tianqin")
+        tianqin_sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb,
+                                        ecc=ecc, dist=dist,
+                                        noise_model=tianqin)
+        self.assertTrue(tianqin_sources.sc is tianqin)
+
+        # a sweep over models matches using each model separately
+        snr_sweep = sources.get_snr_for_sc_params([lisa_model,
+                                                   (tianqin, 4 * u.yr)])
+        self.assertTrue(np.allclose(snr_sweep[:, 0], sources.get_snr()))
+        self.assertTrue(np.allclose(snr_sweep[:, 1],
+                                    tianqin_sources.get_snr()))
+
+    def test_population_confusion_noise(self):
+        """check that a population's confusion noise plugs into a Source"""
+        n_values = 5000
+        m_1 = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        m_2 = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        f_orb = 10**(np.random.uniform(-4, -2.5, n_values)) * u.Hz
+        dist = np.random.uniform(1, 20, n_values) * u.kpc
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb,
+                                ecc=np.zeros(n_values), dist=dist)
+
+        model, resolved = source.lisa.population_confusion_noise(
+            m_c=sources.m_c, f_orb=f_orb, ecc=sources.ecc, dist=dist,
+            smoothing_bins=100, ret_resolved=True)
+        sources.set_sc(model)
+        self.assertTrue(sources.sc is model)
+
+        # resolved sources are (almost) all detectable against the new curve
+        snr = sources.get_snr()
+        self.assertTrue(np.mean(snr[resolved] > 7) > 0.9)
+
+    def test_frequency_index(self):
+        """check that band queries match a mask over the frequencies"""
+        n_values = 1000
+        m_1 = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        m_2 = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        f_orb = 10**(np.random.uniform(-5, -2, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.6, n_values)
+        dist = np.random.uniform(1, 20, n_values) * u.kpc
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+
+        f_lo, f_hi = 1e-4 * u.Hz, 1e-3 * u.Hz
+        f_dom = f_orb * sources.max_strain_harmonic(ecc)
+        for frequency, f in [("f_orb", f_orb), ("f_dom", f_dom)]:
+            inds = sources.get_sources_in_band(f_lo, f_hi, frequency)
+            mask = (f >= f_lo) & (f <= f_hi)
+            self.assertTrue(np.array_equal(np.sort(inds),
+                                           np.flatnonzero(mask)))
+            self.assertTrue(np.all(np.diff(f[inds]) >= 0))
+
+        bins = np.logspace(-5, -2, 31) * u.Hz
+        counts = sources.count_sources_in_bins(bins, "f_orb")
+        self.assertTrue(np.array_equal(counts,
+                                       np.histogram(f_orb, bins=bins)[0]))
+
+        # changing the frequencies rebuilds the index
+        sources.advance(1 * u.Myr)
+        inds = sources.get_sources_in_band(f_lo, f_hi, "f_orb")
+        mask = (sources.f_orb >= f_lo) & (sources.f_orb <= f_hi)
+        self.assertTrue(np.array_equal(np.sort(inds), np.flatnonzero(mask)))
+
+        with self.assertRaises(ValueError):
+            sources.get_sources_in_band(f_lo, f_hi, "f_GW")
+
+    def test_parameter_table(self):
+        """check that parameters stored in SI units keep their own units"""
+        n_values = 50
+        m_1 = np.random.uniform(5, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(5, 10, n_values) * u.Msun
+        dist = np.random.uniform(1, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-5, -3, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.5, n_values)
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+
+        self.assertTrue(sources.m_1.unit == u.Msun)
+        self.assertTrue(sources.dist.unit == u.kpc)
+        self.assertTrue(np.allclose(sources.dist, dist, rtol=1e-12, atol=0))
+        self.assertTrue(np.shares_memory(sources.f_orb, sources._table.values))
+        self.assertFalse(hasattr(sources, "__dict__"))
+
+        # the inputs are copied so they can't be changed by the Source
+        self.assertFalse(np.shares_memory(sources.ecc, ecc))
+
+        sources.m_c = sources.m_c.to(u.kg)
+        self.assertTrue(sources.m_c.unit == u.kg)
+        with self.assertRaises(AssertionError):
+            sources.dist = dist.value
+
+        # values can't be changed in place, even when converted from SI
+        for name in ["dist", "f_orb", "ecc"]:
+            with self.assertRaises(ValueError):
+                getattr(sources, name)[0] = getattr(sources, name)[1]
+        self.assertTrue(np.allclose(sources.dist, dist, rtol=1e-12, atol=0))
+
+        inds = np.array([3, 1, 4])
+        m_c, ecc = sources._take(inds, "m_c", "ecc")
+        self.assertTrue(np.allclose(m_c, sources.m_c[inds]))
+        self.assertTrue(np.all(ecc == sources.ecc[inds]))
+
+    def test_subset(self):
+        """check that views of sources match the full set of sources"""
+        n_values = 200
+        m_1 = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        m_2 = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        f_orb = 10**(np.random.uniform(-4, -2, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.3, n_values)
+        dist = np.random.uniform(1, 20, n_values) * u.kpc
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+        snr = sources.get_snr()
+
+        mask = f_orb > 1e-3 * u.Hz
+        view = sources[mask]
+        self.assertTrue(view.n_sources == mask.sum())
+        self.assertTrue(view.g is sources.g and view.sc is sources.sc)
+        self.assertTrue(np.allclose(view.f_orb, f_orb[mask]))
+        self.assertTrue(np.allclose(view.get_snr(), snr[mask]))
+
+        # views of views and slices
+        inner = view[::2]
+        self.assertTrue(np.allclose(inner.dist, dist[mask][::2]))
+        self.assertTrue(isinstance(sources.subset(3), source.Source))
+
+        # changes to the view are shared with the parent
+        inner.dist = inner.dist * 2
+        self.assertTrue(np.allclose(sources.dist[mask][::2],
+                                    2 * dist[mask][::2]))
+
+        # snrs are only written back when requested
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+        sources[mask].get_snr()
+        self.assertTrue(sources.snr is None)
+        sources.subset(mask, write_back=True).get_snr()
+        self.assertTrue(np.allclose(sources.snr[mask], snr[mask]))
+        self.assertTrue(np.all(sources.snr[~mask] == 0.0))
+
+    def test_incremental_snr(self):
+        """check that only changed or new sources have their snr
+        recalculated"""
+        n_values = 300
+        m_1 = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        m_2 = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        f_orb = 10**(np.random.uniform(-4, -2, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.3, n_values)
+        dist = np.random.uniform(1, 20, n_values) * u.kpc
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+        sources.get_snr()
+
+        # mark an unchanged source so we can tell if it is recalculated
+        sources.snr[0] = -1.0
+        new_ecc = ecc.copy()
+        new_ecc[[5, 7]] = 0.5
+        sources.ecc = new_ecc
+        settings = sources._get_snr_settings("source", 4 * u.yr, 100)
+        self.assertTrue(np.array_equal(sources._get_dirty_sources(settings),
+                                       [5, 7]))
+        snr = sources.get_snr()
+        self.assertTrue(snr[0] == -1.0)
+
+        full = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=new_ecc,
+                             dist=dist)
+        self.assertTrue(np.allclose(snr[1:], full.get_snr()[1:]))
+
+        # changing the settings recalculates everything
+        snr = sources.get_snr(t_obs=2 * u.yr)
+        self.assertTrue(snr[0] > 0.0)
+
+        # appended sources are the only ones calculated
+        sources.get_snr()
+        sources.snr[0] = -1.0
+        sources.append(m_1=m_1[:10], m_2=m_2[:10], ecc=new_ecc[:10],
+                       dist=dist[:10], f_orb=f_orb[:10])
+        self.assertTrue(sources.n_sources == n_values + 10)
+        snr = sources.get_snr()
+        self.assertTrue(snr[0] == -1.0)
+        self.assertTrue(np.allclose(snr[n_values + 1:], snr[1:10]))
+
+        with self.assertRaises(ValueError):
+            sources[:5].append(m_1=m_1[:1], m_2=m_2[:1], ecc=ecc[:1],
+                               dist=dist[:1], f_orb=f_orb[:1])
+
+    def test_snr_settings_keys(self):
+        """check that equivalent noise models and g(n,e) tables share snrs
+        whilst different ones recalculate them"""
+        n_values = 50
+        m_1 = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        m_2 = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        f_orb = 10**(np.random.uniform(-4, -2, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.3, n_values)
+        dist = np.random.uniform(1, 20, n_values) * u.kpc
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist, sc_params={"L": 2e9})
+        snr = sources.get_snr()
+        sources.get_horizon_distance()
+        snr_dist = sources._snr_dist
+
+        # new instances of the same noise model and g(n,e) table
+        sc, g = sources.sc, sources.g
+        source.lisa._NOISE_MODEL_CACHE.clear()
+        sources.update_sc_params({"L": 2.0e9, "t_obs": 4 * u.yr})
+        sources.set_g(True)
+        self.assertTrue(sources.sc is not sc and sources.g is not g)
+        settings = sources._get_default_snr_settings(4 * u.yr, 100)
+        self.assertEqual(len(sources._get_dirty_sources(settings)), 0)
+        sources.get_horizon_distance()
+        self.assertTrue(sources._snr_dist is snr_dist)
+        self.assertTrue(np.array_equal(sources.get_snr(), snr))
+
+        # a different noise model or g(n,e) recalculates everything
+        sources.update_sc_params({"L": 2.5e9})
+        self.assertTrue(sources._get_dirty_sources(
+            sources._get_default_snr_settings(4 * u.yr, 100)) is None)
+        sources.get_snr()
+        sources.set_g(False)
+        self.assertTrue(sources._get_dirty_sources(
+            sources._get_default_snr_settings(4 * u.yr, 100)) is None)
+
+    def test_in_place_changes(self):
+        """check that columns can't be changed in place behind the back of
+        the snr, mask and frequency caches"""
+        n_values = 100
+        m_1 = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        m_2 = np.random.uniform(0.2, 0.8, n_values) * u.Msun
+        f_orb = 10**(np.random.uniform(-4, -2, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.3, n_values)
+        dist = np.random.uniform(1, 20, n_values) * u.kpc
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+        sources.get_snr()
+        circular = sources.get_source_mask(circular=True)
+        in_band = sources.get_sources_in_band(1e-4 * u.Hz, 1e-3 * u.Hz)
+        generation = sources._table.generation
+
+        for target in [sources, sources[10:20]]:
+            with self.assertRaises(ValueError):
+                target.ecc[:5] = 0.3
+            with self.assertRaises(ValueError):
+                target.f_orb[0] = 1 * u.Hz
+            with self.assertRaises(ValueError):
+                target.dist *= 2
+        self.assertTrue(np.all(sources.ecc == ecc))
+        self.assertTrue(sources._table.generation == generation)
+
+        settings = sources._get_snr_settings("source", 4 * u.yr, 100)
+        self.assertTrue(len(sources._get_dirty_sources(settings)) == 0)
+        self.assertTrue(np.array_equal(
+            sources.get_source_mask(circular=True), circular))
+        self.assertTrue(np.array_equal(
+            sources.get_sources_in_band(1e-4 * u.Hz, 1e-3 * u.Hz), in_band))
+
+        # changing a copy and setting it back updates everything
+        new_ecc = sources.ecc.copy()
+        new_ecc[:5] = 0.3
+        sources.ecc = new_ecc
+        self.assertTrue(np.array_equal(sources._get_dirty_sources(settings),
+                                       np.arange(5)))
+        circular = sources.get_source_mask(circular=True)
+        self.assertTrue(np.array_equal(circular, new_ecc <= sources.ecc_tol))
+
+    def test_mask_cache(self):
+        """check that cached masks are updated when the sources change"""
+        n_values = 500
+        m_1 = np.random.uniform(0.2, 10, n_values) * u.Msun
+        m_2 = np.random.uniform(0.2, 10, n_values) * u.Msun
+        f_orb = 10**(np.random.uniform(-5, -1, n_values)) * u.Hz
+        ecc = np.random.uniform(0.0, 0.3, n_values)
+        dist = np.random.uniform(1, 20, n_values) * u.kpc
+        sources = source.Source(m_1=m_1, m_2=m_2, f_orb=f_orb, ecc=ecc,
+                                dist=dist)
+
+        def direct(sources, t_obs=4 * u.yr):
+            stat = utils.determine_stationarity(m_c=sources.m_c,
+                                                f_orb_i=sources.f_orb,
+                                                t_evol=t_obs,
+                                                ecc_i=sources.ecc,
+                                                stat_tol=sources.stat_tol)
+            return np.logical_and(sources.ecc <= sources.ecc_tol, stat)
+
+        mask = sources.get_source_mask(circular=True, stationary=True)
+        self.assertTrue(np.array_equal(mask, direct(sources)))
+        self.assertTrue(len(sources._mask_cache) == 2)
+
+        # repeated calls give the same (but not the cached) mask
+        again = sources.get_source_mask(circular=True, stationary=True)
+        self.assertTrue(np.array_equal(again, mask) and again is not mask)
+
+        new_ecc = ecc.copy()
+        new_ecc[:50] = 0.0
+        sources.ecc = new_ecc
+        sources.f_orb = np.where(np.arange(n_values) < 100, 1e-2 * u.Hz,
+                                 f_orb)
+        mask = sources.get_source_mask(circular=True, stationary=True)
+        self.assertTrue(np.array_equal(mask, direct(sources)))
+
+        sources.append(m_1=m_1[:10], m_2=m_2[:10], ecc=ecc[:10],
+                       dist=dist[:10], f_orb=f_orb[:10])
+        mask = sources.get_source_mask(circular=False, stationary=False,
+                                       t_obs=1 * u.yr)
+        self.assertTrue(len(mask) == n_values + 10)
+        self.assertTrue(np.array_equal(
+            mask, np.logical_and(sources.ecc > sources.ecc_tol,
+                                 ~utils.determine_stationarity(
+                                     m_c=sources.m_c, f_orb_i=sources.f_orb,
+                                     t_evol=1 * u.yr, ecc_i=sources.ecc,
+                                     stat_tol=sources.stat_tol))))
@@ -1,6 +1,7 @@
 import numpy as np
 import legwork.strain as strain
 import legwork.utils as utils
+import legwork.tables as tables
 import unittest
 
 from astropy import units as u
@@ -27,3 +28,83 @@ class Test(unittest.TestCase):
         fn_dot = utils.fn_dot(m_c, f_orb, e, n)
 
         self.assertTrue(np.allclose(should_be_fn_dot, fn_dot))
+
+    def test_asymptotic_harmonics(self):
+        """checks that switching to the asymptotic g(n, e) at high harmonics
+        doesn't change the strain"""
+        n_values = 100
+
+        m_c = np.random.uniform(0, 10, n_values) * u.Msun
+        dist = np.random.uniform(0, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-5, -1, n_values)) * u.Hz
+        e = np.random.uniform(0.9, 0.99, n_values)
+        e[:10] = np.logspace(-8, -1, 10)
+        e[-10:] = 1 - np.logspace(-3, -9, 10)
+        n = np.arange(1, 501)
+
+        h0_exact = strain.h_0_n(m_c, f_orb, e, n, dist, asymptotic_n=np.inf)
+        h0 = strain.h_0_n(m_c, f_orb, e, n, dist, asymptotic_n=100)
+        self.assertTrue(np.allclose(h0, h0_exact, rtol=1e-5, atol=0))
+
+        hc_exact = strain.h_c_n(m_c, f_orb, e, n, dist, asymptotic_n=np.inf)
+        hc = strain.h_c_n(m_c, f_orb, e, n, dist, asymptotic_n=100)
+        self.assertTrue(np.allclose(hc, hc_exact, rtol=1e-5, atol=0))
+
+        # exact g(n, e) is exact by default but interpolated g(n, e) switches
+        self.assertTrue(np.all(strain.h_0_n(m_c, f_orb, e, n, dist)
+                               == h0_exact))
+        g_interp = tables.TiledGInterpolator()
+        h0_interp = strain.h_0_n(m_c, f_orb, e, n, dist,
+                                 interpolated_g=g_interp)
+        accurate = e >= utils.ASYMPTOTIC_E_MIN
+        self.assertTrue(np.all(h0_interp[accurate, :, 99:]
+                               == h0[accurate, :, 99:]))
+
+    def test_strain_out_and_sums(self):
+        """checks that strains can be written into preallocated arrays and
+        that the sums over harmonics match the full strains"""
+        n_values, n_step = 50, 10
+
+        m_c = np.random.uniform(0, 10, n_values) * u.Msun
+        dist = np.random.uniform(0, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-5, -1, (n_values, n_step))) * u.Hz
+        e = np.random.uniform(0, 0.9, (n_values, n_step))
+        n = np.arange(1, 151)
+
+        for func, sum_func in [(strain.h_0_n, strain.h_0_n_2_sum),
+                               (strain.h_c_n, strain.h_c_n_2_sum)]:
+            h = func(m_c, f_orb, e, n, dist)
+            self.assertTrue(h.shape == (n_values, n_step, len(n)))
+
+            out = np.zeros((n_values, n_step, len(n)), dtype=np.float32)
+            h_32 = func(m_c, f_orb, e, n, dist, out=out)
+            self.assertTrue(h_32 is out)
+            self.assertTrue(np.allclose(h_32, h.value, rtol=1e-6,
+                                        atol=1e-6 * h.value.max()))
+
+            h_2_sum = sum_func(m_c, f_orb, e, n, dist, chunk_size=40)
+            self.assertTrue(np.allclose(h_2_sum, (h**2).sum(axis=-1)))
+
+        # single precision outputs don't lose the small g(n, e) of high
+        # harmonics, nor precision when summing
+        m_c, f_orb, dist = [10] * u.Msun, [1e-3] * u.Hz, [1e-10] * u.kpc
+        n_high = np.arange(100, 151)
+        h = strain.h_0_n(m_c, f_orb, 0.5, n_high, dist)
+        self.assertTrue(np.all(h.value > np.finfo(np.float32).tiny))
+        out = np.zeros(h.shape, dtype=np.float32)
+        strain.h_0_n(m_c, f_orb, 0.5, n_high, dist, out=out)
+        self.assertTrue(np.allclose(out, h.value, rtol=1e-6, atol=0))
+
+        h_2_sum = strain.h_0_n_2_sum(m_c, f_orb, 0.9, n, dist, chunk_size=3)
+        out = np.zeros((1, 1), dtype=np.float32)
+        strain.h_0_n_2_sum(m_c, f_orb, 0.9, n, dist, chunk_size=3, out=out)
+        self.assertTrue(out[0, 0] == np.float32(h_2_sum[0, 0].value))
+
+        # a single eccentricity per source is broadcast over timesteps
+        m_c = np.random.uniform(0, 10, n_values) * u.Msun
+        dist = np.random.uniform(0, 30, n_values) * u.kpc
+        f_orb = 10**(np.random.uniform(-5, -1, (n_values, n_step))) * u.Hz
+        h = strain.h_0_n(m_c, f_orb, e[:, 0], n, dist)
+        h_full = strain.h_0_n(m_c, f_orb, np.repeat(e[:, :1], n_step, axis=1),
+                              n, dist)
+        self.assertTrue(np.allclose(h, h_full))
@@ -0,0 +1,87 @@
+import numpy as np
+import legwork.tables as tables
+import legwork.utils as utils
+import unittest
+import tempfile
+import os
+
+
+class Test(unittest.TestCase):
+    """Tests that the code is functioning properly"""
+
+    def test_tiled_g(self):
+        """checks that a tiled g(n, e) grid can be saved and interpolated"""
+        n_max, e_len = 250, 200
+        e_range = np.linspace(0, 0.9, e_len)
+        g_grid = utils.peters_g_sweep(n_max, e_range)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "g.npy")
+            info_path = os.path.join(tmp, "g_info.npz")
+
+            for dtype in [np.float64, np.float32]:
+                tables.save_g_tiles(g_grid, (0, 0.9), path, info_path,
+                                    tile_size=100, dtype=dtype)
+                tiles, e_grid, n_grid = tables.load_g_tiles(path, info_path)
+                self.assertTrue(tiles.shape == (3, e_len, 100))
+                self.assertTrue(n_grid == n_max)
+                self.assertTrue(np.allclose(e_grid, e_range))
+
+                g = tables.TiledGInterpolator(path, info_path)
+
+                # interpolators of the same grid share a key
+                self.assertEqual(g.key, tables.TiledGInterpolator(
+                    path, info_path).key)
+                self.assertEqual(g.key, tables.load_g_tiles(
+                    path, info_path, ret_key=True)[3])
+                if dtype == np.float64:
+                    key_64 = g.key
+                else:
+                    self.assertNotEqual(g.key, key_64)
+
+                # values on the grid are reproduced
+                n = np.arange(1, n_max + 1)
+                self.assertTrue(np.allclose(g(n, e_range), g_grid,
+                                            rtol=1e-6, atol=1e-12))
+
+                # values between grid points are close to exact
+                e = np.sort(np.random.uniform(0, 0.8, 50))
+                g_exact = utils.peters_g(n[np.newaxis, :], e[:, np.newaxis])
+                self.assertTrue(np.allclose(g(n, e), g_exact, atol=1e-4))
+
+                # outputs are sorted like interp2d
+                self.assertTrue(g(n, 0.5).shape == (n_max,))
+                self.assertTrue(np.all(g(2, e[::-1]) == g(2, e)))
+
+                del g, tiles
+
+    def test_build_tables(self):
+        """checks that tables can be built in parallel and verified"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "g.npy")
+            info_path = os.path.join(tmp, "g_info.npz")
+            harm_path = os.path.join(tmp, "harmonics.npz")
+
+            tables.build_g_tiles(path, info_path, e_lims=(0, 0.9), e_len=50,
+                                 n_max=120, tile_size=50, n_proc=2)
+            tiles, e_range, n_max = tables.load_g_tiles(path, info_path,
+                                                        verify=True)
+            g_grid = tiles.transpose(1, 0, 2).reshape(50, -1)[:, :n_max]
+            self.assertTrue(np.allclose(g_grid,
+                                        tables.build_g_grid(e_range, n_max)))
+            del tiles
+
+            # tampering with the grid is caught by the checksum
+            g_grid[0, 0] += 1
+            np.save(path, g_grid)
+            no_worries = True
+            try:
+                tables.load_g_tiles(path, info_path, verify=True)
+            except ValueError:
+                no_worries = False
+            self.assertFalse(no_worries)
+
+            tables.build_harmonics(harm_path, e_len=20, n_max=100)
+            self.assertTrue(tables.verify_harmonics(harm_path))
+            with np.load(harm_path) as table:
+                self.assertTrue(table["g_vals"].shape == (20, 100))
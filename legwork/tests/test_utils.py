@@ -1,5 +1,6 @@
 import numpy as np
 import legwork.utils as utils
+from scipy.special import jv
 import unittest
 
 from astropy import units as u
@@ -44,3 +45,56 @@ class Test(unittest.TestCase):
         except ValueError:
             no_worries = False
         self.assertFalse(no_worries)
+
+    def test_peters_g_recurrence(self):
+        """check that the recurrence relation matches direct evaluation of
+        the bessel functions"""
+        n = np.arange(1, 501)
+        e = np.concatenate(([0.0, 1e-6], np.random.uniform(0, 0.9, 20)))
+
+        g_sweep = utils.peters_g_sweep(n_max=len(n), e=e, chunk_size=1000)
+        self.assertTrue(g_sweep.shape == (len(e), len(n)))
+
+        n, e = n[np.newaxis, :], e[:, np.newaxis]
+        bracket_1 = jv(n-2, n*e) - 2*e*jv(n-1, n*e) + 2/n*jv(n, n*e) \
+            + 2*e*jv(n+1, n*e) - jv(n+2, n*e)
+        bracket_2 = jv(n-2, n*e) - 2*jv(n, n*e) + jv(n+2, n*e)
+        bracket_3 = jv(n, n*e)
+        g_direct = n**4/32 * (bracket_1**2 + (1 - e**2) * bracket_2**2
+                              + 4 / (3 * n**3) * bracket_3**2)
+
+        self.assertTrue(np.allclose(g_sweep, g_direct, rtol=1e-7,
+                                    atol=1e-12))
+        self.assertTrue(np.allclose(g_sweep[:, 9],
+                                    utils.peters_g(10, e[:, 0])))
+        self.assertTrue(utils.peters_g(2, 0.0) == 1.0)
+
+    def test_peters_g_asymptotic(self):
+        """check that the asymptotic g(n, e) matches the exact version within
+        its error bound"""
+        n = np.unique(np.logspace(np.log10(2), np.log10(30000),
+                                  30).astype(int))
+        e = np.concatenate((np.geomspace(1e-4, 1e-1, 20),
+                            np.linspace(0.1, 0.99, 50),
+                            1 - np.logspace(-2, -10, 60)))
+
+        g_exact = utils.peters_g(n[np.newaxis, :], e[:, np.newaxis])
+        g_asymptotic = utils.peters_g_asymptotic(n[np.newaxis, :],
+                                                 e[:, np.newaxis])
+
+        bound = np.broadcast_to(0.1 / n**2, g_exact.shape)
+        significant = g_exact > 1e-250
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rel_err = np.abs(g_asymptotic / g_exact - 1)
+        self.assertTrue(np.all(rel_err[significant] <= bound[significant]))
+
+        # the approximation is only used where this bound applies
+        region = utils.asymptotic_g_region(n[np.newaxis, :], e[:, np.newaxis])
+        self.assertTrue(np.all(region == (n >= utils.ASYMPTOTIC_N)))
+        self.assertFalse(utils.asymptotic_g_region(1000, 1e-6))
+        self.assertTrue(utils.asymptotic_g_region(1000, 0.0))
+        self.assertFalse(utils.asymptotic_g_region(1, 0.5, n_min=1))
+
+        # circular binaries only emit at n = 2
+        self.assertTrue(utils.peters_g_asymptotic(2, 0.0) == 1.0)
+        self.assertTrue(utils.peters_g_asymptotic(200, 0.0) == 0.0)
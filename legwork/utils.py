@@ -1,15 +1,21 @@
 """A collection of miscellaneous utility functions"""
 
-from scipy.special import jv
+from scipy.special import jv, airy
 from astropy import constants as c
 from astropy import units as u
 import numpy as np
 import legwork.evol as evol
 
-__all__ = ['chirp_mass', 'peters_g', 'peters_f', 'get_a_from_f_orb',
+__all__ = ['chirp_mass', 'peters_g', 'peters_g_sweep', 'peters_g_asymptotic',
+           'asymptotic_g_region', 'peters_f', 'get_a_from_f_orb',
            'get_f_orb_from_a', 'get_a_from_ecc', 'beta', 'c_0',
            'determine_stationarity', 'fn_dot', 'ensure_array']
 
+# harmonic above which g(n, e) is computed with its asymptotic approximation
+# (when interpolating g) and the lowest eccentricity at which it is accurate
+ASYMPTOTIC_N = 100
+ASYMPTOTIC_E_MIN = 1e-4
+
 
 def chirp_mass(m_1, m_2):
     """Computes chirp mass of binaries
@@ -54,20 +60,188 @@ def peters_g(n, e):
     -------
     g : `array`
         g(n, e) from Peters and Mathews (1963) Eq. 20
-    """
 
-    bracket_1 = jv(n-2, n*e) - 2*e*jv(n-1, n*e) \
-        + 2/n*jv(n, n*e) + 2*e*jv(n+1, n*e) \
-        - jv(n+2, n*e)
-    bracket_2 = jv(n-2, n*e) - 2*jv(n, n*e) + jv(n+2, n*e)
-    bracket_3 = jv(n, n*e)
+    Notes
+    -----
+    Only :math:`J_{n+2}(ne)` and :math:`J_{n+1}(ne)` are evaluated directly.
+    The remaining Bessel functions are found with the (stable) downward
+    recurrence relation
+
+    .. math::
+
+        J_{\\nu - 1}(x) = \\frac{2 \\nu}{x} J_\\nu(x) - J_{\\nu + 1}(x)
+    """
+    n, e = np.broadcast_arrays(n, e)
+    x = n * e
+
+    # the recurrence relation is undefined for x = 0
+    zero = x == 0.0
+    x_safe = np.where(zero, 1.0, x)
+
+    j_n_plus_2 = jv(n + 2, x)
+    j_n_plus_1 = jv(n + 1, x)
+    j_n = np.where(zero, jv(n, x), 2 * (n + 1) / x_safe * j_n_plus_1
+                   - j_n_plus_2)
+    j_n_minus_1 = np.where(zero, jv(n - 1, x), 2 * n / x_safe * j_n
+                           - j_n_plus_1)
+    j_n_minus_2 = np.where(zero, jv(n - 2, x), 2 * (n - 1) / x_safe
+                           * j_n_minus_1 - j_n)
+
+    bracket_1 = j_n_minus_2 - 2*e*j_n_minus_1 + 2/n*j_n + 2*e*j_n_plus_1 \
+        - j_n_plus_2
+    bracket_2 = j_n_minus_2 - 2*j_n + j_n_plus_2
+    bracket_3 = j_n
 
     g = n**4/32 * (bracket_1**2 + (1 - e**2) * bracket_2**2 +
                    4 / (3 * n**3) * bracket_3**2)
 
+    # return a scalar for scalar input
+    return g[()]
+
+
+def peters_g_sweep(n_max, e, chunk_size=100000):
+    """Compute g(n, e) for every harmonic from 1 to ``n_max`` for each
+    eccentricity using :func:`legwork.utils.peters_g`
+
+    Parameters
+    ----------
+    n_max : `int`
+        Highest harmonic of interest
+
+    e : `float/array`
+        Eccentricities
+
+    chunk_size : `int`
+        Maximum number of values of g(n, e) to evaluate at once (limits the
+        memory used by intermediate arrays)
+
+    Returns
+    -------
+    g : `array`
+        g(n, e) with shape ``(len(e), n_max)``
+    """
+    e = np.atleast_1d(e)
+    n = np.arange(1, n_max + 1)
+    g = np.zeros((len(e), n_max))
+
+    rows = max(chunk_size // n_max, 1)
+    for start in range(0, len(e), rows):
+        g[start:start + rows] = peters_g(n[np.newaxis, :],
+                                         e[start:start + rows, np.newaxis])
     return g
 
 
+def peters_g_asymptotic(n, e):
+    """Compute the uniform asymptotic approximation of g(n, e) for large n
+
+    The Bessel functions :math:`J_n(ne)` and :math:`J_n'(ne)` are computed
+    from the uniform asymptotic expansions in terms of Airy functions
+    (Olver 1954, DLMF 10.20.4-10.20.8) including the first order
+    correction terms (:math:`B_0, C_0`). The remaining Bessel functions
+    in Peters and Mathews (1963) Eq.20 are then found from these two with
+    the recurrence relations. The cost is therefore independent of both
+    n and e.
+
+    Parameters
+    ----------
+    n : `int/array`
+        Harmonic(s) of interest
+
+    e : `float/array`
+        Eccentricity
+
+    Returns
+    -------
+    g : `array`
+        Approximate g(n, e)
+
+    Notes
+    -----
+    The relative error is below :math:`0.1 n^{-2}` for :math:`n \\geq 2` and
+    :math:`e \\geq` ``ASYMPTOTIC_E_MIN`` = :math:`10^{-4}` (or
+    :math:`e = 0`). This bound is empirical: it was found by comparing to
+    :func:`legwork.utils.peters_g` for :math:`2 \\leq n \\leq 30000` and
+    :math:`10^{-4} \\leq e \\leq 1 - 10^{-10}`. At lower eccentricities the
+    brackets of Eq.20 cancel catastrophically and :math:`n = 1` is not
+    approximated well at all, so see
+    :func:`legwork.utils.asymptotic_g_region` for where to use it.
+    """
+    n, e = np.broadcast_arrays(n, e)
+    circular = e == 0.0
+    e = np.where(circular, 0.5, e)
+
+    s_2 = 1 - e**2
+    s = s_2**(0.5)
+
+    # zeta from 2/3 zeta^(3/2) = arctanh(s) - s (use series to avoid
+    # cancellation as e -> 1)
+    series = s**3 / 3 + s**5 / 5 + s**7 / 7
+    zeta = (1.5 * np.where(s < 1e-2, series, np.arctanh(s) - s))**(2/3)
+
+    # first order coefficients (limiting values used for e -> 1 to avoid
+    # cancellation)
+    near_one = s < 5e-3
+    zeta_safe = np.where(near_one, 1.0, zeta)
+    s_2_safe = np.where(near_one, 1.0, s_2)
+    B_0 = np.where(near_one, 2**(1/3) / 70, -5 / (48 * zeta_safe**2)
+                   + zeta_safe**(-0.5) * (5 / (24 * s_2_safe**(1.5))
+                                          - 1 / (8 * s_2_safe**(0.5))))
+    C_0 = np.where(near_one, 2**(2/3) / 10, 7 / (48 * zeta_safe)
+                   + zeta_safe**(0.5) * (-7 / (24 * s_2_safe**(1.5))
+                                         + 3 / (8 * s_2_safe**(0.5))))
+
+    ai, ai_prime, _, _ = airy(n**(2/3) * zeta)
+    prefac = (4 * zeta / s_2)**(0.25)
+    j_n = prefac * (ai / n**(1/3) + ai_prime * B_0 / n**(5/3))
+    j_n_prime = -2 / (e * prefac) * (ai_prime / n**(2/3)
+                                     + ai * C_0 / n**(4/3))
+
+    # rewrite the brackets of Eq.20 in terms of J_n(ne) and J_n'(ne)
+    bracket_1 = 4 * s_2 / e * j_n_prime + 2 / n * (1 - 2 / e**2) * j_n
+    bracket_2 = 4 * s_2 / e**2 * j_n - 4 / (n * e) * j_n_prime
+    bracket_3 = j_n
+
+    g = n**4/32 * (bracket_1**2 + (1 - e**2) * bracket_2**2 +
+                   4 / (3 * n**3) * bracket_3**2)
+
+    # only n = 2 contributes for circular binaries
+    g = np.where(circular, np.where(n == 2, 1.0, 0.0), g)
+
+    # return a scalar for scalar input
+    return g[()]
+
+
+def asymptotic_g_region(n, e, n_min=ASYMPTOTIC_N):
+    """Find where :func:`legwork.utils.peters_g_asymptotic` should be used
+    in place of :func:`legwork.utils.peters_g`
+
+    This is for harmonics of at least ``n_min`` and eccentricities for which
+    the approximation is accurate (:math:`e = 0` or
+    :math:`e \\geq` ``ASYMPTOTIC_E_MIN``), where its relative error is below
+    :math:`0.1 n_{\\rm min}^{-2}` (:math:`10^{-5}` for the default
+    ``n_min``).
+
+    Parameters
+    ----------
+    n : `int/array`
+        Harmonic(s) of interest
+
+    e : `float/array`
+        Eccentricity
+
+    n_min : `int`
+        Lowest harmonic for which to use the approximation (at least 2)
+
+    Returns
+    -------
+    use_asymptotic : `bool/array`
+        Mask with the broadcast shape of ``n`` and ``e``
+    """
+    n, e = np.broadcast_arrays(n, e)
+    accurate = np.logical_or(e == 0.0, e >= ASYMPTOTIC_E_MIN)
+    return np.logical_and(n >= max(n_min, 2), accurate)
+
+
 def peters_f(e):
     """f(e) from Peters and Mathews (1963) Eq.17
 
@@ -250,11 +424,11 @@ def determine_stationarity(f_orb_i, t_evol, ecc_i,
     """Determine whether a binary is stationary
 
     Check how much a binary's orbital frequency changes over ``t_evol`` time.
-    This function provides a conservative estimate in that some
-    binaries that are stationary may be marked as evolving. This
-    is because the eccentricity also evolves but only use the
-    initial value. Solving this in full would require the same
-    amount of time as assuming the binary is evolving.
+    The final frequency is computed with
+    :func:`legwork.evol.evolve_f_orb_ecc`, which accounts for the evolution
+    of the eccentricity using a tabulated solution rather than an ODE
+    integration, so the classification is exact (to within the interpolation
+    error) at the same cost as assuming a constant eccentricity.
 
     Parameters
     ----------
@@ -292,8 +466,8 @@ def determine_stationarity(f_orb_i, t_evol, ecc_i,
         m_c = chirp_mass(m_1, m_2)
 
     # calculate the final frequency
-    f_orb_f = evol.evolve_f_orb_circ(f_orb_i=f_orb_i, m_c=m_c,
-                                     t_evol=t_evol, ecc_i=ecc_i)
+    f_orb_f = evol.evolve_f_orb_ecc(f_orb_i=f_orb_i, m_c=m_c,
+                                    t_evol=t_evol, ecc_i=ecc_i)
 
     # check the stationary criterion
     stationary = (f_orb_f - f_orb_i) / f_orb_i <= stat_tol
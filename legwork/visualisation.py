@@ -282,8 +282,9 @@ def plot_2D_dist(x, y, weights=None, disttype="scatter", fig=None, ax=None,
 
 def plot_sensitivity_curve(frequency_range=None, y_quantity="ASD", fig=None,
                            ax=None, show=True, color="#18068b", fill=True,
-                           alpha=0.2, label=None, **kwargs):
-    """Plot the LISA sensitivity curve
+                           alpha=0.2, label=None, noise_model=None,
+                           **kwargs):
+    """Plot the LISA sensitivity curve (or that of another noise model)
 
     Parameters
     ----------
@@ -320,9 +321,14 @@ def plot_sensitivity_curve(frequency_range=None, y_quantity="ASD", fig=None,
     label : `string`
         Label for the sensitivity curve in legends
 
+    noise_model : :class:`legwork.lisa.NoiseModel`
+        Noise model to plot instead of the LISA curve given by ``kwargs``
+        (e.g. from :func:`legwork.lisa.get_noise_model`)
+
     **kwargs : `various`
         Keyword args are passed to :meth:`legwork.lisa.power_spectral_density`,
-        see those docs for details on possible arguments.
+        see those docs for details on possible arguments. These are ignored
+        if ``noise_model`` is supplied.
 
     Returns
     -------
@@ -339,7 +345,10 @@ def plot_sensitivity_curve(frequency_range=None, y_quantity="ASD", fig=None,
         fig, ax = plt.subplots()
 
     # work out what the noise amplitude should be
-    psd = lisa.power_spectral_density(f=frequency_range, **kwargs)
+    if noise_model is not None:
+        psd = noise_model.psd(frequency_range)
+    else:
+        psd = lisa.power_spectral_density(f=frequency_range, **kwargs)
     if y_quantity == "ASD":
         noise_amplitude = np.sqrt(psd)
     elif y_quantity == "h_c":
@@ -371,7 +380,8 @@ def plot_sensitivity_curve(frequency_range=None, y_quantity="ASD", fig=None,
 
 def plot_sources_on_sc_circ_stat(f_orb, h_0_2, snr,
                                  snr_cutoff=0, t_obs=4 * u.yr,
-                                 fig=None, ax=None, show=True, **kwargs):
+                                 fig=None, ax=None, show=True,
+                                 noise_model=None, **kwargs):
     """Overlay circular/stationary sources on the LISA sensitivity curve.
 
     Each source is plotted at its gravitational wave frequency (n = 2) such
@@ -407,6 +417,9 @@ def plot_sources_on_sc_circ_stat(f_orb, h_0_2, snr,
         Whether to immediately show the plot or only return the Figure
         and Axis
 
+    noise_model : :class:`legwork.lisa.NoiseModel`
+        Noise model to use instead of the LISA curve for ``t_obs``
+
     **kwargs : `various`
         This function is a wrapper on
         :func:`legwork.visualisation.plot_2D_dist` and each kwarg is passed
@@ -423,7 +436,8 @@ def plot_sources_on_sc_circ_stat(f_orb, h_0_2, snr,
     """
     # create figure if it wasn't provided
     if fig is None or ax is None:
-        fig, ax = plot_sensitivity_curve(show=False, t_obs=t_obs)
+        fig, ax = plot_sensitivity_curve(show=False, t_obs=t_obs,
+                                          noise_model=noise_model)
 
     # work out which binaries are above the cutoff
     detectable = snr > snr_cutoff
@@ -447,7 +461,8 @@ def plot_sources_on_sc_circ_stat(f_orb, h_0_2, snr,
 
 
 def plot_sources_on_sc_ecc_stat(f_dom, snr, snr_cutoff=0, t_obs=4 * u.yr,
-                                fig=None, ax=None, show=True, **kwargs):
+                                fig=None, ax=None, show=True, noise_model=None,
+                                **kwargs):
     """Overlay eccentric/stationary sources on the LISA sensitivity curve.
 
     Each source is plotted at its max snr harmonic frequency such that
@@ -478,6 +493,9 @@ def plot_sources_on_sc_ecc_stat(f_dom, snr, snr_cutoff=0, t_obs=4 * u.yr,
         Whether to immediately show the plot or only return the Figure
         and Axis
 
+    noise_model : :class:`legwork.lisa.NoiseModel`
+        Noise model to use instead of the LISA curve for ``t_obs``
+
     **kwargs : `various`
         This function is a wrapper on
         :func:`legwork.visualisation.plot_2D_dist` and each kwarg is passed
@@ -494,7 +512,8 @@ def plot_sources_on_sc_ecc_stat(f_dom, snr, snr_cutoff=0, t_obs=4 * u.yr,
     """
     # create figure if it wasn't provided
     if fig is None or ax is None:
-        fig, ax = plot_sensitivity_curve(show=False, t_obs=t_obs)
+        fig, ax = plot_sensitivity_curve(show=False, t_obs=t_obs,
+                                          noise_model=noise_model)
 
     # work out which binaries are above the cutoff
     detectable = snr > snr_cutoff
@@ -503,8 +522,11 @@ def plot_sources_on_sc_ecc_stat(f_dom, snr, snr_cutoff=0, t_obs=4 * u.yr,
         return fig, ax
 
     # calculate asd that makes it so height above curve is snr
-    asd = snr[detectable] \
-        * np.sqrt(lisa.power_spectral_density(f_dom[detectable]))
+    if noise_model is not None:
+        psd = noise_model.psd(f_dom[detectable])
+    else:
+        psd = lisa.power_spectral_density(f_dom[detectable], t_obs=t_obs)
+    asd = snr[detectable] * np.sqrt(psd)
 
     # plot either a scatter or density plot of the detectable binaries
     ylims = ax.get_ylim()